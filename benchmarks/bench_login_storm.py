@@ -0,0 +1,137 @@
+"""
+Benchmark latency of a mounted mock endpoint during a login storm, with bcrypt run inline
+on the event loop versus on the bounded password hashing thread pool.
+
+Usage:
+    python -m benchmarks.bench_login_storm [--logins 200] [--concurrency 20] [--requests 500]
+"""
+import os
+import time
+import asyncio
+import argparse
+import statistics
+
+from typing import List
+
+os.environ["ENV"] = "tests"
+
+# pylint: disable=wrong-import-position
+import httpx
+from fastapi import FastAPI
+
+from src import auth
+from src.main import app, mount_table
+
+
+class InlineHasher:
+    """
+    Hasher that runs bcrypt inline on the event loop, as before the thread pool.
+    """
+
+    def __init__(self, context):
+        self.context = context
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash password inline.
+        """
+        return self.context.hash(password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Verify password inline.
+        """
+        return self.context.verify(password, hashed_password)
+
+
+def build_mock_app() -> FastAPI:
+    """
+    Build mock project app with a single endpoint.
+    """
+    mock_app = FastAPI()
+
+    @mock_app.post("/model")
+    async def predict():
+        return {"label": "positive", "score": 0.99}
+
+    return mock_app
+
+
+async def login_storm(client: httpx.AsyncClient, logins: int, concurrency: int):
+    """
+    Send logins with bounded concurrency.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    credentials = {"username": "bench_user", "password": "bench_password"}
+
+    async def login():
+        async with semaphore:
+            await client.post("/auth/login", data = credentials)
+
+    await asyncio.gather(*[login() for _ in range(logins)])
+
+
+async def time_mock_requests(
+        client: httpx.AsyncClient, stop: asyncio.Event, limit: int, interval: float = 0.005
+        ) -> List[float]:
+    """
+    Time mock endpoint requests, sent one every interval seconds, until stop is set or limit is reached.
+
+    Latency is measured from the time each request is due, so that time a blocked event loop
+    delays sending the request is counted too.
+    """
+    timings = []
+    while not stop.is_set() and len(timings) < limit:
+        due = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        await client.post("/bench_user/mock/model")
+        timings.append((time.perf_counter() - due) * 1e3)
+    return timings
+
+
+async def run_scenario(hasher, logins: int, concurrency: int, requests: int) -> List[float]:
+    """
+    Run login storm alongside mock endpoint requests with given hasher.
+    """
+    auth.password_hasher = hasher
+    transport = httpx.ASGITransport(app = app)
+    async with httpx.AsyncClient(transport = transport, base_url = "http://bench") as client:
+        stop = asyncio.Event()
+        storm = asyncio.create_task(login_storm(client, logins, concurrency))
+        storm.add_done_callback(lambda _: stop.set())
+        timings = await time_mock_requests(client, stop, requests)
+        await storm
+    return sorted(timings)
+
+
+async def run(logins: int, concurrency: int, requests: int):
+    """
+    Run benchmark and print mock endpoint latency per hasher.
+    """
+    async with app.router.lifespan_context(app):
+        pool_hasher = auth.password_hasher
+        mount_table.mount("bench_user", "mock", build_mock_app())
+        await auth.Users.create(
+            username = "bench_user",
+            hashed_password = await pool_hasher.hash("bench_password")
+        )
+
+        print(f"{'hasher':>10} {'requests':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+        for name, hasher in (("inline", InlineHasher(auth.pwd_context)), ("pool", pool_hasher)):
+            timings = await run_scenario(hasher, logins, concurrency, requests)
+            p50 = statistics.median(timings)
+            p99 = timings[max(int(len(timings) * 0.99) - 1, 0)]
+            print(f"{name:>10} {len(timings):>10} {p50:>10.2f} {p99:>10.2f}")
+        auth.password_hasher = pool_hasher
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description = __doc__,
+        formatter_class = argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--logins", type = int, default = 200)
+    parser.add_argument("--concurrency", type = int, default = 20)
+    parser.add_argument("--requests", type = int, default = 500)
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.concurrency, args.requests))
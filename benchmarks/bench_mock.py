@@ -0,0 +1,83 @@
+"""
+Benchmark request latency of a mock project against the equivalent script-based project.
+
+Serves the API of examples/app.py, from the example script and from a mock project spec.
+
+Usage:
+    python -m benchmarks.bench_mock [--requests 5000]
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+from typing import Callable, List
+
+from examples.app import app as script_app
+from src.mock import MockApp
+
+
+SPEC = {
+    "routes": [{
+        "path": "/model",
+        "method": "POST",
+        "api_key": "example",
+        "response": {"body": {"label": "positive", "score": 0.99}},
+    }],
+}
+
+
+async def time_requests(app: Callable, num_requests: int) -> List[float]:
+    """
+    Time authorized inference requests sent straight to the ASGI app, bypassing the network.
+
+    Args:
+        app (Callable): ASGI app.
+        num_requests (int): Number of requests to time.
+
+    Returns:
+        List[float]: Per-request latencies in microseconds.
+    """
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/model", "raw_path": b"/model", "root_path": "",
+        "query_string": b"text=great", "headers": [(b"accesskey", b"example")],
+        "server": ("testserver", 80), "client": ("testclient", 50000),
+    }
+    timings = []
+    for _ in range(num_requests):
+        start = time.perf_counter()
+        await app(dict(scope), receive, send)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+async def run(num_requests: int):
+    """
+    Run mock benchmark and print median and p99 latency, and throughput, per project type.
+    """
+    print(f"{'project':>10} {'p50 (us)':>10} {'p99 (us)':>10} {'req/s':>10}")
+    for name, app in (("script", script_app), ("mock", MockApp(SPEC))):
+        await time_requests(app, 100)
+        timings = await time_requests(app, num_requests)
+        throughput = len(timings) / (sum(timings) / 1e6)
+        timings.sort()
+        p50 = statistics.median(timings)
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(f"{name:>10} {p50:>10.1f} {p99:>10.1f} {throughput:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description = __doc__,
+        formatter_class = argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type = int, default = 5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
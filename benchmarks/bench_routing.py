@@ -0,0 +1,118 @@
+"""
+Benchmark routing latency to mounted projects as the number of projects grows.
+
+Compares Starlette's linear route scan (app.mount) against the mount table dispatcher.
+
+Usage:
+    python -m benchmarks.bench_routing [--projects 10 100 1000 10000] [--requests 2000]
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+from typing import Callable, List
+from fastapi import FastAPI, APIRouter
+
+from src.routing import MountTable, ProjectDispatcher
+
+
+async def mock_app(scope, receive, send):
+    """
+    Minimal ASGI app standing in for a project sub-app.
+    """
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def build_app(num_projects: int, dispatch: bool) -> FastAPI:
+    """
+    Build an app shaped like src.main.app with num_projects mounted projects.
+
+    Args:
+        num_projects (int): Number of projects to mount.
+        dispatch (bool): Whether to mount through the mount table dispatcher instead of app.mount.
+
+    Returns:
+        FastAPI: App with projects mounted.
+    """
+    app = FastAPI()
+    auth_router = APIRouter(prefix = "/auth")
+    proj_router = APIRouter(prefix = "/{username}")
+    auth_router.post("/login")(lambda: None)
+    proj_router.get("/")(lambda username: None)
+    proj_router.put("/{project_name}")(lambda username, project_name: None)
+    app.include_router(auth_router)
+    app.include_router(proj_router)
+
+    table = MountTable()
+    if dispatch:
+        app.add_middleware(ProjectDispatcher, table = table)
+
+    for i in range(num_projects):
+        if dispatch:
+            table.mount(f"user{i}", "project", mock_app)
+        else:
+            app.mount(f"/user{i}/project", mock_app)
+    return app
+
+
+async def time_requests(app: Callable, path: str, num_requests: int) -> List[float]:
+    """
+    Time requests sent straight to the ASGI app, bypassing the network.
+
+    Args:
+        app (Callable): ASGI app.
+        path (str): Request path.
+        num_requests (int): Number of requests to time.
+
+    Returns:
+        List[float]: Per-request latencies in microseconds.
+    """
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+    timings = []
+    for _ in range(num_requests):
+        start = time.perf_counter()
+        await app(dict(scope), receive, send)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+async def run(project_counts: List[int], num_requests: int):
+    """
+    Run routing benchmark and print median and p99 latency per configuration.
+    """
+    print(f"{'projects':>10} {'mode':>10} {'p50 (us)':>10} {'p99 (us)':>10}")
+    for num_projects in project_counts:
+        for dispatch in (False, True):
+            app = build_app(num_projects, dispatch)
+            # Last mounted project is the worst case for a linear scan.
+            path = f"/user{num_projects - 1}/project/"
+            await time_requests(app, path, 100)
+            timings = sorted(await time_requests(app, path, num_requests))
+            p50 = statistics.median(timings)
+            p99 = timings[int(len(timings) * 0.99) - 1]
+            mode = "dispatch" if dispatch else "mount"
+            print(f"{num_projects:>10} {mode:>10} {p50:>10.1f} {p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description = __doc__,
+        formatter_class = argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--projects", type = int, nargs = "+", default = [10, 100, 1000, 10000])
+    parser.add_argument("--requests", type = int, default = 2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.projects, args.requests))
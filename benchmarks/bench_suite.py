@@ -0,0 +1,338 @@
+"""
+Benchmark how the service scales with the number of projects, against SQLite, with no external services.
+
+For each project count, a fresh process generates synthetic projects and measures cold start time
+through lifespan, resident memory per project, request throughput and p50/p99 latency to mounted apps,
+latency from project creation until it serves, and latency of project updates. Results are emitted
+as JSON, so that runs can be compared across commits.
+
+Usage:
+    python -m benchmarks.bench_suite [--projects 10 100 1000 10000] [--requests 2000]
+        [--concurrency 16] [--uploads 20] [--output results.json]
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import py_compile
+import importlib.util
+
+from typing import Dict, List
+
+os.environ["ENV"] = "tests"
+
+# pylint: disable=wrong-import-position
+import httpx
+from tortoise import Tortoise
+
+from src import main
+from src import projects as proj
+from src.models import Users, Projects
+from src.auth import create_access_token
+
+
+BENCH_ROOT = "bench_root"
+USERNAME = "bench_user"
+SCRIPT = """from fastapi import FastAPI
+
+
+app = FastAPI()
+
+
+@app.get("/")
+def index():
+    return "{value}"
+"""
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """
+    Summarize latencies.
+
+    Args:
+        timings (List[float]): Latencies in milliseconds.
+
+    Returns:
+        Dict[str, float]: Count, p50 and p99 latency in milliseconds. p99 is the nearest rank,
+            i.e. the slowest latency when there are fewer than 100 timings.
+    """
+    timings = sorted(timings)
+    return {
+        "count": len(timings),
+        "p50_ms": statistics.median(timings),
+        "p99_ms": timings[math.ceil(len(timings) * 0.99) - 1],
+    }
+
+
+def resident_memory() -> int:
+    """
+    Resident memory of this process, in bytes.
+
+    Returns:
+        int: Resident set size.
+    """
+    try:
+        with open("/proc/self/statm", encoding = "utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource # pylint: disable=import-outside-toplevel
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def configure(work_dir: str):
+    """
+    Point the service at a file backed SQLite database and a project package in work_dir.
+
+    Args:
+        work_dir (str): Scratch directory.
+    """
+    package_dir = os.path.join(work_dir, BENCH_ROOT)
+    os.makedirs(os.path.join(package_dir, "users"))
+    for init_dir in (package_dir, os.path.join(package_dir, "users")):
+        with open(os.path.join(init_dir, "__init__.py"), "w", encoding = "utf-8"):
+            pass
+    sys.path.insert(0, work_dir)
+
+    main.root = BENCH_ROOT
+    proj.users_dir = os.path.join(package_dir, "users")
+    main.mount_sync.path = os.path.join(work_dir, "generation")
+    main.config["connections"]["bench"] = f"sqlite://{os.path.join(work_dir, 'db.sqlite3')}"
+    main.config["apps"]["models"]["default_connection"] = "bench"
+
+
+def write_script(project_name: str, value: str):
+    """
+    Write project app script and its cached bytecode, as an accepted upload leaves them.
+
+    Args:
+        project_name (str): Name of project.
+        value (str): Value returned by the project index endpoint.
+    """
+    proj.make_project_dir(username = USERNAME, project_name = project_name)
+    save_path = os.path.join(proj.users_dir, USERNAME, project_name, "app.py")
+    with open(save_path, "w", encoding = "utf-8") as f:
+        f.write(SCRIPT.format(value = value))
+    py_compile.compile(save_path, cfile = importlib.util.cache_from_source(save_path), doraise = True)
+
+
+async def generate(num_projects: int):
+    """
+    Create user and synthetic projects directly in the database and on disk.
+
+    Args:
+        num_projects (int): Number of projects.
+    """
+    await Tortoise.init(config = main.config)
+    await Tortoise.generate_schemas()
+    user = await Users.create(username = USERNAME, hashed_password = "")
+    for i in range(num_projects):
+        write_script(f"project{i}", f"project{i}")
+    await Projects.bulk_create(
+        [Projects(name = f"project{i}", owner = user) for i in range(num_projects)],
+        batch_size = 500,
+    )
+    await Tortoise.close_connections()
+
+
+async def measure_requests(
+        client: httpx.AsyncClient, num_projects: int, num_requests: int, concurrency: int
+        ) -> Dict[str, float]:
+    """
+    Send requests to random mounted projects with bounded concurrency.
+
+    Returns:
+        Dict[str, float]: Throughput and latency summary.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+    errors = 0
+
+    async def request(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(f"/{USERNAME}/project{i}/")
+            timings.append((time.perf_counter() - start) * 1e3)
+            errors += response.status_code != 200
+
+    targets = [random.randrange(num_projects) for _ in range(num_requests)]
+    start = time.perf_counter()
+    await asyncio.gather(*[request(i) for i in targets])
+    elapsed = time.perf_counter() - start
+    return {
+        **summarize(timings),
+        "throughput_rps": num_requests / elapsed,
+        "errors": errors,
+    }
+
+
+async def wait_serving(client: httpx.AsyncClient, project_name: str, value: str, timeout: float = 30):
+    """
+    Poll project index endpoint until it returns value.
+    """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        response = await client.get(f"/{USERNAME}/{project_name}/")
+        if response.status_code == 200 and response.json() == value:
+            return
+        await asyncio.sleep(0.001)
+    raise TimeoutError(f"Project {project_name} did not serve {value!r} within {timeout}s.")
+
+
+async def measure_uploads(client: httpx.AsyncClient, uploads: int) -> Dict[str, Dict[str, float]]:
+    """
+    Time project creation and update until the new script is served.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Latency summaries of creation and update.
+    """
+    headers = {"Authorization": f"Bearer {create_access_token(data = {'sub': USERNAME})}"}
+    create_timings = []
+    update_timings = []
+    for i in range(uploads):
+        project_name = f"uploaded{i}"
+        start = time.perf_counter()
+        response = await client.post(
+            f"/{USERNAME}/",
+            headers = headers,
+            data = {"project_name": project_name},
+            files = {"project_script": ("app.py", SCRIPT.format(value = "v0").encode())},
+        )
+        response.raise_for_status()
+        await wait_serving(client, project_name, "v0")
+        create_timings.append((time.perf_counter() - start) * 1e3)
+
+        start = time.perf_counter()
+        response = await client.put(
+            f"/{USERNAME}/{project_name}",
+            headers = headers,
+            files = {"project_script": ("app.py", SCRIPT.format(value = "v1").encode())},
+        )
+        response.raise_for_status()
+        await wait_serving(client, project_name, "v1")
+        update_timings.append((time.perf_counter() - start) * 1e3)
+    return {"create_to_serve": summarize(create_timings), "update": summarize(update_timings)}
+
+
+async def run_single(num_projects: int, num_requests: int, concurrency: int, uploads: int) -> Dict:
+    """
+    Run all measurements for one project count in this process.
+
+    Returns:
+        Dict: Measurements.
+    """
+    with tempfile.TemporaryDirectory(prefix = "dynamic-routing-bench-") as work_dir:
+        configure(work_dir)
+        generate_start = time.perf_counter()
+        await generate(num_projects)
+        generate_time = time.perf_counter() - generate_start
+
+        baseline = resident_memory()
+        start = time.perf_counter()
+        async with main.app.router.lifespan_context(main.app):
+            cold_start = time.perf_counter() - start
+            rss = resident_memory()
+
+            transport = httpx.ASGITransport(app = main.app)
+            async with httpx.AsyncClient(transport = transport, base_url = "http://bench") as client:
+                await measure_requests(client, num_projects, min(num_requests, 100), concurrency)
+                requests = await measure_requests(client, num_projects, num_requests, concurrency)
+                upload = await measure_uploads(client, uploads)
+
+    return {
+        "projects": num_projects,
+        "generate_seconds": generate_time,
+        "cold_start_seconds": cold_start,
+        "rss_bytes": rss,
+        "memory_per_project_bytes": (rss - baseline) / num_projects,
+        "requests": requests,
+        **upload,
+    }
+
+
+def git_commit() -> str:
+    """
+    Commit the benchmarks run against, if run from a git checkout.
+
+    Returns:
+        str: Commit hash, empty if unknown.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output = True, text = True, check = True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """
+    Run each project count in a fresh process, so that modules imported for one count
+    do not skew the start up time and memory of the next.
+
+    Returns:
+        Dict: Run metadata and measurements per project count.
+    """
+    results = []
+    for num_projects in args.projects:
+        output = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.bench_suite", "--single",
+                "--projects", str(num_projects),
+                "--requests", str(args.requests),
+                "--concurrency", str(args.concurrency),
+                "--uploads", str(args.uploads),
+            ],
+            capture_output = True, text = True, check = True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+        print(f"{num_projects} projects done", file = sys.stderr)
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "uploads": args.uploads,
+            "LAZY_MOUNT": os.getenv("LAZY_MOUNT", "false"),
+            "ISOLATED_MODE": os.getenv("ISOLATED_MODE", "false"),
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description = __doc__,
+        formatter_class = argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--projects", type = int, nargs = "+", default = [10, 100, 1000, 10000])
+    parser.add_argument("--requests", type = int, default = 2000)
+    parser.add_argument("--concurrency", type = int, default = 16)
+    parser.add_argument("--uploads", type = int, default = 20)
+    parser.add_argument("--output")
+    parser.add_argument("--single", action = "store_true", help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        result = asyncio.run(
+            run_single(args.projects[0], args.requests, args.concurrency, args.uploads)
+        )
+        print(json.dumps(result))
+    else:
+        report = json.dumps(run(args), indent = 2)
+        if args.output:
+            with open(args.output, "w", encoding = "utf-8") as f:
+                f.write(report + "\n")
+        else:
+            print(report)
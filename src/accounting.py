@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import threading
+import tracemalloc
+
+from types import FrameType, ModuleType
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src import loader
+from src import projects as proj
+from src.schemas import ProjectUsage
+
+
+ACCOUNTING_TRACE_MEMORY = os.getenv("ACCOUNTING_TRACE_MEMORY", "false").lower() == "true"
+ACCOUNTING_TRACE_FRAMES = int(os.getenv("ACCOUNTING_TRACE_FRAMES", "32"))
+ACCOUNTING_SAMPLE_INTERVAL = float(os.getenv("ACCOUNTING_SAMPLE_INTERVAL", "0"))
+
+SORT_KEYS = {
+    "busy_time": lambda usage: usage.busy_time,
+    "import_memory": lambda usage: usage.import_memory or 0,
+    "import_time": lambda usage: usage.import_time or 0,
+}
+
+
+def project_of_module(module_name: str) -> Tuple[str, str]:
+    """
+    Project of app module.
+
+    Args:
+        module_name (str): Name of project app module, i.e. {root}.users.{username}.{project_name}.app.
+
+    Returns:
+        Tuple[str, str]: Username and project name.
+    """
+    username, project_name = module_name.split(".")[-3:-1]
+    return username, project_name
+
+
+def project_of_frame(frame: Optional[FrameType], users_dir: str) -> Optional[Tuple[str, str]]:
+    """
+    Innermost project whose code is on the stack of frame.
+
+    Args:
+        frame (Optional[FrameType]): Innermost frame of a thread.
+        users_dir (str): Directory of project scripts, ending with a path separator.
+
+    Returns:
+        Optional[Tuple[str, str]]: Username and project name, None if no project code is on the stack.
+    """
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(users_dir):
+            parts = filename[len(users_dir):].split(os.sep)
+            if len(parts) > 2:
+                return parts[0], parts[1]
+        frame = frame.f_back
+    return None
+
+
+class Accounting:
+    """
+    Per project resource usage: import time and, optionally, memory allocated by imports traced with
+    tracemalloc, and wall-clock time spent running project code, sampled from the stacks of all
+    threads. Sampling is off unless a sample interval is set.
+    """
+
+    def __init__(
+            self,
+            trace_memory: bool = ACCOUNTING_TRACE_MEMORY,
+            trace_frames: int = ACCOUNTING_TRACE_FRAMES,
+            sample_interval: float = ACCOUNTING_SAMPLE_INTERVAL,
+            ):
+        self.trace_memory = trace_memory
+        self.trace_frames = trace_frames
+        self.sample_interval = sample_interval
+        self.imports: Dict[Tuple[str, str], Tuple[float, Optional[int]]] = {}
+        self.busy: Dict[Tuple[str, str], float] = {}
+        self._tracing = 0
+        self._owns_tracing = False
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def _start_tracing(self):
+        # Imports run concurrently, tracing runs from the start of the first until the end of the last.
+        with self._lock:
+            if self._tracing == 0:
+                self._owns_tracing = not tracemalloc.is_tracing()
+                if self._owns_tracing:
+                    tracemalloc.start(self.trace_frames)
+            self._tracing += 1
+
+    def _stop_tracing(self):
+        with self._lock:
+            self._tracing -= 1
+            if self._tracing == 0 and self._owns_tracing:
+                tracemalloc.stop()
+
+    def measure(self, func: Callable[[str], ModuleType], module_name: str) -> ModuleType:
+        """
+        Import project app module, recording its import time and, if traced, the memory
+        still allocated from its code once imported.
+
+        Args:
+            func (Callable[[str], ModuleType]): Import function.
+            module_name (str): Name of project app module.
+
+        Returns:
+            ModuleType: Imported module.
+        """
+        if self.trace_memory:
+            self._start_tracing()
+        try:
+            start = time.perf_counter()
+            module = func(module_name)
+            import_time = time.perf_counter() - start
+
+            import_memory = None
+            if self.trace_memory:
+                project_dir = os.path.dirname(os.path.abspath(module.__file__))
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(True, os.path.join(project_dir, "*"), all_frames = True)]
+                )
+                import_memory = sum(trace.size for trace in snapshot.traces)
+        finally:
+            if self.trace_memory:
+                self._stop_tracing()
+
+        self.imports[project_of_module(module_name)] = (import_time, import_memory)
+        return module
+
+    def import_fresh(self, module_name: str) -> ModuleType:
+        """
+        Import project app module afresh, recording its resource usage.
+
+        Args:
+            module_name (str): Name of project app module.
+
+        Returns:
+            ModuleType: Imported module.
+        """
+        return self.measure(loader.import_fresh, module_name)
+
+    def import_module(self, module_name: str) -> ModuleType:
+        """
+        Import project app module, recording its resource usage.
+
+        Args:
+            module_name (str): Name of project app module.
+
+        Returns:
+            ModuleType: Imported module.
+        """
+        return self.measure(loader.import_module, module_name)
+
+    def sample(self, elapsed: float):
+        """
+        Attribute elapsed wall-clock time to each project whose code is on the stack of a thread,
+        whether it was running or blocked.
+
+        Args:
+            elapsed (float): Seconds since the previous sample.
+        """
+        users_dir = os.path.join(os.path.abspath(proj.users_dir), "")
+        current = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items(): # pylint: disable=protected-access
+            if thread_id == current:
+                continue
+            key = project_of_frame(frame, users_dir)
+            if key is not None:
+                self.busy[key] = self.busy.get(key, 0.0) + elapsed
+
+    def _run_sampler(self):
+        last = time.perf_counter()
+        while not self._stopped.wait(self.sample_interval):
+            now = time.perf_counter()
+            self.sample(now - last)
+            last = now
+
+    def start(self):
+        """
+        Start sampling project code in a daemon thread, unless sampling is disabled.
+        """
+        if self.sample_interval <= 0 or self._sampler is not None:
+            return
+        self._stopped.clear()
+        self._sampler = threading.Thread(target = self._run_sampler, name = "accounting-sampler", daemon = True)
+        self._sampler.start()
+
+    def stop(self):
+        """
+        Stop sampling project code.
+        """
+        if self._sampler is not None:
+            self._stopped.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def remove_project(self, username: str, project_name: str):
+        """
+        Drop usage of project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        self.imports.pop((username, project_name), None)
+        self.busy.pop((username, project_name), None)
+
+    def clear(self):
+        """
+        Drop usage of all projects.
+        """
+        self.imports.clear()
+        self.busy.clear()
+
+    def report(
+            self, sort_by: str = "busy_time", limit: Optional[int] = None,
+            username: Optional[str] = None
+            ) -> List[ProjectUsage]:
+        """
+        Usage of projects, most costly first.
+
+        Args:
+            sort_by (str, optional): Usage to sort by, one of SORT_KEYS. Defaults to "busy_time".
+            limit (Optional[int], optional): Maximum number of projects. Defaults to None.
+            username (Optional[str], optional): Only report projects of this user. Defaults to None.
+
+        Returns:
+            List[ProjectUsage]: Usage of projects.
+        """
+        usages = [
+            ProjectUsage(
+                username = owner,
+                project_name = project_name,
+                import_time = self.imports.get((owner, project_name), (None, None))[0],
+                import_memory = self.imports.get((owner, project_name), (None, None))[1],
+                busy_time = self.busy.get((owner, project_name), 0.0),
+            )
+            for owner, project_name in self.imports.keys() | self.busy.keys()
+            if username is None or owner == username
+        ]
+        usages.sort(key = SORT_KEYS[sort_by], reverse = True)
+        return usages[:limit]
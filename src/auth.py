@@ -5,24 +5,37 @@ from datetime import datetime, timedelta
 from jose import jwt, JWTError
 
 from passlib.context import CryptContext
+from tortoise.signals import post_delete, post_save
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 
 from src.models import Users
+from src.database import read_db
+from src.cache import TTLCache
+from src.hashing import PasswordHasher
 
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 SECRET_KEY = os.getenv("SECRET_KEY", "tests")
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
 
 
 pwd_context = CryptContext(
     schemes = ["bcrypt"],
     deprecated = "auto"
 )
+password_hasher = PasswordHasher(
+    context = pwd_context
+)
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl = "auth/login"
 )
+token_cache = TTLCache(
+    maxsize = AUTH_CACHE_SIZE,
+    ttl = AUTH_CACHE_TTL
+)
 
 
 async def authenticate_user(username: str, password: str):
@@ -40,7 +53,7 @@ async def authenticate_user(username: str, password: str):
     if user is None:
         return None
 
-    if not pwd_context.verify(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return None
 
     return user
@@ -82,24 +95,50 @@ async def get_current_user(username: str, token: Annotated[str, Depends(oauth2_s
         status_code = status.HTTP_401_UNAUTHORIZED,
         detail = "Invalid credentials."
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms = [ALGORITHM])
-        token_username = payload.get("sub")
-        if token_username is None:
+    cached = token_cache.get(token)
+    if cached is not None:
+        payload, user = cached
+        token_username = payload["sub"]
+
+    else:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms = [ALGORITHM])
+            token_username = payload.get("sub")
+            if token_username is None:
+                raise credentials_exception
+
+        except JWTError:
             raise credentials_exception
 
-    except JWTError:
-        raise credentials_exception
-
     if username != token_username:
         raise HTTPException(
             status_code = status.HTTP_401_UNAUTHORIZED,
             detail = "Insufficient permissions."
         )
 
-    user = await Users.get_or_none(
-        username = username
-    )
-    if user is None:
-        raise credentials_exception
+    if cached is None:
+        user = await Users.get_or_none(
+            username = username,
+            using_db = read_db(),
+        )
+        if user is None:
+            raise credentials_exception
+        token_cache.set(token, (payload, user), expires_at = payload.get("exp"))
     return user
+
+
+@post_save(Users)
+async def invalidate_saved_user(sender, instance: Users, created: bool, using_db, update_fields):
+    """
+    Invalidate cached tokens of a user whose record changed (e.g. password change).
+    """
+    if not created:
+        token_cache.discard_where(lambda value: value[1].pk == instance.pk)
+
+
+@post_delete(Users)
+async def invalidate_deleted_user(sender, instance: Users, using_db):
+    """
+    Invalidate cached tokens of a deleted user.
+    """
+    token_cache.discard_where(lambda value: value[1].pk == instance.pk)
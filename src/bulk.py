@@ -0,0 +1,171 @@
+import io
+import os
+import asyncio
+import zipfile
+
+from typing import AsyncIterator, Dict, Iterable, List, Tuple
+
+from fastapi import UploadFile, HTTPException, status
+
+from src import projects as proj
+from src.schemas import BulkResult
+from src.validation import validate_script
+
+
+BULK_MAX_PROJECTS = int(os.getenv("BULK_MAX_PROJECTS", "500"))
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", "4"))
+
+
+def read_archive(file: UploadFile) -> Tuple[Dict[str, bytes], Dict[str, str]]:
+    """
+    Read project scripts from a zip archive of project_name/app.py entries.
+
+    Args:
+        file (UploadFile): Uploaded zip archive.
+
+    Raises:
+        HTTPException: Raised when archive is not a valid zip archive or has too many projects.
+
+    Returns:
+        Tuple[Dict[str, bytes], Dict[str, str]]: Script content keyed on project name,
+            and reason keyed on project name for entries that were rejected.
+    """
+    try:
+        archive = zipfile.ZipFile(file.file)
+    except zipfile.BadZipFile as exc:
+        raise HTTPException(
+            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail = "Invalid archive. Expected a zip archive of project_name/app.py entries."
+        ) from exc
+
+    with archive:
+        entries = []
+        for info in archive.infolist():
+            project_name, _, filename = info.filename.partition("/")
+            if not info.is_dir() and filename == "app.py":
+                entries.append((info, project_name))
+        # Checked before any entry is decompressed.
+        if len(entries) > BULK_MAX_PROJECTS:
+            raise HTTPException(
+                status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail = f"Archive has more than {BULK_MAX_PROJECTS} projects."
+            )
+
+        scripts = {}
+        rejected = {}
+        for info, project_name in entries:
+            if not project_name.isidentifier():
+                rejected[project_name] = "Project name must be a valid Python identifier."
+                continue
+            if info.file_size > proj.MAX_UPLOAD_SIZE:
+                rejected[project_name] = proj.file_too_large().detail
+                continue
+            scripts[project_name] = archive.read(info)
+    return scripts, rejected
+
+
+class ArchiveStream(io.RawIOBase):
+    """
+    Write only stream that buffers zip archive bytes until they are drained.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self.buffer += b
+        return len(b)
+
+    def drain(self) -> bytes:
+        """
+        Retrieve and clear buffered bytes.
+
+        Returns:
+            bytes: Buffered bytes.
+        """
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+async def stream_archive(username: str, project_names: Iterable[str]) -> AsyncIterator[bytes]:
+    """
+    Stream zip archive of project_name/app.py entries, one project at a time.
+
+    Args:
+        username (str): Username of projects owner.
+        project_names (Iterable[str]): Names of projects to export.
+
+    Yields:
+        AsyncIterator[bytes]: Chunks of zip archive.
+    """
+    stream = ArchiveStream()
+    with zipfile.ZipFile(stream, "w", compression = zipfile.ZIP_DEFLATED) as archive:
+        for project_name in project_names:
+            content = await proj.read_file(username = username, project_name = project_name)
+            await asyncio.to_thread(archive.writestr, f"{project_name}/app.py", content)
+            yield stream.drain()
+    yield stream.drain()
+
+
+async def stage_projects(
+        username: str, scripts: Dict[str, bytes]
+        ) -> Tuple[Dict[str, Tuple[str, str, str]], Dict[str, str]]:
+    """
+    Create project folders, then save and validate project scripts concurrently.
+
+    Folders of projects that fail validation are removed.
+
+    Args:
+        username (str): Username of projects owner.
+        scripts (Dict[str, bytes]): Script content keyed on project name.
+
+    Returns:
+        Tuple[Dict[str, Tuple[str, str, str]], Dict[str, str]]: Staging file path, compiled
+            bytecode path and content checksum keyed on project name for valid projects,
+            and reason keyed on project name for invalid projects.
+    """
+    semaphore = asyncio.Semaphore(max(BULK_WORKERS, 1))
+    staged = {}
+    failed = {}
+
+    async def stage(project_name: str, content: bytes):
+        async with semaphore:
+            await proj.create_project(username = username, project_name = project_name)
+            staged_path, checksum = await proj.save_content(
+                username = username,
+                project_name = project_name,
+                content = content,
+            )
+            try:
+                cfile = await validate_script(staged_path)
+            except HTTPException as exc:
+                await proj.delete_project(username = username, project_name = project_name)
+                failed[project_name] = exc.detail
+            else:
+                staged[project_name] = (staged_path, cfile, checksum)
+
+    await asyncio.gather(*[stage(project_name, content) for project_name, content in scripts.items()])
+    return staged, failed
+
+
+def results(created: Iterable[str], failed: Dict[str, str]) -> List[BulkResult]:
+    """
+    Per project results of bulk import, sorted by project name.
+
+    Args:
+        created (Iterable[str]): Names of created projects.
+        failed (Dict[str, str]): Reason keyed on project name for projects that were not created.
+
+    Returns:
+        List[BulkResult]: Per project results.
+    """
+    outcomes = [BulkResult(name = name, created = True) for name in created]
+    outcomes += [
+        BulkResult(name = name, created = False, detail = detail) for name, detail in failed.items()
+    ]
+    return sorted(outcomes, key = lambda outcome: outcome.name)
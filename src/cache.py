@@ -0,0 +1,124 @@
+import time
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire at a per-entry deadline.
+
+    The cache holds up to maxsize entries, or entries of up to maxsize total weight if a weigher is given.
+    """
+
+    def __init__(
+            self,
+            maxsize: int,
+            ttl: float,
+            timer: Callable[[], float] = time.time,
+            weigher: Optional[Callable[[Any], int]] = None
+            ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.weigher = weigher
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Retrieve unexpired value of key, marking it as most recently used.
+
+        Args:
+            key (Hashable): Cache key.
+
+        Returns:
+            Optional[Any]: Cached value if present and unexpired else None.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value, _ = entry
+        if expires_at <= self.timer():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """
+        Cache value of key, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to cache.
+            expires_at (Optional[float], optional): Deadline after which the entry expires,
+                capped at the cache TTL. Defaults to None.
+        """
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+
+        deadline = self.timer() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+
+        weight = 1 if self.weigher is None else self.weigher(value)
+        self._remove(key)
+        if weight > self.maxsize:
+            return
+
+        self._entries[key] = (deadline, value, weight)
+        self.weight += weight
+        while self.weight > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def discard_where(self, predicate: Callable[[Any], bool]) -> int:
+        """
+        Remove entries whose value matches predicate.
+
+        Args:
+            predicate (Callable[[Any], bool]): Returns True for values to remove.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        keys = [key for key, (_, value, _) in self._entries.items() if predicate(value)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        self._entries.clear()
+        self.weight = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Cache size and hit/miss counters.
+
+        Returns:
+            Dict[str, int]: Cache statistics.
+        """
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
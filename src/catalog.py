@@ -0,0 +1,263 @@
+import os
+import json
+import asyncio
+import logging
+import hashlib
+
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from starlette.types import ASGIApp
+
+from src import storage
+from src import projects as proj
+from src.cache import TTLCache
+
+
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "64"))
+HTTP_METHODS = {"get", "put", "post", "delete", "options", "head", "patch", "trace"}
+
+logger = logging.getLogger(__name__)
+
+Fragment = Dict[str, Dict[str, Any]]
+
+
+def rename_refs(node: Any, prefix: str) -> Any:
+    """
+    Prefix names of components referenced from OpenAPI schema node.
+
+    Args:
+        node (Any): OpenAPI schema node.
+        prefix (str): Component name prefix.
+
+    Returns:
+        Any: Copy of node with renamed references.
+    """
+    if isinstance(node, dict):
+        renamed = {}
+        for key, value in node.items():
+            if key == "$ref" and isinstance(value, str) and value.startswith("#/components/"):
+                kind, _, name = value[len("#/components/"):].partition("/")
+                value = f"#/components/{kind}/{prefix}{name}"
+            renamed[key] = rename_refs(value, prefix)
+        return renamed
+    if isinstance(node, list):
+        return [rename_refs(item, prefix) for item in node]
+    return node
+
+
+def build_fragment(username: str, project_name: str, schema: Dict[str, Any]) -> Fragment:
+    """
+    Rewrite OpenAPI schema of project for merging into the catalog: paths are prefixed with
+    /{username}/{project_name}, components, security schemes and operation ids are prefixed with
+    {username}.{project_name}., and operations are tagged with the project.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        schema (Dict[str, Any]): OpenAPI schema of project app.
+
+    Returns:
+        Fragment: Paths and components of project.
+    """
+    prefix = f"{username}.{project_name}."
+    tag = f"{username}/{project_name}"
+    default_security = schema.get("security")
+
+    paths = {}
+    for path, item in schema.get("paths", {}).items():
+        item = rename_refs(item, prefix)
+        for method, operation in item.items():
+            if method not in HTTP_METHODS:
+                continue
+            operation["tags"] = [tag] + operation.get("tags", [])
+            if "operationId" in operation:
+                operation["operationId"] = prefix + operation["operationId"]
+            security = operation.get("security", default_security)
+            if security is not None:
+                operation["security"] = [
+                    {prefix + name: scopes for name, scopes in requirement.items()}
+                    for requirement in security
+                ]
+        paths[f"/{username}/{project_name}{path}"] = item
+
+    components = {
+        kind: {prefix + name: rename_refs(value, prefix) for name, value in items.items()}
+        for kind, items in schema.get("components", {}).items()
+    }
+    return {"paths": paths, "components": components}
+
+
+def load_fragment(username: str, project_name: str, project_app: Optional[ASGIApp]) -> Optional[Fragment]:
+    """
+    Read OpenAPI schema of project stored next to its app script, or in the script store.
+    Schemas of apps loaded before schemas were stored are generated from the app.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        project_app (Optional[ASGIApp]): Project app, if loaded in this process.
+
+    Returns:
+        Optional[Fragment]: Paths and components of project, None if it has no OpenAPI schema.
+    """
+    if storage.DATABASE_STORAGE:
+        schema = storage.scripts.schema(username, project_name)
+        if schema is None and callable(getattr(project_app, "openapi", None)):
+            schema = project_app.openapi()
+        return None if schema is None else build_fragment(username, project_name, schema)
+
+    schema_path = os.path.join(proj.users_dir, username, project_name, "openapi.json")
+    try:
+        with open(schema_path, encoding = "utf-8") as f:
+            schema = json.load(f)
+    except FileNotFoundError:
+        if not callable(getattr(project_app, "openapi", None)):
+            return None
+        schema = project_app.openapi()
+        try:
+            with open(schema_path, "w", encoding = "utf-8") as f:
+                json.dump(schema, f)
+        except OSError:
+            # The project folder may be gone already, the schema is generated again next time.
+            pass
+    except (OSError, ValueError):
+        return None
+    return build_fragment(username, project_name, schema)
+
+
+class Catalog:
+    """
+    Merged OpenAPI document of all projects, built from the stored schema of each project.
+
+    Projects are marked stale when mounted, and only stale projects are re-read on the next
+    catalog request. Merged documents are cached per filter until a project changes.
+    """
+
+    def __init__(self, cache_size: int = CATALOG_CACHE_SIZE):
+        self.fragments: Dict[Tuple[str, str], Fragment] = {}
+        self.stale: Set[Tuple[str, str]] = set()
+        self.refreshing: Set[Tuple[str, str]] = set()
+        self.version = 0
+        self.documents = TTLCache(maxsize = cache_size, ttl = float("inf"))
+
+    def track(self, username: str, project_name: str):
+        """
+        Mark project as changed, so that its schema is re-read on the next catalog request.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        self.stale.add((username, project_name))
+
+    def remove(self, username: str, project_name: str):
+        """
+        Drop project from catalog.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        self.stale.discard((username, project_name))
+        self.refreshing.discard((username, project_name))
+        if self.fragments.pop((username, project_name), None) is not None:
+            self.version += 1
+
+    def clear(self):
+        """
+        Drop all projects from catalog.
+        """
+        self.fragments.clear()
+        self.stale.clear()
+        self.refreshing.clear()
+        self.documents.clear()
+        self.version += 1
+
+    async def refresh(self, loaded_app: Callable[[str, str], Optional[ASGIApp]]):
+        """
+        Re-read schemas of stale projects, off the event loop.
+
+        Projects whose schema fails to load stay stale, and are retried on the next refresh.
+        Results of projects removed while their schema was read are dropped.
+
+        Args:
+            loaded_app (Callable[[str, str], Optional[ASGIApp]]): Returns project app given username
+                and project name, if it is loaded in this process.
+        """
+        if not self.stale:
+            return
+        keys, self.stale = self.stale, set()
+        self.refreshing |= keys
+        apps = {key: loaded_app(*key) for key in keys}
+
+        def load_all() -> Dict[Tuple[str, str], Optional[Fragment]]:
+            fragments = {}
+            for key in keys:
+                try:
+                    fragments[key] = load_fragment(*key, apps[key])
+                except Exception as exc: # pylint: disable=broad-exception-caught
+                    logger.warning("Failed to load OpenAPI schema of /%s/%s: %s", *key, exc)
+            return fragments
+
+        try:
+            fragments = await asyncio.to_thread(load_all)
+        except BaseException:
+            self.stale |= keys & self.refreshing
+            self.refreshing -= keys
+            raise
+        current = keys & self.refreshing
+        self.refreshing -= keys
+        self.stale |= current - fragments.keys()
+
+        changed = False
+        for key, fragment in fragments.items():
+            if key not in current or fragment == self.fragments.get(key):
+                continue
+            changed = True
+            if fragment is None:
+                self.fragments.pop(key)
+            else:
+                self.fragments[key] = fragment
+        if changed:
+            self.version += 1
+
+    def render(self, username: Optional[str] = None, prefix: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        Merged OpenAPI document of projects of user, or of all users, whose name starts with prefix.
+
+        Args:
+            username (Optional[str], optional): Username of projects owner. Defaults to None.
+            prefix (Optional[str], optional): Prefix of project names. Defaults to None.
+
+        Returns:
+            Tuple[bytes, str]: JSON document and its ETag.
+        """
+        key = (self.version, username, prefix)
+        document = self.documents.get(key)
+        if document is not None:
+            return document
+
+        selected: Iterable[Fragment] = [
+            fragment for (owner, project_name), fragment in sorted(self.fragments.items())
+            if (username is None or owner == username)
+            and (not prefix or project_name.startswith(prefix))
+        ]
+        paths = {}
+        components: Dict[str, Dict[str, Any]] = {}
+        for fragment in selected:
+            paths.update(fragment["paths"])
+            for kind, items in fragment["components"].items():
+                components.setdefault(kind, {}).update(items)
+
+        merged = {
+            "openapi": "3.1.0",
+            "info": {"title": "Dynamic Routing project catalog", "version": str(self.version)},
+            "paths": paths,
+        }
+        if components:
+            merged["components"] = components
+
+        body = json.dumps(merged).encode()
+        document = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        self.documents.set(key, document)
+        return document
@@ -0,0 +1,150 @@
+import os
+import uuid
+import shutil
+import asyncio
+import logging
+
+from typing import Dict, List, Optional
+
+
+TOMBSTONE_PREFIX = ".deleted-"
+
+logger = logging.getLogger(__name__)
+
+
+def tombstone(path: str, users_dir: str) -> Optional[str]:
+    """
+    Rename folder to a uniquely named tombstone in the users folder, freeing its path at once.
+
+    Args:
+        path (str): Path of folder.
+        users_dir (str): Users folder, on the same filesystem as path.
+
+    Returns:
+        Optional[str]: Path of tombstone, None if there was no folder.
+    """
+    tombstone_path = os.path.join(users_dir, f"{TOMBSTONE_PREFIX}{uuid.uuid4().hex}")
+    try:
+        os.rename(path, tombstone_path)
+    except FileNotFoundError:
+        return None
+    return tombstone_path
+
+
+def find_tombstones(users_dir: str) -> List[str]:
+    """
+    Tombstones left in the users folder, e.g. by a crash before they were removed.
+
+    Args:
+        users_dir (str): Users folder.
+
+    Returns:
+        List[str]: Paths of tombstones.
+    """
+    try:
+        names = os.listdir(users_dir)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(users_dir, name) for name in names if name.startswith(TOMBSTONE_PREFIX)]
+
+
+class Cleaner:
+    """
+    Background removal of deleted folders. A deleted folder is renamed to a tombstone, which is
+    atomic and quick, and the tombstone is removed off the event loop by a background task.
+    Tombstones are recognizable by name, so those left behind by a crash are removed on start up.
+    """
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.removed = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, users_dir: str):
+        """
+        Start removing tombstones in the background, beginning with those left in the users folder.
+
+        Args:
+            users_dir (str): Users folder.
+        """
+        if self._task is not None:
+            return
+        self.queue = asyncio.Queue()
+        for path in await asyncio.to_thread(find_tombstones, users_dir):
+            self.queue.put_nowait(path)
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """
+        Stop removing tombstones. Tombstones still queued are removed on next start up.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.queue = None
+
+    async def _run(self):
+        while True:
+            path = await self.queue.get()
+            try:
+                await self.remove(path)
+            finally:
+                self.queue.task_done()
+
+    async def remove(self, path: str):
+        """
+        Remove tombstone off the event loop.
+
+        Args:
+            path (str): Path of tombstone.
+        """
+        try:
+            await asyncio.to_thread(shutil.rmtree, path)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            self.failed += 1
+            logger.warning("Failed to remove %s: %s", path, exc)
+            return
+        self.removed += 1
+
+    async def delete(self, path: str, users_dir: str):
+        """
+        Delete folder: rename it to a tombstone off the event loop, then queue the tombstone for
+        removal. Tombstones are removed right away if the background task is not running.
+
+        Args:
+            path (str): Path of folder.
+            users_dir (str): Users folder, on the same filesystem as path.
+        """
+        tombstone_path = await asyncio.to_thread(tombstone, path, users_dir)
+        if tombstone_path is None:
+            return
+        if self.queue is None:
+            await self.remove(tombstone_path)
+        else:
+            self.queue.put_nowait(tombstone_path)
+
+    async def drain(self):
+        """
+        Wait for queued tombstones to be removed.
+        """
+        if self.queue is not None:
+            await self.queue.join()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Cleanup statistics.
+
+        Returns:
+            Dict[str, float]: Queued tombstones, and tombstones removed and failed to remove.
+        """
+        return {
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "removed": self.removed,
+            "failed": self.failed,
+        }
+
+
+cleaner = Cleaner()
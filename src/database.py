@@ -0,0 +1,170 @@
+import os
+import time
+import asyncio
+
+from typing import Any, Dict, Optional
+
+from tortoise import BaseDBAsyncClient, connections
+
+try:
+    from tortoise.backends.asyncpg.client import AsyncpgDBClient
+except ImportError: # pragma: no cover
+    AsyncpgDBClient = None
+
+
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "5"))
+DB_ACQUIRE_TIMEOUT = float(os.getenv("DB_ACQUIRE_TIMEOUT", "10"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_MAX_INACTIVE_LIFETIME = float(os.getenv("DB_MAX_INACTIVE_LIFETIME", "300"))
+POSTGRES_REPLICA_HOST = os.getenv("POSTGRES_REPLICA_HOST", "")
+DB_READ_CONNECTION = os.getenv("DB_READ_CONNECTION", "replica" if POSTGRES_REPLICA_HOST else "")
+
+
+class PoolTimeout(ConnectionError):
+    """
+    Raised when no pooled connection frees up within the acquire timeout.
+    """
+
+
+class TimedPool:
+    """
+    Connection pool wrapper that bounds the time spent waiting for a connection, and counts
+    acquires, timeouts and time spent waiting. Anything else is delegated to the wrapped pool.
+    """
+
+    def __init__(self, pool: Any, timeout: float = DB_ACQUIRE_TIMEOUT):
+        self.pool = pool
+        self.timeout = timeout
+        self.acquires = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.wait_time = 0.0
+
+    async def acquire(self) -> Any:
+        """
+        Acquire connection from pool.
+
+        Raises:
+            PoolTimeout: Raised when no connection frees up within the timeout.
+
+        Returns:
+            Any: Pooled connection.
+        """
+        start = time.perf_counter()
+        try:
+            if self.timeout > 0:
+                connection = await asyncio.wait_for(self.pool.acquire(), timeout = self.timeout)
+            else:
+                connection = await self.pool.acquire()
+        except asyncio.TimeoutError as exc:
+            self.timeouts += 1
+            raise PoolTimeout(f"No database connection available within {self.timeout}s.") from exc
+        finally:
+            self.wait_time += time.perf_counter() - start
+        self.acquires += 1
+        self.in_use += 1
+        return connection
+
+    async def release(self, connection: Any):
+        """
+        Release connection back to pool.
+
+        Args:
+            connection (Any): Pooled connection.
+        """
+        self.in_use -= 1
+        await self.pool.release(connection)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.pool, name)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Pool statistics.
+
+        Returns:
+            Dict[str, float]: Pool size limits, open, idle and in use connections, acquires,
+                acquire timeouts and seconds spent waiting to acquire.
+        """
+        return {
+            "min_size": self.pool.get_min_size(),
+            "max_size": self.pool.get_max_size(),
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "in_use": self.in_use,
+            "acquires": self.acquires,
+            "acquire_timeouts": self.timeouts,
+            "acquire_wait_seconds": self.wait_time,
+        }
+
+
+if AsyncpgDBClient is not None:
+    class PooledClient(AsyncpgDBClient):
+        """
+        asyncpg client whose pool bounds the time spent waiting for a connection.
+        """
+
+        def __init__(self, *args: Any, acquire_timeout: float = DB_ACQUIRE_TIMEOUT, **kwargs: Any):
+            super().__init__(*args, **kwargs)
+            self.acquire_timeout = float(acquire_timeout)
+
+        async def create_pool(self, **kwargs: Any) -> TimedPool:
+            return TimedPool(await super().create_pool(**kwargs), timeout = self.acquire_timeout)
+
+    client_class = PooledClient
+
+
+def postgres_connection(host: str) -> Dict[str, Any]:
+    """
+    Build Tortoise-ORM connection config of the Postgres database on host, with pool
+    and statement cache settings from the environment.
+
+    Args:
+        host (str): Database host.
+
+    Returns:
+        Dict[str, Any]: Connection config.
+    """
+    return {
+        "engine": "src.database",
+        "credentials": {
+            "database": os.getenv("POSTGRES_DB", "postgres"),
+            "host": host,
+            "password": os.getenv("POSTGRES_PASSWORD", "postgres"),
+            "port": 5432,
+            "user": os.getenv("POSTGRES_USER", "postgres"),
+            "minsize": DB_POOL_MIN_SIZE,
+            "maxsize": DB_POOL_MAX_SIZE,
+            "acquire_timeout": DB_ACQUIRE_TIMEOUT,
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "max_inactive_connection_lifetime": DB_MAX_INACTIVE_LIFETIME,
+        }
+    }
+
+
+def read_db() -> Optional[BaseDBAsyncClient]:
+    """
+    Connection for read-only queries that tolerate replication lag, e.g. to a read replica.
+
+    Returns:
+        Optional[BaseDBAsyncClient]: Read connection, None for the default connection.
+    """
+    if not DB_READ_CONNECTION:
+        return None
+    return connections.get(DB_READ_CONNECTION)
+
+
+def pool_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Statistics of the connection pools of all open connections that have one.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Pool statistics keyed on connection name.
+    """
+    stats = {}
+    for client in connections.all():
+        pool = getattr(client, "_pool", None)
+        if isinstance(pool, TimedPool):
+            stats[client.connection_name] = pool.stats()
+    return stats
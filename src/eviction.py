@@ -0,0 +1,229 @@
+import os
+import gc
+import sys
+import time
+import asyncio
+
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from starlette.types import ASGIApp
+
+from src.loader import LazyApp
+from src.routing import MountTable, unwrap
+
+
+EVICTION_MAX_PROJECTS = int(os.getenv("EVICTION_MAX_PROJECTS", "0"))
+EVICTION_MEMORY_BUDGET = int(os.getenv("EVICTION_MEMORY_BUDGET", "0"))
+EVICTION_IDLE_TIMEOUT = float(os.getenv("EVICTION_IDLE_TIMEOUT", "300"))
+EVICTION_INTERVAL = float(os.getenv("EVICTION_INTERVAL", "10"))
+EVICTION_BATCH = int(os.getenv("EVICTION_BATCH", "10"))
+EVICTION_MEMORY_HYSTERESIS = float(os.getenv("EVICTION_MEMORY_HYSTERESIS", "0.05"))
+
+
+def resident_memory() -> int:
+    """
+    Resident memory of this process, in bytes.
+
+    Returns:
+        int: Resident set size, 0 if unknown.
+    """
+    try:
+        with open("/proc/self/statm", encoding = "utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def purge_modules(package: str) -> int:
+    """
+    Remove package and all of its submodules from sys.modules, and the reference to it held by its
+    parent package, so that nothing but live requests keeps them alive and the next import runs afresh.
+
+    Args:
+        package (str): Name of package, e.g. src.users.{username}.{project_name}.
+
+    Returns:
+        int: Number of modules removed.
+    """
+    names = [name for name in sys.modules if name == package or name.startswith(f"{package}.")]
+    for name in names:
+        sys.modules.pop(name, None)
+
+    parent_name, _, child = package.rpartition(".")
+    parent = sys.modules.get(parent_name)
+    if parent is not None and child in vars(parent):
+        delattr(parent, child)
+    return len(names)
+
+
+def is_loaded(mounted_app: ASGIApp) -> bool:
+    """
+    Whether mounted app holds an imported project app, as opposed to a placeholder yet to import it.
+
+    Args:
+        mounted_app (ASGIApp): Mounted app.
+
+    Returns:
+        bool: Whether project app is imported.
+    """
+    project_app = unwrap(mounted_app)
+    if isinstance(project_app, LazyApp):
+        return project_app.loaded
+    return project_app is not None
+
+
+class Evictor:
+    """
+    Evicts least recently used, idle project apps, when more are imported than the project budget
+    allows, or the process uses more memory than the memory budget allows. Evicted projects stay
+    mounted behind a placeholder that re-imports them on their next request.
+
+    Resident memory seldom shrinks much once modules are released, as the allocator keeps freed
+    memory. So once a batch evicted for memory fails to lower it by the hysteresis margin, no more
+    projects are evicted for memory until it grows by that margin again.
+    """
+
+    def __init__(
+            self,
+            max_projects: int = EVICTION_MAX_PROJECTS,
+            memory_budget: int = EVICTION_MEMORY_BUDGET,
+            idle_timeout: float = EVICTION_IDLE_TIMEOUT,
+            batch: int = EVICTION_BATCH,
+            memory: Callable[[], int] = resident_memory,
+            hysteresis: float = EVICTION_MEMORY_HYSTERESIS,
+            ):
+        self.max_projects = max_projects
+        self.memory_budget = memory_budget
+        self.idle_timeout = idle_timeout
+        self.batch = batch
+        self.memory = memory
+        self.margin = int(memory_budget * hysteresis)
+        # Resident memory before the pending memory eviction batch, and after the last batch
+        # that did not lower it.
+        self.memory_before: Optional[int] = None
+        self.memory_mark: Optional[int] = None
+        self.loaded = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.evicted: Set[Tuple[str, str]] = set()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether a project or memory budget is set.
+        """
+        return self.max_projects > 0 or self.memory_budget > 0
+
+    def select(self, table: MountTable) -> List[Tuple[str, str]]:
+        """
+        Choose projects to evict: the least recently used of the imported projects without in-flight
+        requests that have been idle longer than the idle timeout. Enough are chosen to get down to
+        the project budget, and, while over the memory budget, at least a batch, so that memory is
+        measured again after each batch is released. No batch is chosen for memory while it stays
+        within the hysteresis margin of the last batch that did not lower it.
+
+        Args:
+            table (MountTable): Table of mounted project apps.
+
+        Returns:
+            List[Tuple[str, str]]: Username and project name of projects to evict.
+        """
+        now = time.monotonic()
+        self.evicted.intersection_update(table)
+        loaded = []
+        for key in table:
+            mounted_app = table.get(*key)
+            if not is_loaded(mounted_app):
+                continue
+            if key in self.evicted:
+                self.evicted.discard(key)
+                self.reloads += 1
+            loaded.append((key, mounted_app))
+        self.loaded = len(loaded)
+
+        excess = 0
+        if self.max_projects > 0:
+            excess = len(loaded) - self.max_projects
+        self.memory_before = None
+        if self.memory_budget > 0:
+            memory = self.memory()
+            if memory <= self.memory_budget:
+                self.memory_mark = None
+            elif self.memory_mark is None or memory > self.memory_mark + self.margin:
+                self.memory_mark = None
+                self.memory_before = memory
+                excess = max(excess, self.batch)
+        if excess <= 0:
+            return []
+
+        idle = sorted(
+            (mounted_app.last_used, key) for key, mounted_app in loaded
+            if getattr(mounted_app, "in_flight", 0) == 0
+            and now - getattr(mounted_app, "last_used", now) >= self.idle_timeout
+        )
+        return [key for _, key in idle[:excess]]
+
+    def sweep(self, table: MountTable, evict: Callable[[str, str], None]) -> List[Tuple[str, str]]:
+        """
+        Evict projects over budget.
+
+        Args:
+            table (MountTable): Table of mounted project apps.
+            evict (Callable[[str, str], None]): Evicts project given username and project name.
+
+        Returns:
+            List[Tuple[str, str]]: Username and project name of evicted projects.
+        """
+        keys = self.select(table)
+        for username, project_name in keys:
+            evict(username, project_name)
+        self.evicted.update(keys)
+        self.evictions += len(keys)
+        self.loaded -= len(keys)
+        if keys:
+            # Release the evicted modules, which reference each other, before memory is measured again.
+            gc.collect()
+        if self.memory_before is not None:
+            memory = self.memory()
+            if memory >= self.memory_before - self.margin:
+                self.memory_mark = memory
+        return keys
+
+    async def run(self, table: MountTable, evict: Callable[[str, str], None], interval: float = EVICTION_INTERVAL):
+        """
+        Periodically evict projects over budget.
+
+        Args:
+            table (MountTable): Table of mounted project apps.
+            evict (Callable[[str, str], None]): Evicts project given username and project name.
+            interval (float, optional): Seconds between sweeps. Defaults to EVICTION_INTERVAL.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep(table, evict)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Eviction statistics.
+
+        Returns:
+            Dict[str, float]: Imported projects as of the last sweep, evictions, re-imports of evicted
+                projects and resident memory.
+        """
+        return {
+            "loaded_projects": self.loaded,
+            "evictions": self.evictions,
+            "reloads": self.reloads,
+            "resident_bytes": self.memory(),
+        }
+
+    def clear(self):
+        """
+        Reset statistics.
+        """
+        self.loaded = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.evicted.clear()
+        self.memory_before = None
+        self.memory_mark = None
@@ -0,0 +1,125 @@
+import os
+import time
+import asyncio
+import threading
+
+from typing import Any, Callable, Dict
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+from fastapi import HTTPException, status
+
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "32"))
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification on a bounded thread pool, off the event loop.
+
+    Calls beyond the pool size plus queue limit are shed with 503 instead of queueing unboundedly.
+    """
+
+    def __init__(
+            self,
+            context: CryptContext,
+            workers: int = HASH_WORKERS,
+            queue_limit: int = HASH_QUEUE_LIMIT
+            ):
+        self.context = context
+        self.workers = max(workers, 1)
+        self.queue_limit = queue_limit
+        self.executor = ThreadPoolExecutor(
+            max_workers = self.workers,
+            thread_name_prefix = "password-hasher"
+        )
+        self.pending = 0
+        self.calls = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _timed(self, submitted: float, func: Callable, *args: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.calls += 1
+                self.wait_seconds += start - submitted
+                self.busy_seconds += end - start
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """
+        Run hashing function on the thread pool.
+
+        Args:
+            func (Callable): Hashing function.
+            *args (Any): Positional arguments for hashing function.
+
+        Raises:
+            HTTPException: Raised when the thread pool queue is full.
+
+        Returns:
+            Any: Result of hashing function.
+        """
+        if self.pending >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code = status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail = "Too many concurrent authentication requests.",
+                headers = {"Retry-After": "1"},
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, self._timed, time.perf_counter(), func, *args
+            )
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash password.
+
+        Args:
+            password (str): Password to hash.
+
+        Returns:
+            str: Hashed password.
+        """
+        return await self.run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Verify password against hashed password.
+
+        Args:
+            password (str): Password to verify.
+            hashed_password (str): Hashed password.
+
+        Returns:
+            bool: Whether password matches hashed password.
+        """
+        return await self.run(self.context.verify, password, hashed_password)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hashing counters and time spent waiting for and running hashing calls.
+
+        Returns:
+            Dict[str, float]: Hashing statistics.
+        """
+        with self._lock:
+            return {
+                "pending": self.pending,
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "busy_seconds": self.busy_seconds,
+                "wait_seconds": self.wait_seconds,
+            }
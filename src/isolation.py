@@ -0,0 +1,315 @@
+import os
+import sys
+import time
+import zlib
+import shutil
+import asyncio
+import tempfile
+import itertools
+
+from typing import Dict, List, Optional, Tuple
+from asyncio.subprocess import Process
+
+import httpx
+from starlette.responses import PlainTextResponse
+from starlette.types import Receive, Scope, Send
+
+
+ISOLATED_MODE = os.getenv("ISOLATED_MODE", "false").lower() == "true"
+ISOLATION_GROUPS = int(os.getenv("ISOLATION_GROUPS", "0"))
+ISOLATION_IDLE_TIMEOUT = float(os.getenv("ISOLATION_IDLE_TIMEOUT", "300"))
+ISOLATION_START_TIMEOUT = float(os.getenv("ISOLATION_START_TIMEOUT", "10"))
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "30"))
+
+
+class Worker:
+    """
+    Worker process serving project apps over a Unix socket.
+    """
+
+    def __init__(self, process: Process, socket_path: str):
+        self.process = process
+        self.socket_path = socket_path
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self.client = httpx.AsyncClient(
+            transport = httpx.AsyncHTTPTransport(uds = socket_path),
+            base_url = "http://worker",
+            timeout = None,
+        )
+
+    @property
+    def alive(self) -> bool:
+        """
+        Whether the worker process is running.
+        """
+        return self.process.returncode is None
+
+    async def stop(self):
+        """
+        Terminate the worker process and close its connections.
+        """
+        await self.client.aclose()
+        if self.alive:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout = 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class WorkerPool:
+    """
+    Pool of worker processes, one per project or per group of projects, started on demand.
+    """
+
+    def __init__(
+            self,
+            root: str,
+            groups: int = ISOLATION_GROUPS,
+            idle_timeout: float = ISOLATION_IDLE_TIMEOUT,
+            start_timeout: float = ISOLATION_START_TIMEOUT
+            ):
+        self.root = root
+        self.groups = groups
+        self.idle_timeout = idle_timeout
+        self.start_timeout = start_timeout
+        self.socket_dir = tempfile.mkdtemp(prefix = "dynamic-routing-")
+        self.workers: Dict[str, Worker] = {}
+        self.retiring: List[Worker] = []
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._spawned = itertools.count()
+
+    def group(self, username: str, project_name: str) -> str:
+        """
+        Worker group of project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+
+        Returns:
+            str: Worker group.
+        """
+        if self.groups <= 0:
+            return f"{username}.{project_name}"
+        return str(zlib.crc32(f"{username}/{project_name}".encode()) % self.groups)
+
+    async def acquire(self, group: str) -> Worker:
+        """
+        Retrieve running worker of group, starting one if needed.
+
+        Args:
+            group (str): Worker group.
+
+        Returns:
+            Worker: Running worker.
+        """
+        worker = self.workers.get(group)
+        if worker is not None and worker.alive:
+            return worker
+
+        lock = self._locks.setdefault(group, asyncio.Lock())
+        async with lock:
+            worker = self.workers.get(group)
+            if worker is not None and worker.alive:
+                return worker
+            if worker is not None:
+                await worker.stop()
+
+            worker = await self.spawn(group)
+            self.workers[group] = worker
+            return worker
+
+    async def spawn(self, group: str, preload: Optional[Tuple[str, str]] = None) -> Worker:
+        """
+        Start worker process and wait for it to accept connections.
+
+        Args:
+            group (str): Worker group.
+            preload (Optional[Tuple[str, str]], optional): Username and project name of project
+                to import before the worker accepts connections. Defaults to None.
+
+        Raises:
+            RuntimeError: Raised when worker fails to start within the start timeout.
+
+        Returns:
+            Worker: Running worker.
+        """
+        socket_path = os.path.join(self.socket_dir, f"{group}.{next(self._spawned)}.sock")
+        args = ["--socket", socket_path, "--root", self.root]
+        if preload is not None:
+            args += ["--preload", "/".join(preload)]
+
+        process = await asyncio.create_subprocess_exec(sys.executable, "-m", "src.worker", *args)
+        worker = Worker(process, socket_path)
+
+        deadline = time.monotonic() + self.start_timeout
+        while time.monotonic() < deadline and worker.alive:
+            try:
+                _, writer = await asyncio.open_unix_connection(socket_path)
+                writer.close()
+                await writer.wait_closed()
+                return worker
+            except OSError:
+                await asyncio.sleep(0.05)
+
+        await worker.stop()
+        raise RuntimeError(f"Worker {group} failed to start.")
+
+    async def replace(self, group: str, preload: Tuple[str, str]):
+        """
+        Start a fresh worker for group and switch new requests to it, then stop the replaced worker
+        once its in-flight requests finish. The replaced worker keeps serving if the fresh one fails.
+
+        Args:
+            group (str): Worker group.
+            preload (Tuple[str, str]): Username and project name of changed project,
+                imported before the fresh worker accepts connections.
+
+        Raises:
+            RuntimeError: Raised when fresh worker fails to start, e.g. because the project fails to import.
+        """
+        lock = self._locks.setdefault(group, asyncio.Lock())
+        async with lock:
+            worker = await self.spawn(group, preload = preload)
+            previous = self.workers.get(group)
+            self.workers[group] = worker
+
+        if previous is not None:
+            self.retiring.append(previous)
+            asyncio.create_task(self.retire(previous))
+
+    async def release(self, group: str):
+        """
+        Switch group to a fresh worker, started on its next request, and stop the current worker
+        once its in-flight requests finish, e.g. after a project of the group was deleted. Requests
+        of other projects sharing the worker are not cut off, and the fresh worker no longer holds
+        the deleted project.
+
+        Args:
+            group (str): Worker group.
+        """
+        lock = self._locks.setdefault(group, asyncio.Lock())
+        async with lock:
+            worker = self.workers.pop(group, None)
+
+        if worker is not None:
+            self.retiring.append(worker)
+            asyncio.create_task(self.retire(worker))
+
+    async def retire(self, worker: Worker, timeout: float = DRAIN_TIMEOUT):
+        """
+        Stop worker once its in-flight requests finish, or the drain timeout elapses.
+
+        Args:
+            worker (Worker): Worker to stop.
+            timeout (float, optional): Drain timeout, in seconds. Defaults to DRAIN_TIMEOUT.
+        """
+        deadline = time.monotonic() + timeout
+        while worker.in_flight > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        await worker.stop()
+        if worker in self.retiring:
+            self.retiring.remove(worker)
+
+    async def stop(self, group: str):
+        """
+        Stop worker of group, so that the next request starts a fresh worker.
+
+        Args:
+            group (str): Worker group.
+        """
+        lock = self._locks.setdefault(group, asyncio.Lock())
+        async with lock:
+            worker = self.workers.pop(group, None)
+            if worker is not None:
+                await worker.stop()
+
+    async def reap_idle(self):
+        """
+        Stop workers without in-flight requests that have been idle longer than the idle timeout.
+        """
+        now = time.monotonic()
+        for group, worker in list(self.workers.items()):
+            if worker.in_flight == 0 and now - worker.last_used > self.idle_timeout:
+                await self.stop(group)
+
+    async def run_reaper(self):
+        """
+        Periodically stop idle workers.
+        """
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 2, 0.1))
+            await self.reap_idle()
+
+    async def close(self):
+        """
+        Stop all workers and remove their sockets.
+        """
+        for group in list(self.workers):
+            await self.stop(group)
+        for worker in list(self.retiring):
+            await worker.stop()
+        shutil.rmtree(self.socket_dir, ignore_errors = True)
+
+
+class IsolatedApp:
+    """
+    ASGI app that proxies project requests to the project's worker process.
+    """
+
+    def __init__(self, pool: WorkerPool, username: str, project_name: str):
+        self.pool = pool
+        self.prefix = f"/{username}/{project_name}"
+        self.group = pool.group(username, project_name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1011})
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        worker: Optional[Worker] = None
+        try:
+            worker = await self.pool.acquire(self.group)
+            worker.in_flight += 1
+            request = worker.client.build_request(
+                method = scope["method"],
+                # The worker routes on /{username}/{project_name}, whatever the root path of this app.
+                url = self.prefix + scope["path"],
+                params = scope["query_string"].decode("latin-1"),
+                headers = [(key, value) for key, value in scope["headers"] if key != b"host"],
+                content = body,
+            )
+            response = await worker.client.send(request, stream = True)
+        except (httpx.TransportError, RuntimeError):
+            if worker is not None:
+                worker.in_flight -= 1
+            response = PlainTextResponse("Project worker unavailable.", status_code = 502)
+            await response(scope, receive, send)
+            return
+
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": response.headers.raw,
+            })
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await response.aclose()
+            worker.in_flight -= 1
+            worker.last_used = time.monotonic()
@@ -0,0 +1,306 @@
+import os
+import math
+import time
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.models import Projects
+
+
+PROJECT_RATE_LIMIT = float(os.getenv("PROJECT_RATE_LIMIT", "0"))
+PROJECT_MAX_IN_FLIGHT = int(os.getenv("PROJECT_MAX_IN_FLIGHT", "0"))
+USER_RATE_LIMIT = float(os.getenv("USER_RATE_LIMIT", "0"))
+USER_MAX_IN_FLIGHT = int(os.getenv("USER_MAX_IN_FLIGHT", "0"))
+
+
+class Limit:
+    """
+    Token bucket rate limit and in-flight request cap. A rate limit or cap of 0 is unlimited.
+    """
+
+    def __init__(
+            self,
+            rate_limit: float = 0,
+            burst: Optional[int] = None,
+            max_in_flight: int = 0,
+            timer: Callable[[], float] = time.monotonic
+            ):
+        self.timer = timer
+        self.rate_limit = 0.0
+        self.burst = 0
+        self.max_in_flight = 0
+        self.tokens = 0.0
+        self.updated = timer()
+        self.in_flight = 0
+        self.allowed = 0
+        self.throttled = 0
+        self.configure(rate_limit, burst, max_in_flight)
+
+    def configure(self, rate_limit: float, burst: Optional[int], max_in_flight: int):
+        """
+        Change limits, keeping the current in-flight count and counters.
+
+        Args:
+            rate_limit (float): Sustained rate, in requests per second.
+            burst (Optional[int]): Bucket size, i.e. number of requests allowed at once after
+                a quiet period. Defaults to the rate limit rounded up if None.
+            max_in_flight (int): Maximum number of concurrent requests.
+        """
+        burst = burst or max(math.ceil(rate_limit), 1)
+        if (rate_limit, burst) != (self.rate_limit, self.burst):
+            self.tokens = float(burst)
+            self.updated = self.timer()
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+
+    def retry_after(self) -> float:
+        """
+        Time until a request is allowed, refilling the token bucket.
+
+        Returns:
+            float: Seconds to wait, 0 if a request is allowed now.
+        """
+        if self.max_in_flight > 0 and self.in_flight >= self.max_in_flight:
+            return 1.0
+        if self.rate_limit <= 0:
+            return 0.0
+
+        now = self.timer()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate_limit)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate_limit
+
+    def acquire(self):
+        """
+        Take a token and count request as in flight.
+        """
+        if self.rate_limit > 0:
+            self.tokens -= 1
+        self.in_flight += 1
+        self.allowed += 1
+
+    def release(self):
+        """
+        Count request as finished.
+        """
+        self.in_flight -= 1
+
+    def state(self) -> Dict[str, float]:
+        """
+        Limits, current token and in-flight counts and request counters.
+
+        Returns:
+            Dict[str, float]: Limit state.
+        """
+        self.retry_after()
+        return {
+            "rate_limit": self.rate_limit,
+            "burst": self.burst,
+            "max_in_flight": self.max_in_flight,
+            "tokens": self.tokens if self.rate_limit > 0 else None,
+            "in_flight": self.in_flight,
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+        }
+
+
+class Limiter:
+    """
+    Per user and per project limits of this worker, created with the default limits on first use.
+    """
+
+    def __init__(self):
+        self.users: Dict[str, Limit] = {}
+        self.projects: Dict[Tuple[str, str], Limit] = {}
+
+    def user(self, username: str) -> Limit:
+        """
+        Retrieve limit shared by all projects of user.
+
+        Args:
+            username (str): Username.
+
+        Returns:
+            Limit: User limit.
+        """
+        limit = self.users.get(username)
+        if limit is None:
+            limit = self.users[username] = Limit(USER_RATE_LIMIT, None, USER_MAX_IN_FLIGHT)
+        return limit
+
+    def project(self, username: str, project_name: str) -> Limit:
+        """
+        Retrieve limit of project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+
+        Returns:
+            Limit: Project limit.
+        """
+        key = (username, project_name)
+        limit = self.projects.get(key)
+        if limit is None:
+            limit = self.projects[key] = Limit(PROJECT_RATE_LIMIT, None, PROJECT_MAX_IN_FLIGHT)
+        return limit
+
+    def configure_user(
+            self,
+            username: str,
+            rate_limit: Optional[float],
+            burst: Optional[int],
+            max_in_flight: Optional[int]
+            ):
+        """
+        Set limits of user, falling back to the defaults for limits that are None.
+
+        Args:
+            username (str): Username.
+            rate_limit (Optional[float]): Sustained rate, in requests per second.
+            burst (Optional[int]): Bucket size.
+            max_in_flight (Optional[int]): Maximum number of concurrent requests.
+        """
+        self.user(username).configure(
+            USER_RATE_LIMIT if rate_limit is None else rate_limit,
+            burst,
+            USER_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight,
+        )
+
+    def configure_project(
+            self,
+            username: str,
+            project_name: str,
+            rate_limit: Optional[float],
+            burst: Optional[int],
+            max_in_flight: Optional[int]
+            ):
+        """
+        Set limits of project, falling back to the defaults for limits that are None.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+            rate_limit (Optional[float]): Sustained rate, in requests per second.
+            burst (Optional[int]): Bucket size.
+            max_in_flight (Optional[int]): Maximum number of concurrent requests.
+        """
+        self.project(username, project_name).configure(
+            PROJECT_RATE_LIMIT if rate_limit is None else rate_limit,
+            burst,
+            PROJECT_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight,
+        )
+
+    def load(self, projects: Iterable[Projects]):
+        """
+        Set limits of projects and their owners from their db records, and drop limits of
+        projects that no longer exist.
+
+        Args:
+            projects (Iterable[Projects]): Projects, with their owners fetched.
+        """
+        keys = set()
+        for project in projects:
+            owner = project.owner
+            keys.add((owner.username, project.name))
+            self.configure_user(owner.username, owner.rate_limit, owner.burst, owner.max_in_flight)
+            self.configure_project(
+                owner.username,
+                project.name,
+                project.rate_limit,
+                project.burst,
+                project.max_in_flight,
+            )
+        for key in set(self.projects) - keys:
+            self.remove_project(*key)
+
+    def remove_project(self, username: str, project_name: str):
+        """
+        Drop limits of deleted project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        self.projects.pop((username, project_name), None)
+
+    def clear(self):
+        """
+        Drop all limits.
+        """
+        self.users.clear()
+        self.projects.clear()
+
+    def state(self, username: str) -> Dict[str, Dict]:
+        """
+        State of the limits of user and its projects.
+
+        Args:
+            username (str): Username.
+
+        Returns:
+            Dict[str, Dict]: User limit state, and project limit states keyed on project name.
+        """
+        return {
+            "user": self.user(username).state(),
+            "projects": {
+                project_name: limit.state()
+                for (owner, project_name), limit in self.projects.items() if owner == username
+            },
+        }
+
+
+class LimitedApp:
+    """
+    ASGI app wrapper that enforces user and project limits before a project app runs,
+    answering requests over the limits with 429.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: Limiter, username: str, project_name: str):
+        self.app = app
+        self.__wrapped__ = app
+        self.limiter = limiter
+        self.username = username
+        self.project_name = project_name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        limits: List[Limit] = [
+            self.limiter.user(self.username),
+            self.limiter.project(self.username, self.project_name),
+        ]
+        retry_after = 0.0
+        for limit in limits:
+            wait = limit.retry_after()
+            if wait > 0:
+                limit.throttled += 1
+                retry_after = max(retry_after, wait)
+
+        if retry_after > 0:
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1013})
+                return
+            response = JSONResponse(
+                {"detail": "Too many requests."},
+                status_code = 429,
+                headers = {"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        for limit in limits:
+            limit.acquire()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            for limit in limits:
+                limit.release()
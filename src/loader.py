@@ -0,0 +1,280 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import functools
+import threading
+
+from types import ModuleType
+from datetime import datetime, timezone
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.models import Projects
+from src.routing import MountTable, unwrap
+from src.schemas import LoadReport, ProjectLoad
+
+
+LAZY_MOUNT = os.getenv("LAZY_MOUNT", "false").lower() == "true"
+WARMUP_PROJECTS = int(os.getenv("WARMUP_PROJECTS", "0"))
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "8"))
+LOAD_TIMEOUT = float(os.getenv("LOAD_TIMEOUT", "30"))
+
+logger = logging.getLogger(__name__)
+
+
+class LazyApp:
+    """
+    Placeholder ASGI app that imports the project app module on its first request.
+    """
+
+    def __init__(self, module_name: str, importer: Optional[Callable[[str], ModuleType]] = None):
+        self.module_name = module_name
+        self.importer = importer
+        self.app: Optional[ASGIApp] = None
+        self.last_accessed: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether the project app module has been imported.
+        """
+        return self.app is not None
+
+    async def load(self) -> ASGIApp:
+        """
+        Import the project app module, if not yet imported. Concurrent callers wait on a single import.
+
+        Returns:
+            ASGIApp: Project app.
+        """
+        if self.app is None:
+            async with self._lock:
+                if self.app is None:
+                    importer = self.importer if self.importer is not None else import_module
+                    module = await run_in_daemon_thread(importer, self.module_name)
+                    self.app = module.app
+        return self.app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.last_accessed = time.time()
+        app = await self.load()
+        await app(scope, receive, send)
+
+
+async def warm_up(table: MountTable, limit: int):
+    """
+    Preload the most recently accessed lazily mounted projects.
+
+    Args:
+        table (MountTable): Table of mounted project apps.
+        limit (int): Maximum number of projects to preload.
+    """
+    projects = await Projects.filter(last_accessed__not_isnull = True) \
+        .order_by("-last_accessed").limit(limit).prefetch_related("owner")
+
+    for project in projects:
+        project_app = unwrap(table.get(project.owner.username, project.name))
+        if isinstance(project_app, LazyApp):
+            try:
+                await project_app.load()
+            except Exception: # pylint: disable=broad-exception-caught
+                # A broken project surfaces on its own first request instead.
+                continue
+
+
+async def save_last_accessed(table: MountTable):
+    """
+    Persist the last access time of lazily mounted projects, for warm up on next start up.
+
+    Args:
+        table (MountTable): Table of mounted project apps.
+    """
+    accessed = {}
+    for username, project_name in table:
+        project_app = unwrap(table.get(username, project_name))
+        if isinstance(project_app, LazyApp) and project_app.last_accessed is not None:
+            accessed[(username, project_name)] = project_app.last_accessed
+
+    if not accessed:
+        return
+
+    projects = await Projects.filter(
+        owner__username__in = {username for username, _ in accessed},
+        name__in = {project_name for _, project_name in accessed},
+    ).prefetch_related("owner")
+
+    updated = []
+    for project in projects:
+        last_accessed = accessed.get((project.owner.username, project.name))
+        if last_accessed is not None:
+            project.last_accessed = datetime.fromtimestamp(last_accessed, tz = timezone.utc)
+            updated.append(project)
+
+    if updated:
+        await Projects.bulk_update(updated, fields = ["last_accessed"])
+
+
+def import_fresh(module_name: str):
+    """
+    Import module afresh from its current source, discarding any previously imported version.
+
+    Args:
+        module_name (str): Name of module to import.
+
+    Returns:
+        ModuleType: Imported module.
+    """
+    sys.modules.pop(module_name, None)
+    return import_module(module_name)
+
+
+def discard_module(module_name: str, module: ModuleType):
+    """
+    Drop module imported by a call that was given up on, unless a newer import replaced it.
+
+    Args:
+        module_name (str): Name of module.
+        module (ModuleType): Module imported by the call.
+    """
+    if sys.modules.get(module_name) is module:
+        del sys.modules[module_name]
+
+
+def run_in_daemon_thread(
+        func: Callable, *args: Any,
+        discard: Optional[Callable[[Any], None]] = None,
+        on_exit: Optional[Callable[[], None]] = None
+        ) -> asyncio.Future:
+    """
+    Run function in a daemon thread, so that a hung call blocks neither the event loop nor process exit.
+
+    Args:
+        func (Callable): Function to run.
+        *args (Any): Positional arguments for function.
+        discard (Optional[Callable[[Any], None]], optional): Called with the result of the function
+            call instead, if the future was cancelled, e.g. on timeout, or the event loop closed
+            before it returned. Defaults to None.
+        on_exit (Optional[Callable[[], None]], optional): Called on the event loop once the function
+            call returned, even if the future was cancelled. Defaults to None.
+
+    Returns:
+        asyncio.Future: Future resolved with the result of the function call.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(result: Any, exc: Optional[BaseException]):
+        if on_exit is not None:
+            on_exit()
+        if not future.done():
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+        elif exc is None and discard is not None:
+            discard(result)
+
+    def target():
+        result, error = None, None
+        try:
+            result = func(*args)
+        except BaseException as exc: # pylint: disable=broad-exception-caught
+            error = exc
+
+        if not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(resolve, result, error)
+                return
+            except RuntimeError:
+                # The event loop closed meanwhile.
+                pass
+        if error is None and discard is not None:
+            discard(result)
+
+    threading.Thread(target = target, name = f"loader-{func.__name__}", daemon = True).start()
+    return future
+
+
+async def load_projects(
+        modules: Dict[Tuple[str, str], str],
+        workers: int = LOAD_WORKERS,
+        timeout: float = LOAD_TIMEOUT,
+        importer: Optional[Callable[[str], ModuleType]] = None
+        ) -> Tuple[Dict[Tuple[str, str], ASGIApp], LoadReport]:
+    """
+    Import project app modules concurrently off the event loop.
+
+    Projects that fail to import, or are not imported within the timeout, including the wait for
+    a worker slot, are reported as unhealthy and skipped. An import that timed out keeps its worker
+    slot until its thread returns, so hung imports never pile up threads, and the module it returns
+    late is discarded. Start up thus takes at most about the timeout, however many imports hang.
+
+    Args:
+        modules (Dict[Tuple[str, str], str]): Module name of each project app,
+            keyed on (username, project name).
+        workers (int, optional): Maximum number of concurrent imports. Defaults to LOAD_WORKERS.
+        timeout (float, optional): Load timeout per project, from the start of loading, in seconds.
+            Defaults to LOAD_TIMEOUT.
+        importer (Optional[Callable[[str], ModuleType]], optional): Imports module afresh given its name.
+            Defaults to None, i.e. import_fresh.
+
+    Returns:
+        Tuple[Dict[Tuple[str, str], ASGIApp], LoadReport]: Loaded project apps and load report.
+    """
+    semaphore = asyncio.Semaphore(max(workers, 1))
+    importer = importer if importer is not None else import_fresh
+    project_apps = {}
+
+    async def run_import(module_name: str, started: List[bool]) -> ModuleType:
+        await semaphore.acquire()
+        started.append(True)
+        # Released by the import thread once it returns, not when the import times out.
+        return await run_in_daemon_thread(
+            importer,
+            module_name,
+            discard = functools.partial(discard_module, module_name),
+            on_exit = semaphore.release,
+        )
+
+    async def load(key: Tuple[str, str], module_name: str) -> ProjectLoad:
+        username, project_name = key
+        start = time.perf_counter()
+        started = []
+        error = None
+        try:
+            # The deadline covers the wait for a slot, which hung imports may hold indefinitely.
+            module = await asyncio.wait_for(run_import(module_name, started), timeout = timeout)
+            project_apps[key] = module.app
+        except asyncio.TimeoutError:
+            if started:
+                error = f"Import timed out after {timeout}s."
+            else:
+                error = f"Timed out after {timeout}s waiting for an import slot."
+        except (Exception, SystemExit) as exc: # pylint: disable=broad-exception-caught
+            error = f"{type(exc).__name__}: {exc}"
+        load_time = time.perf_counter() - start
+
+        if error is not None:
+            logger.warning("Skipped unhealthy project /%s/%s: %s", username, project_name, error)
+        return ProjectLoad(
+            username = username,
+            project_name = project_name,
+            load_time = load_time,
+            healthy = error is None,
+            error = error,
+        )
+
+    start = time.perf_counter()
+    loads = await asyncio.gather(*[load(key, module_name) for key, module_name in modules.items()])
+    report = LoadReport(total_time = time.perf_counter() - start, projects = loads)
+
+    logger.info(
+        "Loaded %d of %d projects in %.3fs.",
+        len(project_apps), len(modules), report.total_time
+    )
+    return project_apps, report
@@ -1,36 +1,66 @@
 import os
+import asyncio
+import logging
+import functools
 
-from typing import Annotated, List
+from typing import Annotated, Dict, List, Literal, Optional, Tuple
 from contextlib import asynccontextmanager
-from importlib import import_module, reload
-from starlette.routing import Mount
+from starlette.types import ASGIApp
 
 from tortoise import Tortoise
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
 from tortoise.exceptions import IntegrityError
 
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Form, UploadFile, File
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Form, UploadFile, File, Query, Request, Response
 
 from src import projects as proj
+from src import loader
+from src import isolation
+from src import bulk
+from src import response_cache
+from src import eviction
+from src import storage
+from src import database
+from src import migrations
+from src.accounting import Accounting
+from src.cleanup import cleaner
+from src.catalog import Catalog
+from src.limits import Limiter, LimitedApp
+from src.metrics import Metrics, MetricsMiddleware, format_metric, format_stats, format_labeled_stats
+from src.sync import MountSync
+from src.threads import ThreadPartitions, ThreadedApp
+from src.watchdog import Watchdog
 from src.models import Users, Projects
-from src.schemas import Token, User, Project
-from src.auth import authenticate_user, create_access_token, pwd_context, get_current_user
+from src.validation import invalid_script
+from src.routing import RESERVED_PREFIXES, MountTable, ProjectDispatcher, TrackedApp, unwrap
+from src.schemas import (
+    Message, Token, User, Project, BulkResult, Limits, LimitState, LimitsReport, ProjectUsage, StallReport
+)
+from src.auth import authenticate_user, create_access_token, get_current_user, password_hasher, token_cache
+
 
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
 
 root = "src"
+logger = logging.getLogger(__name__)
+mount_table = MountTable()
+mount_sync = MountSync()
+limiter = Limiter()
+metrics = Metrics()
+catalog = Catalog()
+evictor = eviction.Evictor()
+accounting = Accounting()
+threads = ThreadPartitions()
+watchdog = Watchdog()
+cache_settings = response_cache.CacheSettings()
 config = {
     "connections": {
         "local": "sqlite://db.sqlite3",
-        "docker": {
-            "engine": "tortoise.backends.asyncpg",
-            "credentials": {
-                "database": os.getenv("POSTGRES_DB", "postgres"),
-                "host": os.getenv("POSTGRES_HOST", "localhost"),
-                "password": os.getenv("POSTGRES_PASSWORD", "postgres"),
-                "port": 5432,
-                "user": os.getenv("POSTGRES_USER", "postgres"),
-            }
-        },
+        "docker": database.postgres_connection(os.getenv("POSTGRES_HOST", "localhost")),
         "tests": "sqlite://:memory:",
     },
     "apps": {
@@ -40,6 +70,8 @@ config = {
         }
     }
 }
+if database.POSTGRES_REPLICA_HOST:
+    config["connections"]["replica"] = database.postgres_connection(database.POSTGRES_REPLICA_HOST)
 
 
 @asynccontextmanager
@@ -50,18 +82,97 @@ async def lifespan(app: FastAPI):
     Args:
         app (FastAPI): FastAPI app to bind Tortoise-ORM to.
     """
+    if storage.DATABASE_STORAGE and isolation.ISOLATED_MODE:
+        raise RuntimeError("Isolated mode workers import project scripts from disk, not from the database.")
+
     await Tortoise.init(config = config)
     await Tortoise.generate_schemas()
+    added = await migrations.migrate()
+    if added:
+        logger.info("Added columns %s to existing tables", ", ".join(added))
+    await cleaner.start(proj.users_dir)
+    if storage.DATABASE_STORAGE:
+        storage.scripts.install(root, proj.users_dir)
+        await storage.load_scripts()
+    mount_sync.generation = mount_sync.read_generation()
     projects = await Projects.all().prefetch_related("owner")
-
+    limiter.load(projects)
+    cache_settings.load(projects)
+    accounting.start()
+    watchdog.start()
+    if not isolation.ISOLATED_MODE:
+        threads.install()
+
+    reaper = None
+    if isolation.ISOLATED_MODE:
+        app.state.worker_pool = isolation.WorkerPool(root = root)
+        reaper = asyncio.create_task(app.state.worker_pool.run_reaper())
+
+    modules = {}
     for project in projects:
         project_name = project.name
         username = project.owner.username
+        module_name = f"{root}.users.{username}.{project_name}.app"
+        mount_sync.track(username, project_name, project)
+
+        if isolation.ISOLATED_MODE:
+            mount_app(
+                username = username,
+                project_name = project_name,
+                project_app = isolation.IsolatedApp(app.state.worker_pool, username, project_name)
+            )
+        elif loader.LAZY_MOUNT:
+            mount_app(
+                username = username,
+                project_name = project_name,
+                project_app = loader.LazyApp(module_name, importer = accounting.import_module)
+            )
+        else:
+            modules[(username, project_name)] = module_name
+
+    project_apps, app.state.load_report = await loader.load_projects(
+        modules, importer = accounting.import_fresh
+    )
+    for (username, project_name), project_app in project_apps.items():
+        mount_app(username = username, project_name = project_name, project_app = project_app)
 
-        module = import_module(f"{root}.users.{username}.{project_name}.app")
-        app.mount(f"/{username}/{project_name}", module.app)
+    syncer = None
+    if mount_sync.interval > 0:
+        syncer = asyncio.create_task(mount_sync.run(sync_mount, sync_unmount, sync_settings))
+
+    sweeper = None
+    if evictor.enabled and not isolation.ISOLATED_MODE:
+        sweeper = asyncio.create_task(evictor.run(mount_table, evict_app))
+
+    warm_up = None
+    if loader.LAZY_MOUNT and loader.WARMUP_PROJECTS > 0:
+        warm_up = asyncio.create_task(loader.warm_up(mount_table, loader.WARMUP_PROJECTS))
 
     yield
+    if syncer is not None:
+        syncer.cancel()
+    if warm_up is not None:
+        warm_up.cancel()
+    if sweeper is not None:
+        sweeper.cancel()
+    if reaper is not None:
+        reaper.cancel()
+        await app.state.worker_pool.close()
+    await loader.save_last_accessed(mount_table)
+    mount_table.clear()
+    token_cache.clear()
+    limiter.clear()
+    cache_settings.clear()
+    metrics.clear()
+    catalog.clear()
+    evictor.clear()
+    threads.clear()
+    watchdog.stop()
+    watchdog.clear()
+    accounting.stop()
+    accounting.clear()
+    cleaner.stop()
+    storage.scripts.uninstall()
     await Tortoise.close_connections()
 
 
@@ -70,6 +181,8 @@ app = FastAPI(
     description = "API Documentation for Dynamic Routing Service.",
     lifespan = lifespan,
 )
+app.add_middleware(ProjectDispatcher, table = mount_table)
+app.add_middleware(MetricsMiddleware, metrics = metrics, table = mount_table)
 auth_router = APIRouter(
     prefix = "/auth",
     tags = ["Authentication"]
@@ -78,20 +191,235 @@ proj_router = APIRouter(
     prefix = "/{username}",
     tags = ["Projects"]
 )
+limits_router = APIRouter(
+    prefix = "/limits/{username}",
+    tags = ["Limits"]
+)
+
+
+def mount_app(username: str, project_name: str, project_app: ASGIApp):
+    """
+    Mount project app at /{username}/{project_name}, swapping out any app already mounted there.
+    Requests already dispatched to the swapped out app are left to drain in the background,
+    and its cached responses, if the project opted in to response caching, are dropped with it.
+    Requests over the user or project limits are rejected before they reach the app, and sync
+    calls of the app run on the thread tokens of the project.
+    The project is marked stale in the catalog, so that its OpenAPI schema is re-read.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        project_app (ASGIApp): Project app to mount.
+    """
+    cache_ttl = cache_settings.ttl(username, project_name)
+    if cache_ttl > 0:
+        project_app = response_cache.ResponseCache(project_app, ttl = cache_ttl)
+    if threads.limiter is not None:
+        project_app = ThreadedApp(project_app, threads, username, project_name)
+    project_app = LimitedApp(project_app, limiter, username, project_name)
+    previous = mount_table.mount(username, project_name, TrackedApp(project_app))
+    if isinstance(previous, TrackedApp) and previous.in_flight > 0:
+        asyncio.create_task(drain_app(username, project_name, previous))
+    catalog.track(username, project_name)
+
+
+async def drain_app(username: str, project_name: str, project_app: TrackedApp):
+    """
+    Wait for in-flight requests of a swapped out project app to finish.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        project_app (TrackedApp): Swapped out project app.
+    """
+    if not await project_app.wait_idle(isolation.DRAIN_TIMEOUT):
+        logger.warning(
+            "Swapped out app of project %s/%s still has %d in-flight requests after %ss",
+            username, project_name, project_app.in_flight, isolation.DRAIN_TIMEOUT
+        )
+
+
+def remount_app(username: str, project_name: str):
+    """
+    Mount project app again with its current settings, e.g. after its response cache TTL changed.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+    """
+    project_app = unwrap(mount_table.get(username, project_name))
+    if project_app is not None:
+        mount_app(username = username, project_name = project_name, project_app = project_app)
+
+
+def unmount_app(username: str, project_name: str):
+    """
+    Unmount project app at /{username}/{project_name}.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+    """
+    mount_table.unmount(username, project_name)
+
+
+def evict_app(username: str, project_name: str):
+    """
+    Swap out imported project app for a placeholder that re-imports it on its next request,
+    and purge its modules.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+    """
+    previous = unwrap(mount_table.get(username, project_name))
+    project_app = loader.LazyApp(
+        f"{root}.users.{username}.{project_name}.app", importer = accounting.import_module
+    )
+    if isinstance(previous, loader.LazyApp):
+        project_app.last_accessed = previous.last_accessed
+    mount_app(username = username, project_name = project_name, project_app = project_app)
+    eviction.purge_modules(f"{root}.users.{username}.{project_name}")
+
+
+async def load_app(username: str, project_name: str, reload_module: bool = False) -> ASGIApp:
+    """
+    Load project app from its current script, off the event loop.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        reload_module (bool, optional): Whether the project app was loaded before and its worker,
+            if any, has to be replaced. Defaults to False.
+
+    Raises:
+        HTTPException: Raised when project app fails to load, in which case the worker, if any,
+            is left untouched.
+
+    Returns:
+        ASGIApp: Project app.
+    """
+    try:
+        if isolation.ISOLATED_MODE:
+            pool = app.state.worker_pool
+            if reload_module:
+                await pool.replace(pool.group(username, project_name), (username, project_name))
+            return isolation.IsolatedApp(pool, username, project_name)
+
+        module_name = f"{root}.users.{username}.{project_name}.app"
+        module = await asyncio.wait_for(
+            loader.run_in_daemon_thread(
+                accounting.import_fresh,
+                module_name,
+                discard = functools.partial(loader.discard_module, module_name),
+            ),
+            timeout = loader.LOAD_TIMEOUT
+        )
+        return module.app
+    except (Exception, SystemExit) as exc: # pylint: disable=broad-exception-caught
+        raise invalid_script(f"{type(exc).__name__}: {exc}") from exc
+
+
+async def load_apps(
+        username: str, project_names: List[str]
+        ) -> Tuple[Dict[str, ASGIApp], Dict[str, str]]:
+    """
+    Load project apps concurrently, off the event loop.
+
+    Args:
+        username (str): Username of projects owner.
+        project_names (List[str]): Names of projects.
+
+    Returns:
+        Tuple[Dict[str, ASGIApp], Dict[str, str]]: Project apps keyed on project name,
+            and load error keyed on project name for projects that failed to load.
+    """
+    if isolation.ISOLATED_MODE:
+        pool = app.state.worker_pool
+        project_apps = {
+            project_name: isolation.IsolatedApp(pool, username, project_name)
+            for project_name in project_names
+        }
+        return project_apps, {}
+
+    modules = {
+        (username, project_name): f"{root}.users.{username}.{project_name}.app"
+        for project_name in project_names
+    }
+    project_apps, report = await loader.load_projects(modules, importer = accounting.import_fresh)
+    errors = {load.project_name: load.error for load in report.projects if not load.healthy}
+    project_apps = {
+        project_name: project_app for (_, project_name), project_app in project_apps.items()
+    }
+    return project_apps, errors
+
+
+async def unload_app(username: str, project_name: str):
+    """
+    Unmount project app, drop its limits, thread tokens, metrics, usage, stall counts and catalog
+    entry, and purge its modules or release its worker, which may be shared with other projects
+    and is only stopped once its in-flight requests finish.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+    """
+    unmount_app(username = username, project_name = project_name)
+    limiter.remove_project(username, project_name)
+    cache_settings.remove_project(username, project_name)
+    threads.remove_project(username, project_name)
+    watchdog.remove_project(username, project_name)
+    metrics.remove_project(username, project_name)
+    catalog.remove(username, project_name)
+    accounting.remove_project(username, project_name)
+    storage.scripts.remove(username, project_name)
+    if isolation.ISOLATED_MODE:
+        pool = app.state.worker_pool
+        await pool.release(pool.group(username, project_name))
+    else:
+        eviction.purge_modules(f"{root}.users.{username}.{project_name}")
+
+
+async def sync_mount(username: str, project_name: str, reload_module: bool):
+    """
+    Mount or reload project app changed by another worker.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        reload_module (bool): Whether to reload the project app module.
+    """
+    if storage.DATABASE_STORAGE:
+        await storage.load_scripts([(username, project_name)])
+    project_app = await load_app(
+        username = username,
+        project_name = project_name,
+        reload_module = reload_module
+    )
+    mount_app(username = username, project_name = project_name, project_app = project_app)
+
+
+async def sync_unmount(username: str, project_name: str):
+    """
+    Unmount project app deleted by another worker.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+    """
+    await unload_app(username = username, project_name = project_name)
 
 
-def unmount_app(path: str):
+def sync_settings(projects: List[Projects]):
     """
-    Remove route from app.
+    Apply limits and response cache TTLs changed by another worker.
 
     Args:
-        path (str): Path of route to be removed.
+        projects (List[Projects]): All projects, with their owners fetched.
     """
-    global app
-    for index, route in enumerate(app.routes):
-        if isinstance(route, Mount) and route.path == path:
-            del app.routes[index]
-            break
+    limiter.load(projects)
+    for username, project_name in cache_settings.load(projects):
+        remount_app(username = username, project_name = project_name)
 
 
 @auth_router.post("/register")
@@ -99,12 +427,17 @@ async def register(
     username: Annotated[str, Form()], password: Annotated[str, Form(format = "password")]
     ) -> User:
     """
-    Register new user.
+    Register new user. Usernames that are the first path segment of an admin route are reserved.
     """
+    if username in RESERVED_PREFIXES:
+        raise HTTPException(
+            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail = "Username is reserved."
+        )
     try:
         user = await Users.create(
             username = username,
-            hashed_password = pwd_context.hash(password)
+            hashed_password = await password_hasher.hash(password)
         )
         return await User.from_tortoise_orm(user)
     except IntegrityError:
@@ -136,104 +469,402 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]) -> T
 
 
 @proj_router.get("/")
-async def read_projects(current_user: Annotated[User, Depends(get_current_user)]) -> List[Project]:
+async def read_projects(
+    response: Response,
+    current_user: Annotated[User, Depends(get_current_user)],
+    limit: Annotated[int, Query(ge = 1, le = MAX_PAGE_SIZE)] = PAGE_SIZE,
+    cursor: Annotated[Optional[str], Query()] = None,
+    prefix: Annotated[Optional[str], Query()] = None,
+    ) -> List[Project]:
     """
-    Read list of projects belonging to current user.
+    Read page of projects belonging to current user, ordered by name.
+    The cursor of the next page, if any, is returned in the X-Next-Cursor header.
     """
-    projects = await current_user.projects.all()
-    return [await Project.from_tortoise_orm(project) for project in projects]
+    projects, next_cursor = await proj.list_projects(
+        owner = current_user,
+        limit = limit,
+        cursor = cursor,
+        prefix = prefix,
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [Project.model_validate(project) for project in projects]
 
 
 @proj_router.post("/")
 async def create_project(
     project_name: Annotated[str, Form()],
-    project_script: Annotated[UploadFile, File(description = "Project app script (i.e. app.py)")],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[User, Depends(get_current_user)],
+    project_script: Annotated[Optional[UploadFile], File(description = "Project app script (i.e. app.py)")] = None,
+    project_spec: Annotated[Optional[UploadFile], File(description = "Mock project spec (JSON)")] = None,
+    cache_ttl: Annotated[Optional[float], Form(ge = 0, description = "Response cache TTL in seconds")] = None,
     ) -> Project:
     """
-    Create a new project.
+    Create a new project, from a project app script or a mock project spec.
+    Responses of the project are cached for cache_ttl seconds, if set.
     """
-    try:
-        project = await Projects.create(
-            name = project_name,
-            owner = current_user
-        )
-
-    except IntegrityError:
-        raise HTTPException(
-            status_code = status.HTTP_409_CONFLICT,
-            detail = "Project already exists."
+    username = current_user.username
+    async with proj.project_lock(username, project_name):
+        try:
+            project = await Projects.create(
+                name = project_name,
+                owner = current_user,
+                cache_ttl = cache_ttl,
+            )
+
+        except IntegrityError:
+            raise HTTPException(
+                status_code = status.HTTP_409_CONFLICT,
+                detail = "Project already exists."
+            )
+
+        await proj.create_project(
+            username = username,
+            project_name = project_name
         )
 
+        try:
+            project.checksum = await proj.upload_project(
+                username = username,
+                project_name = project_name,
+                script = project_script,
+                spec = project_spec,
+            )
+            project_app = await load_app(username = username, project_name = project_name)
+        except HTTPException:
+            await project.delete()
+            await proj.delete_project(
+                username = username,
+                project_name = project_name,
+            )
+            await proj.prune_user(username = username)
+            raise
+
+        await project.save(update_fields = ["checksum"])
+        if storage.DATABASE_STORAGE:
+            await storage.save_scripts(username, [project_name])
+        cache_settings.configure(username, project_name, cache_ttl)
+        mount_app(username = username, project_name = project_name, project_app = project_app)
+        await mount_sync.publish(username, project_name, project)
+
+        return await Project.from_tortoise_orm(project)
+
+
+@proj_router.post("/bulk")
+async def import_projects(
+    archive: Annotated[UploadFile, File(description = "Zip archive of project_name/app.py entries")],
+    current_user: Annotated[User, Depends(get_current_user)]
+    ) -> List[BulkResult]:
+    """
+    Create projects in bulk from a zip archive of project_name/app.py entries.
+    """
     username = current_user.username
-
-    proj.create_project(
-        username = username,
-        project_name = project_name
-    )
-
-    await proj.save_file(
-        username = username,
-        project_name = project_name,
-        file = project_script,
+    scripts, failed = await asyncio.to_thread(bulk.read_archive, archive)
+
+    async with proj.projects_lock(username, scripts):
+        existing = await current_user.projects.filter(name__in = list(scripts)) \
+            .values_list("name", flat = True)
+        for project_name in existing:
+            del scripts[project_name]
+            failed[project_name] = "Project already exists."
+
+        staged, invalid = await bulk.stage_projects(username = username, scripts = scripts)
+        failed.update(invalid)
+
+        created = []
+        if staged:
+            try:
+                async with in_transaction(config["apps"]["models"]["default_connection"]):
+                    await Projects.bulk_create([
+                        Projects(name = project_name, owner = current_user, checksum = checksum)
+                        for project_name, (_, _, checksum) in staged.items()
+                    ])
+            except IntegrityError:
+                for project_name, (staged_path, _, _) in staged.items():
+                    await asyncio.to_thread(proj.discard_file, staged_path)
+                    await proj.delete_project(username = username, project_name = project_name)
+                    failed[project_name] = "Project already exists."
+                staged = {}
+
+        for project_name, (staged_path, cfile, _) in staged.items():
+            await asyncio.to_thread(proj.commit_file, username, project_name, staged_path, cfile)
+
+        if staged:
+            if storage.DATABASE_STORAGE:
+                await storage.save_scripts(username, list(staged))
+            project_apps, errors = await load_apps(username = username, project_names = list(staged))
+            if errors:
+                # Projects that fail to load are rolled back, as on single create.
+                await Projects.filter(owner = current_user, name__in = list(errors)).delete()
+                for project_name, error in errors.items():
+                    await proj.delete_project(username = username, project_name = project_name)
+                    failed[project_name] = invalid_script(error).detail
+
+            for project_name, project_app in project_apps.items():
+                mount_app(username = username, project_name = project_name, project_app = project_app)
+                created.append(project_name)
+            if created:
+                for project in await current_user.projects.filter(name__in = created):
+                    mount_sync.track(username, project.name, project)
+                await mount_sync.notify()
+
+        if not created:
+            await proj.prune_user(username = username)
+
+    return bulk.results(created = created, failed = failed)
+
+
+@proj_router.get("/export")
+async def export_projects(current_user: Annotated[User, Depends(get_current_user)]) -> StreamingResponse:
+    """
+    Export all projects of current user as a zip archive of project_name/app.py entries.
+    """
+    username = current_user.username
+    project_names = await current_user.projects.all().order_by("name") \
+        .values_list("name", flat = True)
+    return StreamingResponse(
+        bulk.stream_archive(username = username, project_names = project_names),
+        media_type = "application/zip",
+        headers = {"Content-Disposition": f'attachment; filename="{username}.zip"'},
     )
 
-    module = import_module(f"{root}.users.{username}.{project_name}.app")
-    app.mount(f"/{username}/{project_name}", module.app)
-
-    return await Project.from_tortoise_orm(project)
-
 
 @proj_router.put("/{project_name}")
 async def update_project(
     project: Annotated[Project, Depends(proj.get_project)],
-    project_script: Annotated[UploadFile, File(description = "Project app script (i.e. app.py)")],
+    project_script: Annotated[Optional[UploadFile], File(description = "Project app script (i.e. app.py)")] = None,
+    project_spec: Annotated[Optional[UploadFile], File(description = "Mock project spec (JSON)")] = None,
+    cache_ttl: Annotated[Optional[float], Form(ge = 0, description = "Response cache TTL in seconds")] = None,
     ) -> Project:
     """
-    Update an existing project.
+    Update an existing project, from a project app script or a mock project spec.
+    Its response cache TTL is changed to cache_ttl, if set, which may also be updated on its own.
     """
     username = project.owner.username
     project_name = project.name
 
-    await proj.save_file(
-        username = username,
-        project_name = project_name,
-        file = project_script,
-    )
-
-    mount_path = f"/{username}/{project_name}"
-    unmount_app(path = mount_path)
+    async with proj.project_lock(username, project_name):
+        await proj.reload_project(project)
+        checksum = None
+        if cache_ttl is None or project_script is not None or project_spec is not None:
+            checksum = await proj.upload_project(
+                username = username,
+                project_name = project_name,
+                script = project_script,
+                spec = project_spec,
+                checksum = project.checksum,
+            )
+        if cache_ttl is None:
+            cache_ttl = project.cache_ttl
+        if checksum is None:
+            if cache_settings.configure(username, project_name, cache_ttl):
+                await Projects.filter(id = project.id).update(cache_ttl = cache_ttl)
+                project.cache_ttl = cache_ttl
+                remount_app(username = username, project_name = project_name)
+                await mount_sync.notify()
+            return await Project.from_tortoise_orm(project)
+
+        # The current app stays mounted while the new one loads, and keeps serving if it fails to load.
+        try:
+            project_app = await load_app(
+                username = username,
+                project_name = project_name,
+                reload_module = True
+            )
+        except HTTPException:
+            await asyncio.to_thread(proj.rollback_file, username, project_name)
+            raise
+        await asyncio.to_thread(proj.discard_backup, username, project_name)
+        if storage.DATABASE_STORAGE:
+            await storage.save_scripts(username, [project_name])
+
+        await Projects.filter(id = project.id).update(
+            revision = F("revision") + 1, checksum = checksum, cache_ttl = cache_ttl
+        )
+        await project.refresh_from_db(fields = ["revision", "checksum", "cache_ttl"])
 
-    module = reload(import_module(f"{root}.users.{username}.{project_name}.app"))
-    app.mount(f"/{username}/{project_name}", module.app)
+        cache_settings.configure(username, project_name, cache_ttl)
+        mount_app(username = username, project_name = project_name, project_app = project_app)
+        await mount_sync.publish(username, project_name, project)
 
-    return await Project.from_tortoise_orm(project)
+        return await Project.from_tortoise_orm(project)
 
 
 @proj_router.delete("/{project_name}")
-async def delete_project(project: Annotated[Project, Depends(proj.get_project)]) -> List[Project]:
+async def delete_project(project: Annotated[Project, Depends(proj.get_project)]) -> Message:
     """
     Delete an existing project.
     """
-    current_user = project.owner
-    username = current_user.username
+    username = project.owner.username
     project_name = project.name
 
-    mount_path = f"/{username}/{project_name}"
-    unmount_app(path = mount_path)
+    async with proj.project_lock(username, project_name):
+        await proj.reload_project(project)
+        await unload_app(username = username, project_name = project_name)
 
-    await project.delete()
-    proj.delete_project(
-        username = username,
-        project_name = project_name,
+        await project.delete()
+        await mount_sync.publish(username, project_name, None)
+        await proj.delete_project(
+            username = username,
+            project_name = project_name,
+        )
+        await proj.prune_user(username = username)
+
+    return Message(detail = "Project deleted.")
+
+
+@limits_router.get("/")
+async def read_limits(current_user: Annotated[User, Depends(get_current_user)]) -> LimitsReport:
+    """
+    Read limits and their current state for current user and its projects, in this worker.
+    """
+    return limiter.state(current_user.username)
+
+
+@limits_router.put("/")
+async def update_user_limits(
+    limits: Limits,
+    current_user: Annotated[User, Depends(get_current_user)]
+    ) -> LimitState:
+    """
+    Update limits shared by all projects of current user.
+    """
+    current_user.rate_limit = limits.rate_limit
+    current_user.burst = limits.burst
+    current_user.max_in_flight = limits.max_in_flight
+    await current_user.save(update_fields = ["rate_limit", "burst", "max_in_flight"])
+
+    limiter.configure_user(current_user.username, limits.rate_limit, limits.burst, limits.max_in_flight)
+    await mount_sync.notify()
+    return limiter.user(current_user.username).state()
+
+
+@limits_router.put("/{project_name}")
+async def update_project_limits(
+    limits: Limits,
+    project: Annotated[Project, Depends(proj.get_project)]
+    ) -> LimitState:
+    """
+    Update limits of an existing project.
+    """
+    username = project.owner.username
+    async with proj.project_lock(username, project.name):
+        await proj.reload_project(project)
+        project.rate_limit = limits.rate_limit
+        project.burst = limits.burst
+        project.max_in_flight = limits.max_in_flight
+        await project.save(update_fields = ["rate_limit", "burst", "max_in_flight"])
+
+    limiter.configure_project(
+        username,
+        project.name,
+        limits.rate_limit,
+        limits.burst,
+        limits.max_in_flight,
+    )
+    await mount_sync.notify()
+    return limiter.project(username, project.name).state()
+
+
+def response_cache_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Statistics of the response caches of mounted projects that opted in to response caching.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Response cache statistics keyed on {username}/{project_name}.
+    """
+    stats = {}
+    for username, project_name in mount_table:
+        cache = response_cache.find_cache(mount_table.get(username, project_name))
+        if cache is not None:
+            stats[f"{username}/{project_name}"] = cache.stats()
+    return stats
+
+
+@app.get("/metrics", include_in_schema = False)
+async def read_metrics() -> PlainTextResponse:
+    """
+    Export request metrics of projects and admin routes, and cache, password hashing, thread token,
+    event loop lag, folder cleanup and response cache statistics, in Prometheus text format.
+    """
+    text = format_metric(
+        "dynamic_routing_mounted_projects", "gauge", "Projects mounted by this worker.",
+        [((), len(mount_table))],
     )
+    text += metrics.render()
+    text += format_stats("token_cache", token_cache.stats(), "Token cache")
+    text += format_stats("password_hasher", password_hasher.stats(), "Password hasher")
+    text += format_stats("eviction", evictor.stats(), "Idle project eviction")
+    text += format_labeled_stats("db_pool", "connection", database.pool_stats(), "Database connection pool")
+    text += format_stats("catalog_cache", catalog.documents.stats(), "Catalog cache")
+    text += format_stats("project_threads_ceiling", threads.ceiling_stats(), "Project thread ceiling")
+    text += format_labeled_stats("project_threads", "project", threads.stats(), "Project threads")
+    text += format_stats("event_loop", watchdog.stats(), "Event loop")
+    text += format_stats("cleanup", cleaner.stats(), "Deleted folder cleanup")
+    text += format_labeled_stats("response_cache", "project", response_cache_stats(), "Response cache")
+    return PlainTextResponse(text, media_type = "text/plain; version=0.0.4")
+
+
+def loaded_app(username: str, project_name: str) -> Optional[ASGIApp]:
+    """
+    Project app mounted at /{username}/{project_name}, if it is imported in this process.
 
-    projects = await current_user.projects.all()
-    if not projects:
-        proj.delete_user(username = username)
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
 
-    return [Project.from_tortoise_orm(project) for project in projects]
+    Returns:
+        Optional[ASGIApp]: Project app, None if not mounted, not yet imported or isolated.
+    """
+    project_app = unwrap(mount_table.get(username, project_name))
+    if isinstance(project_app, loader.LazyApp):
+        return project_app.app
+    return project_app
+
+
+@app.get("/usage", include_in_schema = False)
+async def read_usage(
+        current_user: Annotated[User, Depends(get_current_user)],
+        sort_by: Literal["busy_time", "import_memory", "import_time"] = "busy_time",
+        limit: Annotated[Optional[int], Query(ge = 1)] = None,
+        ) -> List[ProjectUsage]:
+    """
+    Resource usage of projects of current user loaded by this worker, most costly first:
+    import time, memory allocated by the import if traced, and sampled time spent in project code.
+    """
+    return accounting.report(sort_by = sort_by, limit = limit, username = current_user.username)
+
+
+@app.get("/stalls", include_in_schema = False)
+async def read_stalls(
+        current_user: Annotated[User, Depends(get_current_user)],
+        limit: Annotated[Optional[int], Query(ge = 1)] = None,
+        ) -> StallReport:
+    """
+    Event loop lag of this worker, and its recent stalls over the threshold caused by projects of
+    current user, with the stack of the blocking code.
+    """
+    return watchdog.report(limit = limit, username = current_user.username)
+
+
+@app.get("/catalog", tags = ["Catalog"])
+async def read_catalog(
+        request: Request,
+        username: Optional[str] = None,
+        prefix: Optional[str] = None,
+        ) -> Response:
+    """
+    Merged OpenAPI document of mounted projects, optionally only of projects of a user
+    and whose name starts with prefix. Paths are prefixed with /{username}/{project_name}.
+    """
+    await catalog.refresh(loaded_app)
+    body, etag = catalog.render(username = username, prefix = prefix)
+    if response_cache.etag_matches(request.scope, etag.encode()):
+        return Response(status_code = status.HTTP_304_NOT_MODIFIED, headers = {"ETag": etag})
+    return Response(body, media_type = "application/json", headers = {"ETag": etag})
 
 
 app.include_router(auth_router)
+# Registered ahead of the project routes, which would otherwise match /limits/{username}.
+app.include_router(limits_router)
 app.include_router(proj_router)
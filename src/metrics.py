@@ -0,0 +1,366 @@
+import time
+import bisect
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.routing import MountTable, split_path
+
+
+PREFIX = "dynamic_routing"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def format_labels(labels: Labels) -> str:
+    """
+    Format labels in Prometheus text format.
+
+    Args:
+        labels (Labels): Label names and values.
+
+    Returns:
+        str: Formatted labels, e.g. {project="user/project"}.
+    """
+    if not labels:
+        return ""
+    escaped = [
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    ]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_metric(
+        name: str, kind: str, description: str, samples: Iterable[Tuple[Labels, float]]
+        ) -> str:
+    """
+    Format metric family in Prometheus text format.
+
+    Args:
+        name (str): Metric name.
+        kind (str): Metric type, i.e. counter, gauge or histogram.
+        description (str): Help text.
+        samples (Iterable[Tuple[Labels, float]]): Labels and value of each sample.
+
+    Returns:
+        str: Formatted metric family.
+    """
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{format_labels(labels)} {value:g}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+def format_stats(subsystem: str, stats: Dict[str, float], description: str) -> str:
+    """
+    Format statistics, such as cache or thread pool counters, as gauges.
+
+    Args:
+        subsystem (str): Name of component the statistics belong to.
+        stats (Dict[str, float]): Statistic values keyed on statistic name.
+        description (str): Help text prefix.
+
+    Returns:
+        str: Formatted gauges.
+    """
+    return "".join(
+        format_metric(
+            f"{PREFIX}_{subsystem}_{key}", "gauge", f"{description} {key}.", [((), value)]
+        )
+        for key, value in stats.items()
+    )
+
+
+def format_labeled_stats(
+        subsystem: str, label: str, stats: Dict[str, Dict[str, float]], description: str
+        ) -> str:
+    """
+    Format statistics of several instances of a component, such as connection pools, as gauges
+    labeled with the instance name.
+
+    Args:
+        subsystem (str): Name of component the statistics belong to.
+        label (str): Name of label holding the instance name.
+        stats (Dict[str, Dict[str, float]]): Statistic values keyed on statistic name,
+            keyed on instance name.
+        description (str): Help text prefix.
+
+    Returns:
+        str: Formatted gauges.
+    """
+    keys = dict.fromkeys(key for values in stats.values() for key in values)
+    return "".join(
+        format_metric(
+            f"{PREFIX}_{subsystem}_{key}", "gauge", f"{description} {key}.",
+            [(((label, name),), values[key]) for name, values in stats.items() if key in values],
+        )
+        for key in keys
+    )
+
+
+def format_histogram(
+        name: str, description: str, series: Iterable[Tuple[Labels, "Histogram"]]
+        ) -> str:
+    """
+    Format histogram family in Prometheus text format.
+
+    Args:
+        name (str): Metric name.
+        description (str): Help text.
+        series (Iterable[Tuple[Labels, Histogram]]): Labels and histogram of each series.
+
+    Returns:
+        str: Formatted histogram family.
+    """
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        for suffix, sample_labels, value in histogram.samples(labels):
+            lines.append(f"{name}{suffix}{format_labels(sample_labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+class Histogram:
+    """
+    Histogram with fixed bucket upper bounds.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """
+        Record value.
+
+        Args:
+            value (float): Observed value.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, labels: Labels) -> List[Tuple[str, Labels, float]]:
+        """
+        Cumulative bucket, sum and count samples.
+
+        Args:
+            labels (Labels): Labels of histogram.
+
+        Returns:
+            List[Tuple[str, Labels, float]]: Metric name suffix, labels and value of each sample.
+        """
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            samples.append(("_bucket", labels + (("le", le),), cumulative))
+        samples.append(("_sum", labels, self.sum))
+        samples.append(("_count", labels, self.count))
+        return samples
+
+
+class RequestMetrics:
+    """
+    Request counts by status code, latency and payload size histograms and in-flight gauge
+    of one project or admin route. The in-flight gauge of admin routes is kept for all of them
+    together, as the route is only known once it has been matched.
+    """
+
+    def __init__(self):
+        self.responses: Dict[str, int] = {}
+        self.in_flight = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.request_size = Histogram(SIZE_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+
+    def observe(self, status_code: int, latency: float, request_size: int, response_size: int):
+        """
+        Record finished request.
+
+        Args:
+            status_code (int): Response status code, 0 if no response was sent.
+            latency (float): Time taken to respond, in seconds.
+            request_size (int): Request body size, in bytes.
+            response_size (int): Response body size, in bytes.
+        """
+        code = str(status_code)
+        self.responses[code] = self.responses.get(code, 0) + 1
+        self.latency.observe(latency)
+        self.request_size.observe(request_size)
+        self.response_size.observe(response_size)
+
+
+class Metrics:
+    """
+    Request metrics of mounted projects, keyed on project, and of admin routes, keyed on endpoint.
+    """
+
+    def __init__(self):
+        self.projects: Dict[Tuple[str, str], RequestMetrics] = {}
+        self.routes: Dict[Tuple[str, str], RequestMetrics] = {}
+        self.admin_in_flight = 0
+
+    def project(self, username: str, project_name: str) -> RequestMetrics:
+        """
+        Retrieve metrics of project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+
+        Returns:
+            RequestMetrics: Project metrics.
+        """
+        key = (username, project_name)
+        metrics = self.projects.get(key)
+        if metrics is None:
+            metrics = self.projects[key] = RequestMetrics()
+        return metrics
+
+    def route(self, method: str, endpoint: str) -> RequestMetrics:
+        """
+        Retrieve metrics of admin route.
+
+        Args:
+            method (str): Request method.
+            endpoint (str): Name of endpoint function.
+
+        Returns:
+            RequestMetrics: Admin route metrics.
+        """
+        key = (method, endpoint)
+        metrics = self.routes.get(key)
+        if metrics is None:
+            metrics = self.routes[key] = RequestMetrics()
+        return metrics
+
+    def remove_project(self, username: str, project_name: str):
+        """
+        Drop metrics of deleted project, so that the number of series stays bounded.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        self.projects.pop((username, project_name), None)
+
+    def clear(self):
+        """
+        Drop all metrics.
+        """
+        self.projects.clear()
+        self.routes.clear()
+        self.admin_in_flight = 0
+
+    def render(self) -> str:
+        """
+        Format all request metrics in Prometheus text format.
+
+        Returns:
+            str: Formatted metrics.
+        """
+        project_series = [
+            ((("project", f"{username}/{project_name}"),), metrics)
+            for (username, project_name), metrics in list(self.projects.items())
+        ]
+        admin_series = [
+            ((("method", method), ("endpoint", endpoint)), metrics)
+            for (method, endpoint), metrics in list(self.routes.items())
+        ]
+
+        text = format_metric(
+            f"{PREFIX}_project_requests_in_flight", "gauge", "Requests in flight in project apps.",
+            [(labels, metrics.in_flight) for labels, metrics in project_series],
+        )
+        text += format_metric(
+            f"{PREFIX}_admin_requests_in_flight", "gauge", "Requests in flight in admin routes.",
+            [((), self.admin_in_flight)],
+        )
+        for kind, series in (("project", project_series), ("admin", admin_series)):
+            name = f"{PREFIX}_{kind}"
+            text += format_metric(
+                f"{name}_requests_total", "counter",
+                f"Requests served by {kind} routes, by status code.",
+                [
+                    (labels + (("code", code),), count)
+                    for labels, metrics in series
+                    for code, count in sorted(metrics.responses.items())
+                ],
+            )
+            text += format_histogram(
+                f"{name}_request_duration_seconds",
+                f"Request latency of {kind} routes, in seconds.",
+                [(labels, metrics.latency) for labels, metrics in series],
+            )
+            text += format_histogram(
+                f"{name}_request_size_bytes", f"Request body size of {kind} routes, in bytes.",
+                [(labels, metrics.request_size) for labels, metrics in series],
+            )
+            text += format_histogram(
+                f"{name}_response_size_bytes", f"Response body size of {kind} routes, in bytes.",
+                [(labels, metrics.response_size) for labels, metrics in series],
+            )
+        return text
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that records request metrics of mounted projects and admin routes.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Metrics, table: MountTable):
+        self.app = app
+        self.metrics = metrics
+        self.table = table
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics: Optional[RequestMetrics] = None
+        parts = split_path(scope["path"])
+        if parts is not None and (parts[0], parts[1]) in self.table:
+            metrics = self.metrics.project(parts[0], parts[1])
+            metrics.in_flight += 1
+        else:
+            self.metrics.admin_in_flight += 1
+
+        status_code = 0
+        request_size = 0
+        response_size = 0
+
+        async def receive_counted() -> Message:
+            nonlocal request_size
+            message = await receive()
+            request_size += len(message.get("body", b""))
+            return message
+
+        async def send_counted(message: Message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_counted, send_counted)
+        finally:
+            latency = time.perf_counter() - start
+            if metrics is None:
+                self.metrics.admin_in_flight -= 1
+                endpoint = scope.get("endpoint")
+                method = scope["method"] if scope["method"] in METHODS else "OTHER"
+                metrics = self.metrics.route(method, getattr(endpoint, "__name__", "unmatched"))
+            else:
+                metrics.in_flight -= 1
+            metrics.observe(status_code, latency, request_size, response_size)
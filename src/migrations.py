@@ -0,0 +1,99 @@
+from typing import List, Set, Type
+
+from tortoise import BaseDBAsyncClient, Tortoise
+from tortoise.models import Model
+
+
+async def table_columns(client: BaseDBAsyncClient, table: str) -> Set[str]:
+    """
+    Names of the columns of a table.
+
+    Args:
+        client (BaseDBAsyncClient): Connection of the table.
+        table (str): Name of table.
+
+    Returns:
+        Set[str]: Column names, empty if there is no such table.
+    """
+    if client.capabilities.dialect == "sqlite":
+        rows = await client.execute_query_dict(f'PRAGMA table_info("{table}")')
+        return {row["name"] for row in rows}
+    rows = await client.execute_query_dict(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = $1",
+        [table],
+    )
+    return {row["column_name"] for row in rows}
+
+
+def column_definition(model: Type[Model], field_name: str, column: str, dialect: str) -> str:
+    """
+    Build the definition of the column of a model field, to add it to an existing table.
+
+    Args:
+        model (Type[Model]): Model.
+        field_name (str): Name of field.
+        column (str): Name of column.
+        dialect (str): SQL dialect of the connection.
+
+    Raises:
+        RuntimeError: Raised when the column is not nullable and has no constant default,
+            so existing rows could not be filled in.
+
+    Returns:
+        str: Column definition.
+    """
+    meta = model._meta # pylint: disable=protected-access
+    field = meta.fields_map[field_name]
+    definition = f'"{column}" {field.get_for_dialect(dialect, "SQL_TYPE")}'
+    if field.null:
+        return definition
+    if isinstance(field.default, bool) or not isinstance(field.default, (int, float)):
+        raise RuntimeError(
+            f"Column {meta.db_table}.{column} is not nullable and has no numeric default, "
+            "add it to the existing table by hand."
+        )
+    return f"{definition} NOT NULL DEFAULT {field.default}"
+
+
+async def add_missing_columns(model: Type[Model]) -> List[str]:
+    """
+    Add the columns of model fields missing from its existing table. Tables are created whole by
+    Tortoise.generate_schemas(), which does not alter tables that already exist, so columns added
+    to a model after its table was created are added here.
+
+    Args:
+        model (Type[Model]): Model.
+
+    Returns:
+        List[str]: Names of added columns.
+    """
+    meta = model._meta # pylint: disable=protected-access
+    client = meta.db
+    existing = await table_columns(client, meta.db_table)
+    if not existing:
+        return []
+
+    added = []
+    for field_name, column in meta.fields_db_projection.items():
+        if column in existing:
+            continue
+        definition = column_definition(model, field_name, column, client.capabilities.dialect)
+        await client.execute_script(f'ALTER TABLE "{meta.db_table}" ADD COLUMN {definition}')
+        added.append(column)
+    return added
+
+
+async def migrate() -> List[str]:
+    """
+    Bring the tables of all models up to date with their models, once their tables exist.
+
+    Returns:
+        List[str]: Added columns, as {table}.{column}.
+    """
+    added = []
+    for app_models in Tortoise.apps.values():
+        for model in app_models.values():
+            for column in await add_missing_columns(model):
+                added.append(f"{model._meta.db_table}.{column}") # pylint: disable=protected-access
+    return added
@@ -0,0 +1,377 @@
+import re
+import json
+
+from urllib.parse import parse_qsl, unquote
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from starlette.types import Receive, Scope, Send
+
+
+PLACEHOLDER = re.compile(rb"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+PATH_PARAMETER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+RESERVED_PATHS = ("/openapi.json", "/docs")
+
+SCRIPT_TEMPLATE = '''from src.mock import MockApp
+
+
+app = MockApp.from_json({spec!r})
+'''
+
+
+def is_json(media_type: str) -> bool:
+    """
+    Whether media type is JSON.
+
+    Args:
+        media_type (str): Media type.
+
+    Returns:
+        bool: Whether media type is JSON.
+    """
+    return media_type == "application/json" or media_type.endswith("+json")
+
+
+def encode_body(body: Any, media_type: str) -> bytes:
+    """
+    Encode response body. JSON bodies are serialized, any other body must be text.
+
+    Args:
+        body (Any): Response body.
+        media_type (str): Media type of response body.
+
+    Returns:
+        bytes: Encoded response body.
+    """
+    if body is None:
+        return b""
+    if is_json(media_type):
+        return json.dumps(body, separators = (",", ":")).encode()
+    return str(body).encode()
+
+
+def start_message(status_code: int, headers: List[Tuple[bytes, bytes]], length: int) -> Dict[str, Any]:
+    """
+    Build ASGI response start message.
+
+    Args:
+        status_code (int): Response status code.
+        headers (List[Tuple[bytes, bytes]]): Response headers, without content length.
+        length (int): Content length.
+
+    Returns:
+        Dict[str, Any]: ASGI message.
+    """
+    return {
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [*headers, (b"content-length", str(length).encode())],
+    }
+
+
+class CompiledResponse:
+    """
+    Mock route response encoded once, when the mock app is built. Static responses are sent as
+    prebuilt ASGI messages; templated responses only fill their {name} placeholders in with the
+    path and query parameters of the request.
+    """
+
+    def __init__(
+            self, status_code: int = 200, body: Any = None, media_type: str = "application/json",
+            headers: Optional[Dict[str, str]] = None, template: bool = False
+            ):
+        self.json = is_json(media_type)
+        self.headers = [(b"content-type", media_type.encode("latin-1"))] if body is not None else []
+        self.headers.extend(
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in (headers or {}).items()
+        )
+        self.status_code = status_code
+
+        encoded = encode_body(body, media_type)
+        segments = PLACEHOLDER.split(encoded)
+        self.segments = [
+            segment.decode() if i % 2 else segment for i, segment in enumerate(segments)
+        ] if template and len(segments) > 1 else None
+
+        self.start = start_message(status_code, self.headers, len(encoded))
+        self.body = {"type": "http.response.body", "body": encoded}
+
+    def render(self, params: Dict[str, str]) -> bytes:
+        """
+        Fill placeholders of templated body in with request parameters. Values are escaped to
+        stay valid within JSON strings, and placeholders without a value are left empty.
+
+        Args:
+            params (Dict[str, str]): Request parameters.
+
+        Returns:
+            bytes: Response body.
+        """
+        parts = []
+        for i, segment in enumerate(self.segments):
+            if i % 2 == 0:
+                parts.append(segment)
+                continue
+            value = params.get(segment, "")
+            parts.append(json.dumps(value)[1:-1].encode() if self.json else value.encode())
+        return b"".join(parts)
+
+    async def send(self, send: Send, params: Optional[Dict[str, str]] = None):
+        """
+        Send response.
+
+        Args:
+            send (Send): ASGI send callable.
+            params (Optional[Dict[str, str]], optional): Request parameters, for templated
+                responses. Defaults to None.
+        """
+        if self.segments is None:
+            await send(self.start)
+            await send(self.body)
+            return
+        body = self.render(params or {})
+        await send(start_message(self.status_code, self.headers, len(body)))
+        await send({"type": "http.response.body", "body": body})
+
+
+class MockRoute:
+    """
+    Mock route: method, path, optional API key check and compiled response.
+    """
+
+    def __init__(self, route: Dict[str, Any]):
+        self.method = route.get("method", "GET").upper()
+        self.path = route["path"]
+        self.summary = route.get("summary")
+        self.tags = route.get("tags") or []
+        self.api_key = route.get("api_key")
+        self.api_key_header = route.get("api_key_header", "accessKey")
+        self.header = self.api_key_header.lower().encode("latin-1")
+        self.api_key_value = self.api_key.encode("latin-1") if self.api_key is not None else None
+        self.unauthorized = CompiledResponse(
+            status_code = 401,
+            body = {"detail": f"Missing or invalid {self.api_key_header} in request header."},
+        )
+
+        response = route.get("response") or {}
+        self.status_code = response.get("status_code", 200)
+        self.example = response.get("body")
+        self.media_type = response.get("media_type", "application/json")
+        self.response = CompiledResponse(
+            status_code = self.status_code,
+            body = self.example,
+            media_type = self.media_type,
+            headers = response.get("headers"),
+            template = response.get("template", False),
+        )
+
+        self.params = PATH_PARAMETER.findall(self.path)
+        self.pattern: Optional[Pattern] = None
+        if self.params:
+            regex = "".join(
+                f"(?P<{part}>[^/]+)" if i % 2 else re.escape(part)
+                for i, part in enumerate(PATH_PARAMETER.split(self.path))
+            )
+            self.pattern = re.compile(f"^{regex}$")
+
+    def authorized(self, scope: Scope) -> bool:
+        """
+        Whether request carries the API key of the route, if it has one.
+
+        Args:
+            scope (Scope): ASGI connection scope.
+
+        Returns:
+            bool: Whether request is authorized.
+        """
+        if self.api_key_value is None:
+            return True
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return value == self.api_key_value
+        return False
+
+    def operation(self) -> Dict[str, Any]:
+        """
+        OpenAPI operation of route.
+
+        Returns:
+            Dict[str, Any]: OpenAPI operation.
+        """
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", self.path).strip("_")
+        content = {self.media_type: {"example": self.example}} if self.example is not None else None
+        operation = {
+            "operationId": f"{self.method.lower()}_{slug}" if slug else self.method.lower(),
+            "responses": {
+                str(self.status_code): {
+                    "description": "Mock response",
+                    **({"content": content} if content else {}),
+                }
+            },
+        }
+        if self.summary:
+            operation["summary"] = self.summary
+        if self.tags:
+            operation["tags"] = list(self.tags)
+        if self.params:
+            operation["parameters"] = [
+                {"name": name, "in": "path", "required": True, "schema": {"type": "string"}}
+                for name in self.params
+            ]
+        if self.api_key is not None:
+            operation["security"] = [{self.api_key_header: []}]
+            operation["responses"]["401"] = {"description": "Missing or invalid API key"}
+        return operation
+
+
+NOT_FOUND = CompiledResponse(status_code = 404, body = {"detail": "Not Found"})
+METHOD_NOT_ALLOWED = CompiledResponse(status_code = 405, body = {"detail": "Method Not Allowed"})
+
+
+class MockApp:
+    """
+    Minimal ASGI app of a mock project, serving precompiled responses from an in-memory table of
+    routes. Requests go through no dependency resolution, validation or serialization.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.title = spec.get("title") or "Mock API"
+        self.routes = [MockRoute(route) for route in spec.get("routes", [])]
+        self.static: Dict[Tuple[str, str], MockRoute] = {}
+        self.static_paths = set()
+        self.dynamic: List[MockRoute] = []
+        for route in self.routes:
+            if route.pattern is None:
+                self.static[(route.method, route.path)] = route
+                self.static_paths.add(route.path)
+            else:
+                self.dynamic.append(route)
+        self._openapi: Optional[Dict[str, Any]] = None
+        self._openapi_response: Optional[CompiledResponse] = None
+
+    @classmethod
+    def from_json(cls, text: str) -> "MockApp":
+        """
+        Build mock app from JSON spec.
+
+        Args:
+            text (str): JSON spec.
+
+        Returns:
+            MockApp: Mock app.
+        """
+        return cls(json.loads(text))
+
+    def match(self, method: str, path: str) -> Tuple[Optional[MockRoute], Dict[str, str], bool]:
+        """
+        Find route of request.
+
+        Args:
+            method (str): Request method.
+            path (str): Request path.
+
+        Returns:
+            Tuple[Optional[MockRoute], Dict[str, str], bool]: Matching route, if any, its path
+                parameters, and whether any route matches the path with another method.
+        """
+        route = self.static.get((method, path))
+        if route is not None:
+            return route, {}, False
+        path_matched = path in self.static_paths
+        for route in self.dynamic:
+            match = route.pattern.match(path)
+            if match is None:
+                continue
+            if route.method == method:
+                return route, {name: unquote(value) for name, value in match.groupdict().items()}, False
+            path_matched = True
+        return None, {}, path_matched
+
+    def openapi(self) -> Dict[str, Any]:
+        """
+        OpenAPI schema generated from the spec.
+
+        Returns:
+            Dict[str, Any]: OpenAPI schema.
+        """
+        if self._openapi is None:
+            paths: Dict[str, Dict[str, Any]] = {}
+            schemes = {}
+            for route in self.routes:
+                paths.setdefault(route.path, {})[route.method.lower()] = route.operation()
+                if route.api_key is not None:
+                    schemes[route.api_key_header] = {
+                        "type": "apiKey", "in": "header", "name": route.api_key_header
+                    }
+            self._openapi = {
+                "openapi": "3.1.0",
+                "info": {"title": self.title, "version": "0.1.0"},
+                "paths": paths,
+            }
+            if schemes:
+                self._openapi["components"] = {"securitySchemes": schemes}
+        return self._openapi
+
+    async def docs(self, scope: Scope, send: Send):
+        """
+        Send Swagger UI page of the OpenAPI schema.
+
+        Args:
+            scope (Scope): ASGI connection scope.
+            send (Send): ASGI send callable.
+        """
+        from fastapi.openapi.docs import get_swagger_ui_html # pylint: disable=import-outside-toplevel
+
+        root_path = scope.get("root_path", "")
+        html = get_swagger_ui_html(openapi_url = f"{root_path}/openapi.json", title = f"{self.title} - Swagger UI")
+        await CompiledResponse(body = html.body.decode(), media_type = "text/html; charset=utf-8").send(send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            await send({"type": "websocket.close", "code": 1000})
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+        route, params, path_matched = self.match(method, path)
+        if route is None:
+            if method == "GET" and path == "/openapi.json":
+                if self._openapi_response is None:
+                    self._openapi_response = CompiledResponse(body = self.openapi())
+                await self._openapi_response.send(send)
+            elif method == "GET" and path == "/docs":
+                await self.docs(scope, send)
+            else:
+                await (METHOD_NOT_ALLOWED if path_matched else NOT_FOUND).send(send)
+            return
+
+        if not route.authorized(scope):
+            await route.unauthorized.send(send)
+            return
+        if route.response.segments is not None:
+            query = scope.get("query_string", b"")
+            if query:
+                params = {**dict(parse_qsl(query.decode("latin-1"))), **params}
+        await route.response.send(send, params)
+
+
+def mock_script(spec: str) -> bytes:
+    """
+    Generate the project app script of a mock project.
+
+    Args:
+        spec (str): JSON spec of mock project.
+
+    Returns:
+        bytes: Project app script.
+    """
+    return SCRIPT_TEMPLATE.format(spec = spec).encode()
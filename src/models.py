@@ -8,12 +8,15 @@ class Users(models.Model):
     id = fields.IntField(pk = True)
     username = fields.CharField(max_length = 20, unique = True)
     hashed_password = fields.CharField(max_length = 255)
+    rate_limit = fields.FloatField(null = True)
+    burst = fields.IntField(null = True)
+    max_in_flight = fields.IntField(null = True)
 
     class PydanticMeta:
         """
         Metadata for pydantic model.
         """
-        exclude = ["id", "hashed_password"]
+        exclude = ["id", "hashed_password", "rate_limit", "burst", "max_in_flight"]
 
 
 class Projects(models.Model):
@@ -23,15 +26,38 @@ class Projects(models.Model):
     id = fields.IntField(pk = True)
     name = fields.CharField(max_length = 50)
     owner = fields.ForeignKeyField(model_name = "models.Users", related_name = "projects")
+    revision = fields.IntField(default = 0)
+    checksum = fields.CharField(max_length = 64, null = True)
+    last_accessed = fields.DatetimeField(null = True)
+    rate_limit = fields.FloatField(null = True)
+    burst = fields.IntField(null = True)
+    max_in_flight = fields.IntField(null = True)
+    cache_ttl = fields.FloatField(null = True)
 
     class PydanticMeta:
         """
         Metadata for pydantic model.
         """
-        exclude = ["id"]
+        exclude = [
+            "id", "revision", "checksum", "last_accessed", "rate_limit", "burst", "max_in_flight",
+            "cache_ttl", "script",
+        ]
 
     class Meta:
         """
         Metadata for table.
         """
         unique_together = ("name", "owner")
+
+
+class Scripts(models.Model):
+    """
+    Project script db model, for projects whose scripts are stored in the database.
+    """
+    id = fields.IntField(pk = True)
+    project = fields.OneToOneField(
+        model_name = "models.Projects", related_name = "script", on_delete = fields.CASCADE
+    )
+    source = fields.BinaryField()
+    bytecode = fields.BinaryField()
+    schema = fields.TextField(null = True)
@@ -1,19 +1,108 @@
 import os
+import asyncio
+import base64
+import binascii
 import shutil
+import hashlib
+import tempfile
+import importlib.util
 
-from typing import Annotated
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Annotated, AsyncIterator, Dict, Hashable, Iterable, List, Optional, Tuple
 import aiofiles
+from pydantic import ValidationError
+from tortoise.exceptions import DoesNotExist
 from fastapi import UploadFile, Depends, HTTPException, status
 
-from src.schemas import User
+from src import storage
+from src.cleanup import cleaner
+from src.mock import mock_script
+from src.schemas import MockSpec, User
 from src.models import Projects
+from src.database import read_db
 from src.auth import get_current_user
+from src.validation import schema_file, validate_script
 
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(1024 * 1024)))
+
 users_dir = os.path.join(os.path.abspath(os.path.dirname(os.path.abspath(__file__))), "users")
 
 
-def create_project(username: str, project_name: str):
+class KeyedLocks:
+    """
+    asyncio locks keyed on user or project, dropped once no task holds or waits on them.
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, Tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        """
+        Hold lock of key.
+
+        Args:
+            key (Hashable): Lock key.
+        """
+        lock, holders = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, holders + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, holders = self._locks[key]
+            if holders == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, holders - 1)
+
+
+locks = KeyedLocks()
+
+
+def project_lock(username: str, project_name: str):
+    """
+    Lock serializing the creation, update and deletion of a project.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+    """
+    return locks.hold(("project", username, project_name))
+
+
+@asynccontextmanager
+async def projects_lock(username: str, project_names: Iterable[str]) -> AsyncIterator[None]:
+    """
+    Hold the locks of several projects, taken in name order so that concurrent callers never
+    deadlock.
+
+    Args:
+        username (str): Username of projects owner.
+        project_names (Iterable[str]): Names of projects.
+    """
+    async with AsyncExitStack() as stack:
+        for project_name in sorted(set(project_names)):
+            await stack.enter_async_context(project_lock(username, project_name))
+        yield
+
+
+def user_lock(username: str):
+    """
+    Lock serializing changes to the folder of a user, so that a new project folder is never created
+    in a user folder that is being deleted. Taken after any project lock.
+
+    Args:
+        username (str): Username.
+    """
+    return locks.hold(("user", username))
+
+
+def make_project_dir(username: str, project_name: str):
     """
     Create project folder and its init file.
 
@@ -39,24 +128,385 @@ def create_project(username: str, project_name: str):
             pass
 
 
-async def save_file(username: str, project_name: str, file: UploadFile):
+async def create_project(username: str, project_name: str):
+    """
+    Create project folder and its init file, off the event loop. Projects whose scripts are stored
+    in the database need no folder.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+    """
+    if storage.DATABASE_STORAGE:
+        return
+
+    async with user_lock(username):
+        await asyncio.to_thread(make_project_dir, username, project_name)
+
+
+def staging_file(username: str, project_name: str) -> str:
+    """
+    Create a uniquely named staging file in the project folder, or in the temporary directory
+    if scripts are stored in the database.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+
+    Returns:
+        str: Path of staging file.
+    """
+    project_dir = None if storage.DATABASE_STORAGE else os.path.join(users_dir, username, project_name)
+    fd, save_path = tempfile.mkstemp(dir = project_dir, prefix = "app.py.", suffix = ".upload")
+    os.close(fd)
+    return save_path
+
+
+def file_too_large(kind: str = "script") -> HTTPException:
+    """
+    Build exception for a project script or spec over the maximum upload size.
+
+    Args:
+        kind (str, optional): Kind of uploaded file. Defaults to "script".
+
+    Returns:
+        HTTPException: Exception with 413 status code.
+    """
+    return HTTPException(
+        status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail = f"Project {kind} exceeds the maximum size of {MAX_UPLOAD_SIZE} bytes."
+    )
+
+
+async def save_file(username: str, project_name: str, file: UploadFile) -> Tuple[str, str]:
     """
-    Save uploaded file to disk.
+    Stream uploaded file to a staging file in the project folder, pending validation.
 
     Args:
         username (str): Username of project owner.
         project_name (str): Name of project.
         file (UploadFile): Uploaded file.
+
+    Raises:
+        HTTPException: Raised when uploaded file exceeds the maximum upload size.
+
+    Returns:
+        Tuple[str, str]: Path of staging file and SHA-256 hex digest of its content.
     """
-    save_path = os.path.join(users_dir, username, project_name, "app.py")
+    if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+        raise file_too_large()
+
+    save_path = await asyncio.to_thread(staging_file, username, project_name)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(save_path, "wb") as f:
+            while content := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(content)
+                if size > MAX_UPLOAD_SIZE:
+                    raise file_too_large()
+                digest.update(content)
+                await f.write(content)
+    except BaseException:
+        await asyncio.to_thread(discard_file, save_path)
+        raise
+    return save_path, digest.hexdigest()
+
+
+async def save_content(username: str, project_name: str, content: bytes) -> Tuple[str, str]:
+    """
+    Save project script content to a staging file in the project folder, pending validation.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        content (bytes): Project script content.
+
+    Raises:
+        HTTPException: Raised when content exceeds the maximum upload size.
+
+    Returns:
+        Tuple[str, str]: Path of staging file and SHA-256 hex digest of its content.
+    """
+    if len(content) > MAX_UPLOAD_SIZE:
+        raise file_too_large()
+
+    save_path = await asyncio.to_thread(staging_file, username, project_name)
     async with aiofiles.open(save_path, "wb") as f:
-        while content := await file.read(1024):
-            await f.write(content)
+        await f.write(content)
+    return save_path, hashlib.sha256(content).hexdigest()
+
+
+async def read_file(username: str, project_name: str) -> bytes:
+    """
+    Read project app script.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+
+    Returns:
+        bytes: Project script content.
+    """
+    if storage.DATABASE_STORAGE:
+        return storage.scripts.get(username, project_name).source
+
+    save_path = os.path.join(users_dir, username, project_name, "app.py")
+    async with aiofiles.open(save_path, "rb") as f:
+        return await f.read()
+
+
+def backup_file(path: str):
+    """
+    Keep copy of file as {path}.previous, replacing any older copy.
+
+    Args:
+        path (str): Path of file.
+    """
+    backup_path = f"{path}.previous"
+    if os.path.isfile(backup_path):
+        os.remove(backup_path)
+    if os.path.isfile(path):
+        try:
+            os.link(path, backup_path)
+        except OSError:
+            shutil.copy2(path, backup_path)
+
+
+def commit_file(username: str, project_name: str, staged_path: str, cfile: str):
+    """
+    Replace project app script, its cached bytecode and its OpenAPI schema with a validated
+    staging file. The replaced project app script and schema are kept as app.py.previous and
+    openapi.json.previous, for rollback. Scripts stored in the database are replaced in the
+    script store instead, pending save to the database.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        staged_path (str): Path of staging file.
+        cfile (str): Path of compiled bytecode of staging file.
+    """
+    if storage.DATABASE_STORAGE:
+        storage.scripts.stage(username, project_name, staged_path, cfile, schema_file(staged_path))
+        return
+
+    save_path = os.path.join(users_dir, username, project_name, "app.py")
+    schema_path = os.path.join(users_dir, username, project_name, "openapi.json")
+    if os.path.isfile(save_path):
+        backup_file(save_path)
+        backup_file(schema_path)
+
+    cache_path = importlib.util.cache_from_source(save_path)
+    os.makedirs(os.path.dirname(cache_path), exist_ok = True)
+    os.replace(staged_path, save_path)
+    os.replace(cfile, cache_path)
+    if os.path.isfile(schema_file(staged_path)):
+        os.replace(schema_file(staged_path), schema_path)
+    elif os.path.isfile(schema_path):
+        os.remove(schema_path)
+
+
+def rollback_file(username: str, project_name: str) -> bool:
+    """
+    Restore project app script replaced by the last commit, and drop the bytecode of the replacement.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+
+    Returns:
+        bool: Whether there was a previous project app script to restore.
+    """
+    if storage.DATABASE_STORAGE:
+        return storage.scripts.rollback(username, project_name)
+
+    save_path = os.path.join(users_dir, username, project_name, "app.py")
+    backup_path = f"{save_path}.previous"
+    if not os.path.isfile(backup_path):
+        return False
+
+    cache_path = importlib.util.cache_from_source(save_path)
+    if os.path.isfile(cache_path):
+        os.remove(cache_path)
+    os.replace(backup_path, save_path)
+
+    schema_path = os.path.join(users_dir, username, project_name, "openapi.json")
+    if os.path.isfile(f"{schema_path}.previous"):
+        os.replace(f"{schema_path}.previous", schema_path)
+    elif os.path.isfile(schema_path):
+        os.remove(schema_path)
+    return True
+
+
+def discard_backup(username: str, project_name: str):
+    """
+    Remove project app script and schema replaced by the last commit.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+    """
+    if storage.DATABASE_STORAGE:
+        storage.scripts.discard_backup(username, project_name)
+        return
+
+    for filename in ("app.py.previous", "openapi.json.previous"):
+        backup_path = os.path.join(users_dir, username, project_name, filename)
+        if os.path.isfile(backup_path):
+            os.remove(backup_path)
+
+
+def discard_file(staged_path: str):
+    """
+    Remove staging file, its compiled bytecode and its OpenAPI schema.
+
+    Args:
+        staged_path (str): Path of staging file.
+    """
+    for path in (staged_path, f"{staged_path}c", schema_file(staged_path)):
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+async def read_spec(file: UploadFile) -> bytes:
+    """
+    Read uploaded mock project spec, and generate the project app script serving it.
+
+    Args:
+        file (UploadFile): Uploaded JSON spec.
+
+    Raises:
+        HTTPException: Raised when uploaded file exceeds the maximum upload size,
+            or is not a valid spec.
+
+    Returns:
+        bytes: Project app script.
+    """
+    content = await file.read(MAX_UPLOAD_SIZE + 1)
+    if len(content) > MAX_UPLOAD_SIZE:
+        raise file_too_large("spec")
+    try:
+        spec = MockSpec.model_validate_json(content)
+    except ValidationError as exc:
+        reasons = "; ".join(
+            f"{'.'.join(str(loc) for loc in error['loc']) or 'spec'}: {error['msg']}"
+            for error in exc.errors()
+        )
+        raise HTTPException(
+            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail = f"Invalid project spec. {reasons}"
+        ) from exc
+    return mock_script(spec.model_dump_json(exclude_defaults = True))
+
+
+async def upload_file(
+        username: str, project_name: str, file: UploadFile, checksum: Optional[str] = None
+        ) -> Optional[str]:
+    """
+    Save uploaded file, then replace project app script with it only if it passes validation.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        file (UploadFile): Uploaded file.
+        checksum (Optional[str], optional): SHA-256 hex digest of current project app script.
+            Defaults to None.
+
+    Raises:
+        HTTPException: Raised when uploaded file is not a valid project script.
+
+    Returns:
+        Optional[str]: SHA-256 hex digest of uploaded file, None if it is identical to
+            the current project app script, which is then left untouched.
+    """
+    staged_path, new_checksum = await save_file(
+        username = username,
+        project_name = project_name,
+        file = file,
+    )
+    return await commit_upload(username, project_name, staged_path, new_checksum, checksum)
+
+
+async def upload_project(
+        username: str, project_name: str, script: Optional[UploadFile] = None,
+        spec: Optional[UploadFile] = None, checksum: Optional[str] = None
+        ) -> Optional[str]:
+    """
+    Replace project app script with an uploaded script, or with the script generated from an
+    uploaded mock project spec, only if it passes validation.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        script (Optional[UploadFile], optional): Uploaded project script. Defaults to None.
+        spec (Optional[UploadFile], optional): Uploaded mock project spec. Defaults to None.
+        checksum (Optional[str], optional): SHA-256 hex digest of current project app script.
+            Defaults to None.
+
+    Raises:
+        HTTPException: Raised when neither or both of a script and a spec are uploaded,
+            or the upload is invalid.
+
+    Returns:
+        Optional[str]: SHA-256 hex digest of new project app script, None if it is identical
+            to the current project app script, which is then left untouched.
+    """
+    if (script is None) == (spec is None):
+        raise HTTPException(
+            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail = "Upload either a project script or a project spec."
+        )
+    if script is not None:
+        return await upload_file(username, project_name, script, checksum)
+
+    staged_path, new_checksum = await save_content(
+        username = username,
+        project_name = project_name,
+        content = await read_spec(spec),
+    )
+    return await commit_upload(username, project_name, staged_path, new_checksum, checksum)
+
+
+async def commit_upload(
+        username: str, project_name: str, staged_path: str, new_checksum: str,
+        checksum: Optional[str] = None
+        ) -> Optional[str]:
+    """
+    Replace project app script with staging file only if it passes validation.
+
+    Args:
+        username (str): Username of project owner.
+        project_name (str): Name of project.
+        staged_path (str): Path of staging file.
+        new_checksum (str): SHA-256 hex digest of staging file.
+        checksum (Optional[str], optional): SHA-256 hex digest of current project app script.
+            Defaults to None.
+
+    Raises:
+        HTTPException: Raised when staging file is not a valid project script.
+
+    Returns:
+        Optional[str]: SHA-256 hex digest of staging file, None if it is identical to
+            the current project app script, which is then left untouched.
+    """
+    if new_checksum == checksum:
+        await asyncio.to_thread(discard_file, staged_path)
+        return None
+
+    try:
+        cfile = await validate_script(staged_path)
+    except HTTPException:
+        await asyncio.to_thread(discard_file, staged_path)
+        raise
+
+    await asyncio.to_thread(commit_file, username, project_name, staged_path, cfile)
+    return new_checksum
 
 
 async def get_project(project_name: str, current_user: Annotated[User, Depends(get_current_user)]):
     """
-    Retrieve project based on project name and owner.
+    Retrieve project based on project name and owner, from the primary database,
+    as the project is about to be modified.
 
     Args:
         project_name (str): Name of project to retrieve.
@@ -77,28 +527,115 @@ async def get_project(project_name: str, current_user: Annotated[User, Depends(g
             status_code = status.HTTP_404_NOT_FOUND,
             detail = "Project does not exist."
         )
-    await project.fetch_related("owner")
+    project.owner = current_user
     return project
 
 
-def delete_project(username: str, project_name: str):
+async def reload_project(project: Projects):
+    """
+    Read project retrieved before taking its lock again from the primary database, so that it is
+    modified from its latest checksum, revision and settings, and check it was not deleted meanwhile.
+
+    Args:
+        project (Projects): Project.
+
+    Raises:
+        HTTPException: Raised when project no longer exists.
+    """
+    try:
+        await project.refresh_from_db()
+    except DoesNotExist as exc:
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Project does not exist."
+        ) from exc
+
+
+def encode_cursor(project_name: str) -> str:
     """
-    Delete project folder.
+    Build opaque pagination cursor pointing after project.
+
+    Args:
+        project_name (str): Name of last project of page.
+
+    Returns:
+        str: Pagination cursor.
+    """
+    return base64.urlsafe_b64encode(project_name.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Retrieve project name from pagination cursor.
+
+    Args:
+        cursor (str): Pagination cursor.
+
+    Raises:
+        HTTPException: Raised when cursor is not a valid pagination cursor.
+
+    Returns:
+        str: Name of last project of previous page.
+    """
+    try:
+        return base64.b64decode(cursor.encode(), altchars = b"-_", validate = True).decode()
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise HTTPException(
+            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail = "Invalid cursor."
+        ) from exc
+
+
+async def list_projects(
+        owner: User, limit: int, cursor: Optional[str] = None, prefix: Optional[str] = None
+        ) -> Tuple[List[Projects], Optional[str]]:
+    """
+    Retrieve page of projects of owner ordered by name, with their owner, in one query.
+
+    Args:
+        owner (User): Projects owner.
+        limit (int): Maximum number of projects in page.
+        cursor (Optional[str], optional): Pagination cursor of previous page. Defaults to None.
+        prefix (Optional[str], optional): Prefix of project names to filter on. Defaults to None.
+
+    Returns:
+        Tuple[List[Projects], Optional[str]]: Projects and pagination cursor of next page,
+            None if this is the last page.
+    """
+    query = Projects.filter(owner = owner).using_db(read_db())
+    if prefix:
+        query = query.filter(name__startswith = prefix)
+    if cursor is not None:
+        query = query.filter(name__gt = decode_cursor(cursor))
+
+    projects = await query.order_by("name").limit(limit + 1).select_related("owner")
+    if len(projects) <= limit:
+        return projects, None
+    projects = projects[:limit]
+    return projects, encode_cursor(projects[-1].name)
+
+
+async def delete_project(username: str, project_name: str):
+    """
+    Delete project folder in the background, and its script from the script store.
 
     Args:
         username (str): Username of project owner.
         project_name (str): Name of project to delete.
     """
-    project_dir = os.path.join(users_dir, username, project_name)
-    shutil.rmtree(path = project_dir, ignore_errors = True)
+    storage.scripts.remove(username, project_name)
+    async with user_lock(username):
+        await cleaner.delete(os.path.join(users_dir, username, project_name), users_dir)
 
 
-def delete_user(username: str):
+async def prune_user(username: str):
     """
-    Delete user folder.
+    Delete user folder in the background, if the user has no projects left.
 
     Args:
-        username (str): Name of folder to delete.
+        username (str): Username.
     """
-    user_dir = os.path.join(users_dir, username)
-    shutil.rmtree(path = user_dir, ignore_errors = True)
+    async with user_lock(username):
+        if await Projects.filter(owner__username = username).exists():
+            return
+        await cleaner.delete(os.path.join(users_dir, username), users_dir)
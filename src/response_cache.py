@@ -0,0 +1,347 @@
+import os
+import asyncio
+import hashlib
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.cache import TTLCache
+from src.models import Projects
+
+
+RESPONSE_CACHE_BUDGET = int(os.getenv("RESPONSE_CACHE_BUDGET", str(8 * 1024 * 1024)))
+
+CACHED_METHODS = {"GET", "HEAD", "POST"}
+# Methods answered with 304 when If-None-Match matches, other methods ignore the header.
+CONDITIONAL_METHODS = {"GET", "HEAD"}
+MAX_CACHED_REQUEST_SIZE = 64 * 1024
+# Request headers that do not change the response, left out of the cache key.
+IGNORED_HEADERS = {
+    b"connection", b"content-length", b"if-none-match", b"if-modified-since",
+    b"user-agent", b"x-request-id", b"traceparent",
+}
+UNCACHEABLE_DIRECTIVES = {"no-store", "no-cache", "private"}
+
+
+class CachedResponse(NamedTuple):
+    """
+    Complete response of a project app, with the ETag it is served with.
+    """
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: bytes
+
+
+def cache_key(scope: Scope, body: bytes) -> Tuple[str, str, bytes, str, str]:
+    """
+    Build cache key of request from its method, path, query string, headers and body.
+
+    Args:
+        scope (Scope): Request scope.
+        body (bytes): Request body.
+
+    Returns:
+        Tuple[str, str, bytes, str, str]: Cache key.
+    """
+    headers = hashlib.sha256()
+    for name, value in sorted(scope["headers"]):
+        if name not in IGNORED_HEADERS:
+            headers.update(name + b":" + value + b"\n")
+    return (
+        scope["method"],
+        scope["path"],
+        scope.get("query_string", b""),
+        headers.hexdigest(),
+        hashlib.sha256(body).hexdigest(),
+    )
+
+
+def cacheable(start: Message) -> bool:
+    """
+    Whether response can be cached, i.e. it is a 200 response that does not set cookies
+    or opt out of caching with Cache-Control.
+
+    Args:
+        start (Message): Response start message.
+
+    Returns:
+        bool: Whether response can be cached.
+    """
+    if start["status"] != 200:
+        return False
+    for name, value in start.get("headers", []):
+        name = name.lower()
+        if name == b"set-cookie":
+            return False
+        if name == b"cache-control":
+            directives = {
+                directive.strip().lower() for directive in value.decode("latin-1").split(",")
+            }
+            if directives & UNCACHEABLE_DIRECTIVES:
+                return False
+    return True
+
+
+def etag_matches(scope: Scope, etag: bytes) -> bool:
+    """
+    Whether If-None-Match header of request matches ETag.
+
+    Args:
+        scope (Scope): Request scope.
+        etag (bytes): ETag of cached response.
+
+    Returns:
+        bool: Whether request already has the cached response.
+    """
+    for name, value in scope["headers"]:
+        if name == b"if-none-match":
+            tags = {tag.strip().removeprefix(b"W/") for tag in value.split(b",")}
+            return b"*" in tags or etag in tags
+    return False
+
+
+class ResponseCache:
+    """
+    ASGI app wrapper that caches complete 200 responses of a project app in memory,
+    within a byte budget, and answers conditional requests with 304.
+
+    Identical requests that arrive while the response is being computed wait for it instead of
+    running the handler again. The cache lives as long as the wrapper, so a project app that is
+    swapped out or unmounted takes its cached responses with it.
+    """
+
+    def __init__(self, app: ASGIApp, ttl: float, budget: Optional[int] = None):
+        self.app = app
+        self.__wrapped__ = app
+        self.cache = TTLCache(
+            maxsize = RESPONSE_CACHE_BUDGET if budget is None else budget,
+            ttl = ttl,
+            weigher = lambda response: len(response.body)
+        )
+        self.coalesced = 0
+        self._pending: Dict[Tuple, asyncio.Future] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in CACHED_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        messages = []
+        size = 0
+        more_body = True
+        while more_body and size <= MAX_CACHED_REQUEST_SIZE:
+            message = await receive()
+            messages.append(message)
+            size += len(message.get("body", b""))
+            more_body = message.get("more_body", False)
+
+        async def replay() -> Message:
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        if more_body or size > MAX_CACHED_REQUEST_SIZE:
+            await self.app(scope, replay, send)
+            return
+
+        key = cache_key(scope, b"".join(message.get("body", b"") for message in messages))
+        response = self.cache.get(key)
+        if response is None and key in self._pending:
+            response = await asyncio.shield(self._pending[key])
+            self.coalesced += 1
+        if response is not None:
+            await self.respond(scope, send, response)
+            return
+
+        if key in self._pending:
+            await self.app(scope, replay, send)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            response = await self.fetch(scope, replay, send)
+            if response is not None:
+                self.cache.set(key, response)
+        finally:
+            del self._pending[key]
+            future.set_result(response)
+
+    async def fetch(self, scope: Scope, receive: Receive, send: Send) -> Optional[CachedResponse]:
+        """
+        Run project app, holding back a single message response until it is known to be cacheable.
+        Streamed responses are passed through as they are sent.
+
+        Args:
+            scope (Scope): Request scope.
+            receive (Receive): Request receive channel.
+            send (Send): Response send channel.
+
+        Returns:
+            Optional[CachedResponse]: Response if it was cacheable else None.
+        """
+        start = None
+        streaming = False
+        response = None
+
+        async def capture(message: Message):
+            nonlocal start, streaming, response
+            if streaming or message["type"] != "http.response.body":
+                if message["type"] == "http.response.start":
+                    start = message
+                else:
+                    await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not cacheable(start):
+                streaming = True
+                await send(start)
+                await send(message)
+                return
+
+            headers = [
+                (name, value) for name, value in start.get("headers", []) if name != b"etag"
+            ]
+            etag = dict(start.get("headers", [])).get(b"etag")
+            if etag is None:
+                etag = b'"' + hashlib.sha256(body).hexdigest()[:32].encode() + b'"'
+            response = CachedResponse(start["status"], headers + [(b"etag", etag)], body, etag)
+            await self.respond(scope, send, response)
+
+        await self.app(scope, receive, capture)
+        return response
+
+    async def respond(self, scope: Scope, send: Send, response: CachedResponse):
+        """
+        Send cached response, or 304 if a GET or HEAD request already has it.
+
+        Args:
+            scope (Scope): Request scope.
+            send (Send): Response send channel.
+            response (CachedResponse): Cached response.
+        """
+        if scope["method"] in CONDITIONAL_METHODS and etag_matches(scope, response.etag):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", response.etag)],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response.headers,
+        })
+        await send({"type": "http.response.body", "body": response.body})
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Response cache size and hit/miss counters.
+
+        Returns:
+            Dict[str, int]: Response cache statistics.
+        """
+        return {
+            **self.cache.stats(),
+            "bytes": self.cache.weight,
+            "coalesced": self.coalesced,
+        }
+
+
+def find_cache(app: Optional[ASGIApp]) -> Optional[ResponseCache]:
+    """
+    Retrieve response cache among the wrappers a project app was mounted with.
+
+    Args:
+        app (Optional[ASGIApp]): Mounted app.
+
+    Returns:
+        Optional[ResponseCache]: Response cache, None if responses of the app are not cached.
+    """
+    while app is not None and not isinstance(app, ResponseCache):
+        app = getattr(app, "__wrapped__", None)
+    return app
+
+
+class CacheSettings:
+    """
+    Response cache TTL of each project that opted in to response caching.
+    """
+
+    def __init__(self):
+        self.ttls: Dict[Tuple[str, str], float] = {}
+
+    def ttl(self, username: str, project_name: str) -> float:
+        """
+        Response cache TTL of project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+
+        Returns:
+            float: Seconds to cache responses, 0 if responses are not cached.
+        """
+        return self.ttls.get((username, project_name), 0.0)
+
+    def configure(self, username: str, project_name: str, ttl: Optional[float]) -> bool:
+        """
+        Set response cache TTL of project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+            ttl (Optional[float]): Seconds to cache responses, None or 0 to not cache them.
+
+        Returns:
+            bool: Whether the TTL changed.
+        """
+        key = (username, project_name)
+        previous = self.ttls.pop(key, 0.0)
+        if ttl:
+            self.ttls[key] = ttl
+        return (ttl or 0.0) != previous
+
+    def load(self, projects: Iterable[Projects]) -> List[Tuple[str, str]]:
+        """
+        Set response cache TTL of projects from their db records, and drop TTLs of projects
+        that no longer exist.
+
+        Args:
+            projects (Iterable[Projects]): Projects, with their owners fetched.
+
+        Returns:
+            List[Tuple[str, str]]: Username and project name of projects whose TTL changed.
+        """
+        changed = []
+        keys = set()
+        for project in projects:
+            key = (project.owner.username, project.name)
+            keys.add(key)
+            if self.configure(*key, project.cache_ttl):
+                changed.append(key)
+        for key in set(self.ttls) - keys:
+            del self.ttls[key]
+            changed.append(key)
+        return changed
+
+    def remove_project(self, username: str, project_name: str):
+        """
+        Drop response cache TTL of deleted project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        self.ttls.pop((username, project_name), None)
+
+    def clear(self):
+        """
+        Drop all response cache TTLs.
+        """
+        self.ttls.clear()
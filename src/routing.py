@@ -0,0 +1,192 @@
+import time
+import asyncio
+
+from typing import Dict, Iterator, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+# First path segments of the admin routes. They cannot be registered as usernames, and paths
+# starting with them are never dispatched to a project, so that a project cannot receive admin
+# requests, e.g. PUT /limits/{username}/{project_name} with the bearer token of its caller.
+RESERVED_PREFIXES = frozenset({
+    "auth", "limits", "metrics", "usage", "stalls", "catalog", "docs", "redoc", "openapi.json",
+})
+
+
+class TrackedApp:
+    """
+    ASGI app wrapper that tracks the number of in-flight requests of a mounted project app,
+    and when it was last used.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.__wrapped__ = app
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.in_flight += 1
+        self.last_used = time.monotonic()
+        self._idle.clear()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """
+        Wait for in-flight requests to finish.
+
+        Args:
+            timeout (float): Maximum time to wait, in seconds.
+
+        Returns:
+            bool: Whether all in-flight requests finished within the timeout.
+        """
+        if self.in_flight == 0:
+            return True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout = timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+def unwrap(app: Optional[ASGIApp]) -> Optional[ASGIApp]:
+    """
+    Retrieve project app from behind the wrappers it was mounted with, e.g. TrackedApp,
+    following their __wrapped__ attributes.
+
+    Args:
+        app (Optional[ASGIApp]): Mounted app.
+
+    Returns:
+        Optional[ASGIApp]: Project app.
+    """
+    while hasattr(app, "__wrapped__"):
+        app = app.__wrapped__
+    return app
+
+
+class MountTable:
+    """
+    Table of mounted project apps, keyed on (username, project name).
+    """
+
+    def __init__(self):
+        self._apps: Dict[Tuple[str, str], ASGIApp] = {}
+
+    def __len__(self) -> int:
+        return len(self._apps)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._apps
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return iter(list(self._apps))
+
+    def mount(self, username: str, project_name: str, app: ASGIApp) -> Optional[ASGIApp]:
+        """
+        Mount app at /{username}/{project_name}, atomically replacing any app already mounted there.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+            app (ASGIApp): Project app to mount.
+
+        Returns:
+            Optional[ASGIApp]: Replaced app if any else None.
+        """
+        key = (username, project_name)
+        previous = self._apps.get(key)
+        self._apps[key] = app
+        return previous
+
+    def unmount(self, username: str, project_name: str) -> Optional[ASGIApp]:
+        """
+        Unmount app at /{username}/{project_name}.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+
+        Returns:
+            Optional[ASGIApp]: Unmounted app if it was mounted else None.
+        """
+        return self._apps.pop((username, project_name), None)
+
+    def get(self, username: str, project_name: str) -> Optional[ASGIApp]:
+        """
+        Retrieve app mounted at /{username}/{project_name}.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+
+        Returns:
+            Optional[ASGIApp]: Mounted app if any else None.
+        """
+        return self._apps.get((username, project_name))
+
+    def clear(self):
+        """
+        Unmount all apps.
+        """
+        self._apps.clear()
+
+
+def split_path(path: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Split request path into username, project name and remaining path.
+
+    Only paths of the form /{username}/{project_name}/... are split, so that
+    /{username}/{project_name} itself is left to the admin routes.
+
+    Args:
+        path (str): Request path.
+
+    Returns:
+        Optional[Tuple[str, str, str]]: Username, project name and remaining path
+            if path targets a project else None.
+    """
+    parts = path.split("/", 3)
+    if len(parts) != 4 or parts[0] or not parts[1] or not parts[2]:
+        return None
+    return parts[1], parts[2], "/" + parts[3]
+
+
+class ProjectDispatcher:
+    """
+    ASGI middleware that dispatches project requests through a mount table lookup,
+    ahead of the linear route scan of the wrapped app. Paths under the reserved admin
+    prefixes are always left to the wrapped app.
+    """
+
+    def __init__(self, app: ASGIApp, table: MountTable):
+        self.app = app
+        self.table = table
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] in ("http", "websocket"):
+            parts = split_path(scope["path"])
+            if parts is not None and parts[0] not in RESERVED_PREFIXES:
+                username, project_name, remaining_path = parts
+                project_app = self.table.get(username, project_name)
+                if project_app is not None:
+                    root_path = scope.get("root_path", "")
+                    child_scope = dict(scope)
+                    child_scope.update({
+                        "app_root_path": scope.get("app_root_path", root_path),
+                        "root_path": f"{root_path}/{username}/{project_name}",
+                        "path": remaining_path,
+                    })
+                    await project_app(child_scope, receive, send)
+                    return
+
+        await self.app(scope, receive, send)
@@ -1,8 +1,10 @@
-from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
 from tortoise import Tortoise
 from tortoise.contrib.pydantic import pydantic_model_creator
 
 from src.models import Users, Projects
+from src.mock import PATH_PARAMETER, RESERVED_PATHS, is_json
 
 
 class Message(BaseModel):
@@ -20,6 +22,179 @@ class Token(BaseModel):
     token_type: str
 
 
+class BulkResult(BaseModel):
+    """
+    Bulk import result pydantic model.
+    """
+    name: str
+    created: bool
+    detail: Optional[str] = None
+
+
+class ProjectLoad(BaseModel):
+    """
+    Project load pydantic model.
+    """
+    username: str
+    project_name: str
+    load_time: float
+    healthy: bool
+    error: Optional[str] = None
+
+
+class LoadReport(BaseModel):
+    """
+    Project load report pydantic model.
+    """
+    total_time: float
+    projects: List[ProjectLoad]
+
+
+class ProjectUsage(BaseModel):
+    """
+    Project resource usage pydantic model. Import memory is only recorded when imports are traced.
+    Busy time is the sampled wall-clock time project code was on the stack of a thread, running or
+    blocked, not CPU time.
+    """
+    username: str
+    project_name: str
+    import_time: Optional[float] = None
+    import_memory: Optional[int] = None
+    busy_time: float
+
+
+class Stall(BaseModel):
+    """
+    Event loop stall pydantic model. Stalls are attributed to the project whose code was on the
+    stack of the loop thread, innermost frame last, if any.
+    """
+    started: float
+    duration: float
+    username: Optional[str] = None
+    project_name: Optional[str] = None
+    stack: List[str]
+
+
+class ProjectStalls(BaseModel):
+    """
+    Event loop stalls of project pydantic model.
+    """
+    username: str
+    project_name: str
+    stalls: int
+    stall_time: float
+    max_stall: float
+
+
+class StallReport(BaseModel):
+    """
+    Event loop lag and stalls report pydantic model.
+    """
+    threshold: float
+    lag: Dict[str, float]
+    projects: List[ProjectStalls]
+    stalls: List[Stall]
+
+
+class Limits(BaseModel):
+    """
+    Rate limit and concurrency cap pydantic model. Limits left unset fall back to the defaults,
+    and a limit of 0 is unlimited.
+    """
+    rate_limit: Optional[float] = Field(default = None, ge = 0)
+    burst: Optional[int] = Field(default = None, ge = 1)
+    max_in_flight: Optional[int] = Field(default = None, ge = 0)
+
+
+class LimitState(BaseModel):
+    """
+    Limit state pydantic model.
+    """
+    rate_limit: float
+    burst: int
+    max_in_flight: int
+    tokens: Optional[float] = None
+    in_flight: int
+    allowed: int
+    throttled: int
+
+
+class LimitsReport(BaseModel):
+    """
+    Limit states of user and its projects pydantic model.
+    """
+    user: LimitState
+    projects: Dict[str, LimitState]
+
+
+class MockResponse(BaseModel):
+    """
+    Mock response pydantic model. Bodies of templated responses may reference path and query
+    parameters as {name}.
+    """
+    status_code: int = Field(default = 200, ge = 100, le = 599)
+    body: Any = None
+    media_type: str = "application/json"
+    headers: Dict[str, str] = {}
+    template: bool = False
+
+    @model_validator(mode = "after")
+    def check_body(self) -> "MockResponse":
+        """
+        Check that body can be encoded, and that headers leave content type and length alone.
+        """
+        if self.body is not None and not is_json(self.media_type) and not isinstance(self.body, str):
+            raise ValueError("Body of a non-JSON response must be a string.")
+        if {name.lower() for name in self.headers} & {"content-type", "content-length"}:
+            raise ValueError("Content type and length headers are set from media type and body.")
+        return self
+
+
+class MockRoute(BaseModel):
+    """
+    Mock route pydantic model. Routes with an API key answer 401 to requests without it
+    in the API key header.
+    """
+    path: str = Field(pattern = r"^/[^?#]*$")
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    summary: Optional[str] = None
+    tags: List[str] = []
+    api_key: Optional[str] = None
+    api_key_header: str = Field(default = "accessKey", pattern = r"^[A-Za-z0-9-_]+$")
+    response: MockResponse = MockResponse()
+
+    @field_validator("path")
+    @classmethod
+    def check_path(cls, path: str) -> str:
+        """
+        Check that path does not shadow the generated docs, and names its parameters once.
+        """
+        if path in RESERVED_PATHS:
+            raise ValueError(f"{path} is reserved for the generated docs.")
+        params = PATH_PARAMETER.findall(path)
+        if len(params) != len(set(params)):
+            raise ValueError("Path parameters must have distinct names.")
+        return path
+
+
+class MockSpec(BaseModel):
+    """
+    Mock project spec pydantic model.
+    """
+    title: Optional[str] = None
+    routes: List[MockRoute] = Field(min_length = 1)
+
+    @model_validator(mode = "after")
+    def check_routes(self) -> "MockSpec":
+        """
+        Check that no two routes share a method and path.
+        """
+        routes = {(route.method, route.path) for route in self.routes}
+        if len(routes) != len(self.routes):
+            raise ValueError("Routes must have distinct methods and paths.")
+        return self
+
+
 Tortoise.init_models(["src.models"], "models")
 User = pydantic_model_creator(Users, name = "User")
 Project = pydantic_model_creator(Projects, name = "Project")
@@ -0,0 +1,368 @@
+import os
+import sys
+import json
+import _imp
+import marshal
+import importlib.abc
+import importlib.util
+
+from types import CodeType, ModuleType
+from importlib.machinery import ModuleSpec
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+from tortoise.transactions import in_transaction
+
+from src.models import Projects, Scripts
+
+
+SCRIPT_STORAGE = os.getenv("SCRIPT_STORAGE", "filesystem").lower()
+DATABASE_STORAGE = SCRIPT_STORAGE == "database"
+
+
+class Script(NamedTuple):
+    """
+    Project app script, its compiled bytecode in .pyc format and its OpenAPI schema, if any.
+    """
+    source: bytes
+    bytecode: bytes
+    schema: Optional[str] = None
+
+
+def read_staged(staged_path: str, cfile: str, schema_path: str) -> Script:
+    """
+    Read validated staging file, its compiled bytecode and its OpenAPI schema, then remove them.
+
+    Args:
+        staged_path (str): Path of staging file.
+        cfile (str): Path of compiled bytecode of staging file.
+        schema_path (str): Path of OpenAPI schema of staging file.
+
+    Returns:
+        Script: Project app script.
+    """
+    with open(staged_path, "rb") as f:
+        source = f.read()
+    with open(cfile, "rb") as f:
+        bytecode = f.read()
+    schema = None
+    if os.path.isfile(schema_path):
+        with open(schema_path, encoding = "utf-8") as f:
+            schema = f.read()
+    for path in (staged_path, cfile, schema_path):
+        if os.path.isfile(path):
+            os.remove(path)
+    return Script(source = source, bytecode = bytecode, schema = schema)
+
+
+class ScriptStore(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """
+    In-memory store of project app scripts, which doubles as the import finder and loader of the
+    {root}.users.{username}.{project_name}.app modules of the projects it holds, so that they are
+    imported straight from memory without touching the filesystem.
+    """
+
+    def __init__(self):
+        self.root = "src"
+        self.users_dir = ""
+        self.scripts: Dict[Tuple[str, str], Script] = {}
+        self.previous: Dict[Tuple[str, str], Optional[Script]] = {}
+        self.users: Dict[str, int] = {}
+
+    def install(self, root: str, users_dir: str):
+        """
+        Import project app modules under root from this store.
+
+        Args:
+            root (str): Root package of project app modules.
+            users_dir (str): Directory project scripts would live in, for the file names
+                reported in tracebacks.
+        """
+        self.root = root
+        self.users_dir = users_dir
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        """
+        Stop importing project app modules from this store, drop the modules it imported, whose
+        packages have no folder to import the scripts from later on, and drop all scripts.
+        """
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        for name, module in list(sys.modules.items()):
+            if getattr(getattr(module, "__spec__", None), "loader", None) is self:
+                del sys.modules[name]
+        self.scripts.clear()
+        self.previous.clear()
+        self.users.clear()
+
+    def get(self, username: str, project_name: str) -> Optional[Script]:
+        """
+        Retrieve project app script.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+
+        Returns:
+            Optional[Script]: Project app script, None if not in store.
+        """
+        return self.scripts.get((username, project_name))
+
+    def add(self, username: str, project_name: str, script: Script) -> Optional[Script]:
+        """
+        Add or replace project app script.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+            script (Script): Project app script.
+
+        Returns:
+            Optional[Script]: Replaced project app script, if any.
+        """
+        previous = self.scripts.get((username, project_name))
+        if previous is None:
+            self.users[username] = self.users.get(username, 0) + 1
+        self.scripts[(username, project_name)] = script
+        return previous
+
+    def remove(self, username: str, project_name: str):
+        """
+        Drop project app script.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        self.previous.pop((username, project_name), None)
+        if self.scripts.pop((username, project_name), None) is None:
+            return
+        self.users[username] -= 1
+        if self.users[username] == 0:
+            del self.users[username]
+
+    def stage(
+            self, username: str, project_name: str, staged_path: str, cfile: str, schema_path: str
+            ):
+        """
+        Replace project app script with a validated staging file, keeping the replaced script
+        for rollback.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+            staged_path (str): Path of staging file.
+            cfile (str): Path of compiled bytecode of staging file.
+            schema_path (str): Path of OpenAPI schema of staging file.
+        """
+        script = read_staged(staged_path, cfile, schema_path)
+        self.previous[(username, project_name)] = self.add(username, project_name, script)
+
+    def rollback(self, username: str, project_name: str) -> bool:
+        """
+        Restore project app script replaced by the last stage.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+
+        Returns:
+            bool: Whether there was a previous project app script to restore.
+        """
+        previous = self.previous.pop((username, project_name), None)
+        if previous is None:
+            return False
+        self.add(username, project_name, previous)
+        return True
+
+    def discard_backup(self, username: str, project_name: str):
+        """
+        Drop project app script replaced by the last stage.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        self.previous.pop((username, project_name), None)
+
+    def _split(self, fullname: str) -> Optional[Sequence[str]]:
+        prefix = f"{self.root}.users."
+        if not fullname.startswith(prefix):
+            return None
+        return fullname[len(prefix):].split(".")
+
+    def _origin(self, username: str, project_name: str) -> str:
+        return os.path.join(self.users_dir, username, project_name, "app.py")
+
+    def find_spec( # pylint: disable=unused-argument
+            self, fullname: str, path: Optional[Sequence[str]] = None,
+            target: Optional[ModuleType] = None
+            ) -> Optional[ModuleSpec]:
+        """
+        Find module spec of a project package or app module held in store.
+
+        Args:
+            fullname (str): Name of module, e.g. {root}.users.{username}.{project_name}.app.
+            path (Optional[Sequence[str]], optional): Search locations of parent package, unused.
+                Defaults to None.
+            target (Optional[ModuleType], optional): Module being reloaded, unused.
+                Defaults to None.
+
+        Returns:
+            Optional[ModuleSpec]: Module spec, None if module is not in store.
+        """
+        parts = self._split(fullname)
+        if parts is None or len(parts) > 3:
+            return None
+        if len(parts) == 1:
+            if parts[0] not in self.users:
+                return None
+            return ModuleSpec(fullname, self, is_package = True)
+        if (parts[0], parts[1]) not in self.scripts:
+            return None
+        if len(parts) == 2:
+            return ModuleSpec(fullname, self, is_package = True)
+        if parts[2] != "app":
+            return None
+        spec = ModuleSpec(fullname, self, origin = self._origin(parts[0], parts[1]))
+        spec.has_location = True
+        return spec
+
+    def create_module(self, spec: ModuleSpec) -> Optional[ModuleType]:
+        """
+        Leave module creation to the import system.
+
+        Args:
+            spec (ModuleSpec): Module spec.
+
+        Returns:
+            Optional[ModuleType]: None, for a default module.
+        """
+        return None
+
+    def exec_module(self, module: ModuleType):
+        """
+        Run code of project app module, leaving project packages empty.
+
+        Args:
+            module (ModuleType): Module to run.
+        """
+        if module.__spec__.submodule_search_locations is not None:
+            return
+        exec(self.get_code(module.__name__), module.__dict__) # pylint: disable=exec-used
+
+    def get_code(self, fullname: str) -> CodeType:
+        """
+        Code of project app module, from its compiled bytecode, or from its source if the bytecode
+        was compiled by another Python version.
+
+        Args:
+            fullname (str): Name of project app module.
+
+        Raises:
+            ImportError: Raised when project is not in store.
+
+        Returns:
+            CodeType: Module code.
+        """
+        parts = self._split(fullname)
+        script = None
+        if parts is not None and len(parts) == 3:
+            script = self.scripts.get(tuple(parts[:2]))
+        if script is None:
+            raise ImportError(f"No project script for {fullname}.", name = fullname)
+
+        origin = self._origin(parts[0], parts[1])
+        if script.bytecode[:4] == importlib.util.MAGIC_NUMBER:
+            code = marshal.loads(memoryview(script.bytecode)[16:])
+            _imp._fix_co_filename(code, origin) # pylint: disable=protected-access
+            return code
+        return compile(script.source, origin, "exec", dont_inherit = True)
+
+    def get_source(self, fullname: str) -> Optional[str]:
+        """
+        Source of project app module, for tracebacks.
+
+        Args:
+            fullname (str): Name of project app module.
+
+        Returns:
+            Optional[str]: Module source, None if project is not in store.
+        """
+        parts = self._split(fullname)
+        script = None
+        if parts is not None and len(parts) == 3:
+            script = self.scripts.get(tuple(parts[:2]))
+        if script is None:
+            return None
+        return importlib.util.decode_source(script.source)
+
+    def schema(self, username: str, project_name: str) -> Optional[dict]:
+        """
+        OpenAPI schema of project app.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+
+        Returns:
+            Optional[dict]: OpenAPI schema, None if project is not in store or has no schema.
+        """
+        script = self.scripts.get((username, project_name))
+        if script is None or script.schema is None:
+            return None
+        return json.loads(script.schema)
+
+
+scripts = ScriptStore()
+
+
+async def load_scripts(keys: Optional[Iterable[Tuple[str, str]]] = None):
+    """
+    Load project app scripts from the database into the store, in one query.
+
+    Args:
+        keys (Optional[Iterable[Tuple[str, str]]], optional): Username and project name of projects
+            to load. Defaults to None, i.e. all projects.
+    """
+    query = Scripts.all()
+    if keys is not None:
+        keys = set(keys)
+        if not keys:
+            return
+        query = query.filter(
+            project__owner__username__in = {username for username, _ in keys},
+            project__name__in = {project_name for _, project_name in keys},
+        )
+    rows = await query.values_list(
+        "project__owner__username", "project__name", "source", "bytecode", "schema"
+    )
+    for username, project_name, source, bytecode, schema in rows:
+        if keys is None or (username, project_name) in keys:
+            scripts.add(username, project_name, Script(source, bytecode, schema))
+
+
+async def save_scripts(username: str, project_names: Iterable[str]):
+    """
+    Store project app scripts held in the store in the database, replacing stored versions.
+
+    Args:
+        username (str): Username of projects owner.
+        project_names (Iterable[str]): Names of projects.
+    """
+    projects = await Projects.filter(owner__username = username, name__in = list(project_names))
+    rows = []
+    for project in projects:
+        script = scripts.get(username, project.name)
+        if script is not None:
+            rows.append(Scripts(
+                project_id = project.id,
+                source = script.source,
+                bytecode = script.bytecode,
+                schema = script.schema,
+            ))
+
+    async with in_transaction(Scripts._meta.default_connection): # pylint: disable=protected-access
+        await Scripts.filter(project_id__in = [project.id for project in projects]).delete()
+        await Scripts.bulk_create(rows)
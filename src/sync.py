@@ -0,0 +1,190 @@
+import os
+import asyncio
+import logging
+import tempfile
+
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError: # pragma: no cover
+    fcntl = None
+
+from src.models import Projects
+
+
+SYNC_FILE = os.getenv(
+    "SYNC_FILE", os.path.join(tempfile.gettempdir(), "dynamic-routing.generation")
+)
+SYNC_INTERVAL = float(os.getenv("SYNC_INTERVAL", "1"))
+
+logger = logging.getLogger(__name__)
+
+
+class MountSync:
+    """
+    Synchronizes the mount table of this worker with changes made by other workers.
+
+    Every change to a project bumps a generation counter kept in a file shared by all workers.
+    Workers poll the counter in the background and, when it changes, diff the versions of their
+    mounted projects against the Projects table to mount, reload or unmount only the affected
+    projects. A version is the project id and its revision, so that a project deleted and
+    recreated under the same name between two polls, whose revision starts over, is reloaded.
+    """
+
+    def __init__(self, path: str = SYNC_FILE, interval: float = SYNC_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.generation: Optional[int] = None
+        self.versions: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    def read_generation(self) -> int:
+        """
+        Read generation counter.
+
+        Returns:
+            int: Generation counter, 0 if it has never been bumped.
+        """
+        try:
+            with open(self.path, "r", encoding = "utf-8") as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump_generation(self) -> int:
+        """
+        Increment generation counter, under an exclusive lock across workers.
+
+        Returns:
+            int: Incremented generation counter.
+        """
+        with open(self.path, "a+", encoding = "utf-8") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                generation = int(f.read() or 0) + 1
+            except ValueError:
+                generation = 1
+            f.seek(0)
+            f.truncate()
+            f.write(str(generation))
+            f.flush()
+        return generation
+
+    async def notify(self) -> int:
+        """
+        Increment generation counter off the event loop, as taking the lock may block.
+
+        Returns:
+            int: Incremented generation counter.
+        """
+        return await asyncio.to_thread(self.bump_generation)
+
+    def track(self, username: str, project_name: str, project: Projects):
+        """
+        Record version of project mounted by this worker.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+            project (Projects): Project.
+        """
+        self.versions[(username, project_name)] = (project.id, project.revision)
+
+    async def publish(self, username: str, project_name: str, project: Optional[Projects]):
+        """
+        Record change made to project by this worker and notify the other workers.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+            project (Optional[Projects]): Project, None if project was deleted.
+        """
+        if project is None:
+            self.versions.pop((username, project_name), None)
+        else:
+            self.track(username, project_name, project)
+        await self.notify()
+
+    async def sync(
+            self,
+            mount: Callable[[str, str, bool], Awaitable[None]],
+            unmount: Callable[[str, str], Awaitable[None]],
+            refresh: Optional[Callable[[List[Projects]], None]] = None
+            ):
+        """
+        Apply changes made by other workers since the last sync, if the generation counter
+        has changed. A project is only recorded as synced once it mounted, and projects whose
+        script is not committed yet are left for a later sync.
+
+        Args:
+            mount (Callable[[str, str, bool], Awaitable[None]]): Mounts project given username,
+                project name and whether to reload its app module.
+            unmount (Callable[[str, str], Awaitable[None]]): Unmounts project given username
+                and project name.
+            refresh (Optional[Callable[[List[Projects]], None]], optional): Called with all
+                projects, with their owners fetched, to apply changes that do not bump revisions.
+                Defaults to None.
+        """
+        generation = await asyncio.to_thread(self.read_generation)
+        if generation == self.generation:
+            return
+
+        projects = await Projects.all().prefetch_related("owner")
+        latest = {}
+        pending = set()
+        for project in projects:
+            key = (project.owner.username, project.name)
+            if project.checksum is None:
+                # Still being created, its script is not validated and committed yet.
+                pending.add(key)
+            else:
+                latest[key] = (project.id, project.revision)
+        if refresh is not None:
+            refresh(projects)
+
+        for key in list(self.versions):
+            if key not in latest and key not in pending:
+                del self.versions[key]
+                await unmount(*key)
+
+        failed = bool(pending)
+        for key, version in latest.items():
+            current = self.versions.get(key)
+            if current == version:
+                continue
+            try:
+                await mount(*key, current is not None)
+            except Exception as exc: # pylint: disable=broad-exception-caught
+                logger.warning("Failed to sync project /%s/%s: %s", *key, exc)
+                failed = True
+                continue
+            self.versions[key] = version
+
+        # Projects still being created or that failed to mount are retried on the next sync.
+        self.generation = None if failed else generation
+
+    async def run(
+            self,
+            mount: Callable[[str, str, bool], Awaitable[None]],
+            unmount: Callable[[str, str], Awaitable[None]],
+            refresh: Optional[Callable[[List[Projects]], None]] = None
+            ):
+        """
+        Periodically apply changes made by other workers.
+
+        Args:
+            mount (Callable[[str, str, bool], Awaitable[None]]): Mounts project given username,
+                project name and whether to reload its app module.
+            unmount (Callable[[str, str], Awaitable[None]]): Unmounts project given username
+                and project name.
+            refresh (Optional[Callable[[List[Projects]], None]], optional): Called with all
+                projects on each sync. Defaults to None.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync(mount, unmount, refresh)
+            except Exception as exc: # pylint: disable=broad-exception-caught
+                logger.warning("Failed to sync mount table: %s", exc)
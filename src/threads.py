@@ -0,0 +1,237 @@
+import os
+import time
+import logging
+
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from anyio import CapacityLimiter, to_thread
+try:
+    from anyio._backends._asyncio import _default_thread_limiter # pylint: disable=protected-access
+except ImportError: # pragma: no cover
+    _default_thread_limiter = None
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+PROJECT_THREADS = int(os.getenv("PROJECT_THREADS", "8"))
+PROJECT_THREADS_TOTAL = int(os.getenv("PROJECT_THREADS_TOTAL", "40"))
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectThreads:
+    """
+    Worker thread tokens of a project, with counters of the sync calls that ran on them and the
+    time they spent queueing for a token.
+    """
+
+    def __init__(self, tokens: Optional[int] = None):
+        self.tokens = PROJECT_THREADS if tokens is None else tokens
+        self.limiter: Optional[CapacityLimiter] = None
+        self.waiting = 0
+        self.calls = 0
+        self.wait_time = 0.0
+
+    async def acquire(self, ceiling: CapacityLimiter):
+        """
+        Take a token of the project, then one of the global ceiling,
+        counting the time spent waiting.
+
+        Args:
+            ceiling (CapacityLimiter): Tokens shared by all projects.
+        """
+        if self.limiter is None:
+            self.limiter = CapacityLimiter(self.tokens)
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.limiter.acquire()
+            try:
+                await ceiling.acquire()
+            except BaseException:
+                self.limiter.release()
+                raise
+        finally:
+            self.waiting -= 1
+            self.wait_time += time.perf_counter() - start
+        self.calls += 1
+
+    def release(self, ceiling: CapacityLimiter):
+        """
+        Give back the tokens taken by acquire.
+
+        Args:
+            ceiling (CapacityLimiter): Tokens shared by all projects.
+        """
+        ceiling.release()
+        self.limiter.release()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Thread token statistics.
+
+        Returns:
+            Dict[str, float]: Tokens, tokens in use, calls waiting for a token, calls run
+                and seconds spent waiting for a token.
+        """
+        return {
+            "tokens": self.tokens,
+            "in_use": self.limiter.borrowed_tokens if self.limiter is not None else 0,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "wait_seconds": self.wait_time,
+        }
+
+
+current_threads: ContextVar[Optional[ProjectThreads]] = ContextVar(
+    "current_threads", default = None
+)
+
+
+class PartitionedLimiter:
+    """
+    Default thread limiter of the event loop, standing in for AnyIO's, which runs the sync calls of
+    project apps (i.e. sync endpoints, dependencies and iterators) on the tokens of their project
+    and of a ceiling shared by all projects, and any other sync call on AnyIO's own limiter.
+    """
+
+    def __init__(self, default: CapacityLimiter, total: Optional[int] = None):
+        self.default = default
+        self.ceiling = CapacityLimiter(PROJECT_THREADS_TOTAL if total is None else total)
+
+    @property
+    def total_tokens(self) -> float:
+        """
+        Tokens of AnyIO's own limiter, left to sync calls outside project apps.
+        """
+        return self.default.total_tokens
+
+    @total_tokens.setter
+    def total_tokens(self, value: float):
+        self.default.total_tokens = value
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.default, name)
+
+    async def __aenter__(self):
+        threads = current_threads.get()
+        if threads is None:
+            await self.default.acquire()
+        else:
+            await threads.acquire(self.ceiling)
+
+    async def __aexit__(self, *args: Any):
+        threads = current_threads.get()
+        if threads is None:
+            self.default.release()
+        else:
+            threads.release(self.ceiling)
+
+
+class ThreadPartitions:
+    """
+    Worker thread tokens of each project of this worker, created on first use.
+    """
+
+    def __init__(self):
+        self.projects: Dict[Tuple[str, str], ProjectThreads] = {}
+        self.limiter: Optional[PartitionedLimiter] = None
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether sync calls of project apps run on the tokens of their project.
+        """
+        return PROJECT_THREADS > 0
+
+    def install(self):
+        """
+        Replace the default thread limiter of the running event loop, so that sync calls of project
+        apps run on the tokens of their project.
+        """
+        if not self.enabled:
+            return
+        if _default_thread_limiter is None: # pragma: no cover
+            logger.warning("Thread partitioning is not supported by this AnyIO version.")
+            return
+        default = to_thread.current_default_thread_limiter()
+        if isinstance(default, PartitionedLimiter):
+            default = default.default
+        self.limiter = PartitionedLimiter(default)
+        _default_thread_limiter.set(self.limiter)
+
+    def project(self, username: str, project_name: str) -> ProjectThreads:
+        """
+        Retrieve thread tokens of project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+
+        Returns:
+            ProjectThreads: Project thread tokens.
+        """
+        key = (username, project_name)
+        threads = self.projects.get(key)
+        if threads is None:
+            threads = self.projects[key] = ProjectThreads()
+        return threads
+
+    def remove_project(self, username: str, project_name: str):
+        """
+        Drop thread tokens of deleted project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        self.projects.pop((username, project_name), None)
+
+    def clear(self):
+        """
+        Drop thread tokens of all projects, and stop partitioning.
+        """
+        self.projects.clear()
+        self.limiter = None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Thread token statistics of each project.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Statistics keyed on {username}/{project_name}.
+        """
+        return {
+            f"{username}/{project_name}": threads.stats()
+            for (username, project_name), threads in self.projects.items()
+        }
+
+    def ceiling_stats(self) -> Dict[str, float]:
+        """
+        Statistics of the thread token ceiling shared by all projects.
+
+        Returns:
+            Dict[str, float]: Tokens and tokens in use.
+        """
+        if self.limiter is None:
+            return {}
+        ceiling = self.limiter.ceiling
+        return {"tokens": ceiling.total_tokens, "in_use": ceiling.borrowed_tokens}
+
+
+class ThreadedApp:
+    """
+    ASGI app wrapper that runs the sync calls of a project app on the thread tokens of the project.
+    """
+
+    def __init__(self, app: ASGIApp, threads: ThreadPartitions, username: str, project_name: str):
+        self.app = app
+        self.__wrapped__ = app
+        self.threads = threads.project(username, project_name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        token = current_threads.set(self.threads)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_threads.reset(token)
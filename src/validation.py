@@ -0,0 +1,160 @@
+import os
+import sys
+import asyncio
+import py_compile
+
+from typing import Optional
+from fastapi import HTTPException, status
+
+
+VALIDATION_TIMEOUT = float(os.getenv("VALIDATION_TIMEOUT", "10"))
+VALIDATION_CPU_LIMIT = int(os.getenv("VALIDATION_CPU_LIMIT", "5"))
+VALIDATION_MEMORY_LIMIT = int(os.getenv("VALIDATION_MEMORY_LIMIT", "1024"))
+
+# The resource limits are applied by the subprocess itself, before it imports the project script,
+# rather than in a preexec_fn, which is unsafe to run in the threaded parent.
+CHECK_SCRIPT = """
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None
+if resource is not None:
+    cpu_limit, memory_limit = int(sys.argv[1]), int(sys.argv[2]) * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+import json
+import inspect
+from importlib.machinery import SourcelessFileLoader
+from importlib.util import module_from_spec, spec_from_loader
+
+loader = SourcelessFileLoader("app", sys.argv[3])
+module = module_from_spec(spec_from_loader("app", loader))
+loader.exec_module(module)
+
+app = getattr(module, "app", None)
+if app is None:
+    sys.exit("Project script does not define an app.")
+if not (inspect.iscoroutinefunction(app) or inspect.iscoroutinefunction(getattr(app, "__call__", None))):
+    sys.exit("Project app is not an ASGI app.")
+
+# Apps without an OpenAPI schema are valid, they are just left out of the catalog.
+if len(sys.argv) > 4 and callable(getattr(app, "openapi", None)):
+    try:
+        schema = app.openapi()
+    except Exception:
+        schema = None
+    if isinstance(schema, dict):
+        with open(sys.argv[4], "w", encoding = "utf-8") as f:
+            json.dump(schema, f)
+"""
+
+
+def invalid_script(detail: str) -> HTTPException:
+    """
+    Build exception for an invalid project script.
+
+    Args:
+        detail (str): Reason the project script is invalid.
+
+    Returns:
+        HTTPException: Exception with 422 status code.
+    """
+    return HTTPException(
+        status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail = f"Invalid project script. {detail}"
+    )
+
+
+async def compile_script(path: str) -> str:
+    """
+    Compile project script to bytecode, off the event loop.
+
+    Args:
+        path (str): Path of project script.
+
+    Raises:
+        HTTPException: Raised when project script has a syntax error.
+
+    Returns:
+        str: Path of compiled bytecode.
+    """
+    cfile = f"{path}c"
+    try:
+        await asyncio.to_thread(py_compile.compile, path, cfile = cfile, doraise = True)
+    except py_compile.PyCompileError as exc:
+        raise invalid_script(exc.msg.strip()) from exc
+    return cfile
+
+
+def schema_file(path: str) -> str:
+    """
+    Path of OpenAPI schema generated while validating project script.
+
+    Args:
+        path (str): Path of project script.
+
+    Returns:
+        str: Path of OpenAPI schema.
+    """
+    return f"{path}.openapi.json"
+
+
+async def check_script(cfile: str, schema_path: Optional[str] = None):
+    """
+    Test import compiled project script in a resource limited subprocess,
+    and check that it exposes an ASGI app.
+
+    Args:
+        cfile (str): Path of compiled bytecode of project script.
+        schema_path (Optional[str], optional): Path to write the OpenAPI schema of the app to,
+            if it has one. Defaults to None.
+
+    Raises:
+        HTTPException: Raised when project script fails to import, times out
+            or does not expose an ASGI app.
+    """
+    args = [str(VALIDATION_CPU_LIMIT), str(VALIDATION_MEMORY_LIMIT), cfile]
+    if schema_path is not None:
+        args.append(schema_path)
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", CHECK_SCRIPT, *args,
+        stdout = asyncio.subprocess.DEVNULL,
+        stderr = asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout = VALIDATION_TIMEOUT)
+    except asyncio.TimeoutError as exc:
+        process.kill()
+        await process.wait()
+        raise invalid_script(f"Import timed out after {VALIDATION_TIMEOUT}s.") from exc
+
+    if process.returncode < 0:
+        raise invalid_script(
+            f"Import killed by signal {-process.returncode}, resource limits exceeded."
+        )
+
+    if process.returncode != 0:
+        lines = stderr.decode(errors = "replace").strip().splitlines()
+        reason = lines[-1] if lines else f"Import exited with code {process.returncode}."
+        raise invalid_script(reason)
+
+
+async def validate_script(path: str) -> str:
+    """
+    Compile and test import project script, generating its OpenAPI schema next to it.
+
+    Args:
+        path (str): Path of project script.
+
+    Raises:
+        HTTPException: Raised when project script is invalid.
+
+    Returns:
+        str: Path of compiled bytecode.
+    """
+    cfile = await compile_script(path)
+    await check_script(cfile, schema_file(path))
+    return cfile
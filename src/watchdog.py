@@ -0,0 +1,242 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from src import projects as proj
+from src.accounting import project_of_frame
+from src.schemas import ProjectStalls, Stall, StallReport
+
+
+WATCHDOG_INTERVAL = float(os.getenv("WATCHDOG_INTERVAL", "0.05"))
+WATCHDOG_THRESHOLD = float(os.getenv("WATCHDOG_THRESHOLD", "0.1"))
+WATCHDOG_HISTORY = int(os.getenv("WATCHDOG_HISTORY", "100"))
+WATCHDOG_STACK_DEPTH = int(os.getenv("WATCHDOG_STACK_DEPTH", "20"))
+
+
+class StallRecord(NamedTuple):
+    """
+    Event loop stall: when it started, how long it lasted, the project whose code was blocking
+    the loop, if any, and the stack of the loop thread while it was blocked.
+    """
+    started: float
+    duration: float
+    project: Optional[Tuple[str, str]]
+    stack: List[str]
+
+
+class Watchdog:
+    """
+    Event loop lag monitor. A heartbeat task measures how late the loop wakes it up, and a monitor
+    thread captures the stack of the loop thread once a heartbeat is late by more than the stall
+    threshold, attributing the stall to the innermost project script on that stack.
+    """
+
+    def __init__(
+            self,
+            interval: Optional[float] = None,
+            threshold: Optional[float] = None,
+            history: Optional[int] = None,
+            ):
+        self.interval = WATCHDOG_INTERVAL if interval is None else interval
+        self.threshold = WATCHDOG_THRESHOLD if threshold is None else threshold
+        self.stalls: Deque[StallRecord] = deque(
+            maxlen = WATCHDOG_HISTORY if history is None else history
+        )
+        self.projects: Dict[Tuple[str, str], List[float]] = {}
+        self.beats = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.stall_count = 0
+        self.stall_time = 0.0
+        self._beat = 0
+        self._beat_time = time.perf_counter()
+        self._captured: Optional[Tuple[int, Optional[Tuple[str, str]], List[str]]] = None
+        self._lock = threading.Lock()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._monitor: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether the event loop is monitored.
+        """
+        return self.interval > 0 and self.threshold > 0
+
+    def capture(self):
+        """
+        Capture the stack of the loop thread, if the current heartbeat is late by more than
+        the stall threshold and its stall was not captured yet.
+        """
+        beat = self._beat
+        if time.perf_counter() - self._beat_time - self.interval < self.threshold:
+            return
+        if self._captured is not None and self._captured[0] == beat:
+            return
+        frame = sys._current_frames().get(self._loop_thread) # pylint: disable=protected-access
+        if frame is None:
+            return
+        project = project_of_frame(frame, os.path.join(os.path.abspath(proj.users_dir), ""))
+        stack = [
+            f"{summary.filename}:{summary.lineno} in {summary.name}"
+            for summary in traceback.extract_stack(frame, limit = WATCHDOG_STACK_DEPTH)
+        ]
+        with self._lock:
+            if beat == self._beat:
+                self._captured = (beat, project, stack)
+
+    def record(self, lag: float):
+        """
+        Record lag of the current heartbeat, and the stall it caused if over the threshold.
+
+        Args:
+            lag (float): Seconds the heartbeat was late.
+        """
+        with self._lock:
+            captured = None
+            if self._captured is not None and self._captured[0] == self._beat:
+                captured = self._captured
+            self._captured = None
+            self._beat += 1
+
+        self.beats += 1
+        self.last_lag = lag
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        if lag < self.threshold:
+            return
+
+        project, stack = (captured[1], captured[2]) if captured is not None else (None, [])
+        self.stalls.append(StallRecord(time.time() - lag, lag, project, stack))
+        self.stall_count += 1
+        self.stall_time += lag
+        if project is not None:
+            counts = self.projects.setdefault(project, [0, 0.0, 0.0])
+            counts[0] += 1
+            counts[1] += lag
+            counts[2] = max(counts[2], lag)
+
+    async def _heartbeat(self):
+        while True:
+            self._beat_time = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(time.perf_counter() - self._beat_time - self.interval, 0.0))
+
+    def _run_monitor(self):
+        while not self._stopped.wait(self.threshold / 2):
+            self.capture()
+
+    def start(self):
+        """
+        Start monitoring the running event loop, unless monitoring is disabled.
+        """
+        if not self.enabled or self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat_time = time.perf_counter()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._stopped.clear()
+        self._monitor = threading.Thread(
+            target = self._run_monitor, name = "watchdog-monitor", daemon = True
+        )
+        self._monitor.start()
+
+    def stop(self):
+        """
+        Stop monitoring the event loop.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._monitor is not None:
+            self._stopped.set()
+            self._monitor.join()
+            self._monitor = None
+
+    def remove_project(self, username: str, project_name: str):
+        """
+        Drop stall counts of project.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        self.projects.pop((username, project_name), None)
+
+    def clear(self):
+        """
+        Drop all lag measurements and stalls.
+        """
+        self.stalls.clear()
+        self.projects.clear()
+        self.beats = self.stall_count = 0
+        self.last_lag = self.max_lag = self.total_lag = self.stall_time = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Event loop lag statistics.
+
+        Returns:
+            Dict[str, float]: Heartbeats, last, maximum and total lag in seconds, and stalls over
+                the threshold and their total duration in seconds.
+        """
+        return {
+            "beats": self.beats,
+            "last_lag_seconds": self.last_lag,
+            "max_lag_seconds": self.max_lag,
+            "lag_seconds": self.total_lag,
+            "stalls": self.stall_count,
+            "stall_seconds": self.stall_time,
+        }
+
+    def report(self, limit: Optional[int] = None, username: Optional[str] = None) -> StallReport:
+        """
+        Rolling report of event loop stalls: lag statistics, stall counts of projects, most costly
+        first, and the most recent stalls, latest first.
+
+        Args:
+            limit (Optional[int], optional): Maximum number of projects and of stalls.
+                Defaults to None.
+            username (Optional[str], optional): Only report stalls attributed to projects of this
+                user. Defaults to None.
+
+        Returns:
+            StallReport: Stall report.
+        """
+        projects = [
+            ProjectStalls(
+                username = owner,
+                project_name = project_name,
+                stalls = int(count),
+                stall_time = total,
+                max_stall = longest,
+            )
+            for (owner, project_name), (count, total, longest) in self.projects.items()
+            if username is None or owner == username
+        ]
+        projects.sort(key = lambda stalls: stalls.stall_time, reverse = True)
+        stalls = [
+            Stall(
+                started = record.started,
+                duration = record.duration,
+                username = record.project[0] if record.project is not None else None,
+                project_name = record.project[1] if record.project is not None else None,
+                stack = record.stack,
+            )
+            for record in reversed(self.stalls)
+            if username is None or (record.project is not None and record.project[0] == username)
+        ]
+        return StallReport(
+            threshold = self.threshold,
+            lag = self.stats(),
+            projects = projects[:limit],
+            stalls = stalls[:limit],
+        )
@@ -0,0 +1,74 @@
+"""
+Worker process serving project apps over a Unix socket, for process isolated execution mode.
+
+Usage:
+    python -m src.worker --socket <socket path> --root <package root of project modules>
+        [--preload <username>/<project_name> ...]
+"""
+import sys
+import argparse
+from importlib import import_module
+
+import uvicorn
+from starlette.responses import PlainTextResponse
+from starlette.types import Receive, Scope, Send
+
+from src.loader import LazyApp
+from src.routing import MountTable, ProjectDispatcher, split_path
+
+
+class WorkerApp:
+    """
+    ASGI app that imports and serves any project app on its first request.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.table = MountTable()
+        self.dispatcher = ProjectDispatcher(
+            app = PlainTextResponse("Not Found", status_code = 404),
+            table = self.table
+        )
+
+    def preload(self, username: str, project_name: str):
+        """
+        Import and mount project app ahead of its first request.
+
+        Args:
+            username (str): Username of project owner.
+            project_name (str): Name of project.
+        """
+        module = import_module(f"{self.root}.users.{username}.{project_name}.app")
+        self.table.mount(username, project_name, module.app)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] in ("http", "websocket"):
+            parts = split_path(scope["path"])
+            if parts is not None:
+                username, project_name, _ = parts
+                if (username, project_name) not in self.table:
+                    self.table.mount(
+                        username,
+                        project_name,
+                        LazyApp(f"{self.root}.users.{username}.{project_name}.app")
+                    )
+        await self.dispatcher(scope, receive, send)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description = __doc__,
+        formatter_class = argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--socket", required = True)
+    parser.add_argument("--root", default = "src")
+    parser.add_argument("--preload", action = "append", default = [])
+    args = parser.parse_args()
+
+    worker_app = WorkerApp(args.root)
+    for project in args.preload:
+        try:
+            worker_app.preload(*project.split("/", 1))
+        except Exception as exc: # pylint: disable=broad-exception-caught
+            sys.exit(f"Failed to load project {project}: {type(exc).__name__}: {exc}")
+    uvicorn.run(worker_app, uds = args.socket, lifespan = "off", log_level = "warning")
@@ -0,0 +1,115 @@
+import os
+import shutil
+import threading
+
+from fastapi.testclient import TestClient
+
+from src import projects as proj
+from src.accounting import Accounting, project_of_module
+from src.eviction import purge_modules
+from src.main import app
+from tests.test_main import login_user
+
+
+PROJECT_SCRIPT = """import threading
+
+DATA = [object() for _ in range(10000)]
+
+
+def spin(started: threading.Event, stop: threading.Event):
+    started.set()
+    while not stop.is_set():
+        pass
+"""
+
+
+class TestAccounting:
+
+    def write_project(self, tmp_path, monkeypatch):
+        project_dir = tmp_path / "acct_root" / "users" / "user" / "project"
+        project_dir.mkdir(parents = True)
+        (project_dir / "app.py").write_text(PROJECT_SCRIPT)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr(proj, "users_dir", str(tmp_path / "acct_root" / "users"))
+
+    def test_project_of_module(self):
+        assert project_of_module("src.users.user.project.app") == ("user", "project")
+
+    def test_import_memory_traced(self, tmp_path, monkeypatch):
+        self.write_project(tmp_path, monkeypatch)
+        accounting = Accounting(trace_memory = True, sample_interval = 0)
+        try:
+            accounting.import_fresh("acct_root.users.user.project.app")
+        finally:
+            purge_modules("acct_root")
+
+        import_time, import_memory = accounting.imports[("user", "project")]
+        assert import_time > 0
+        assert import_memory > 10000 * 16
+
+    def test_sampled_time_attributed(self, tmp_path, monkeypatch):
+        self.write_project(tmp_path, monkeypatch)
+        accounting = Accounting(sample_interval = 0)
+        started = threading.Event()
+        stop = threading.Event()
+        try:
+            module = accounting.import_module("acct_root.users.user.project.app")
+            thread = threading.Thread(target = module.spin, args = (started, stop))
+            thread.start()
+            started.wait()
+            accounting.sample(0.5)
+            accounting.sample(0.25)
+        finally:
+            stop.set()
+            thread.join()
+            purge_modules("acct_root")
+
+        [usage] = accounting.report()
+        assert (usage.username, usage.project_name) == ("user", "project")
+        assert usage.busy_time == 0.75
+        assert usage.import_memory is None
+
+
+class TestUsageEndpoint:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_usage(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+
+            assert client.get("/usage", params = {"username": "test_user"}).status_code == 401
+            response = client.get("/usage", headers = headers, params = {"username": "test_user", "sort_by": "import_time"})
+            assert response.status_code == 200
+            [usage] = response.json()
+            assert usage["username"] == "test_user"
+            assert usage["project_name"] == "test_project"
+            assert usage["import_time"] > 0
+            assert usage["busy_time"] == 0
+            response = client.get("/usage", headers = headers, params = {"username": "test_user", "sort_by": "size"})
+            assert response.status_code == 422
+
+            other_token = login_user(client, {"username": "other_user", "password": "other_password"})
+            other_headers = {"Authorization": f"Bearer {other_token}"}
+            assert client.get("/usage", headers = other_headers, params = {"username": "other_user"}).json() == []
+            response = client.get("/usage", headers = other_headers, params = {"username": "test_user"})
+            assert response.status_code == 401
+
+            client.delete("/test_user/test_project", headers = headers)
+            assert client.get("/usage", headers = headers, params = {"username": "test_user"}).json() == []
@@ -0,0 +1,130 @@
+import io
+import os
+import shutil
+import zipfile
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from src import bulk
+from src import projects as proj
+from src.main import app
+from tests.test_main import login_user
+
+
+def build_archive(entries: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in entries.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+class TestReadArchive:
+
+    def test_entries_filtered(self, monkeypatch):
+        monkeypatch.setattr(proj, "MAX_UPLOAD_SIZE", 16)
+        archive = build_archive({
+            "first/": b"",
+            "first/app.py": b"app = None\n",
+            "first/helper.py": b"",
+            "not-valid/app.py": b"app = None\n",
+            "large/app.py": b"#" * 17,
+        })
+        scripts, rejected = bulk.read_archive(UploadFile(io.BytesIO(archive)))
+        assert scripts == {"first": b"app = None\n"}
+        assert list(rejected) == ["not-valid", "large"]
+
+    def test_too_many_projects(self, monkeypatch):
+        monkeypatch.setattr(bulk, "BULK_MAX_PROJECTS", 1)
+        # Rejected before any entry is decompressed.
+        monkeypatch.setattr(zipfile.ZipFile, "read", None)
+        archive = build_archive({"first/app.py": b"", "second/app.py": b""})
+        with pytest.raises(HTTPException) as exc_info:
+            bulk.read_archive(UploadFile(io.BytesIO(archive)))
+        assert exc_info.value.status_code == 413
+
+
+class TestBulkAPI:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        with open(os.path.join(tests_dir, "scripts", "demo_app.py"), "rb") as f:
+            self.script = f.read()
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_import_and_export(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(os.path.join("tests", "scripts", "demo_app.py"), "rb") as f:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "existing"},
+                files = {"project_script": f},
+            )
+
+            archive = build_archive({
+                "first/app.py": self.script,
+                "second/app.py": self.script,
+                "existing/app.py": self.script,
+                "broken/app.py": b"def index(:\n",
+                # Passes validation, which imports the script as "app", but fails to load in-process.
+                "unloadable/app.py": b'if __name__ != "app":\n    raise RuntimeError("load failed")\n' + self.script,
+                "bad-name/app.py": self.script,
+                "first/README.md": b"ignored",
+            })
+            response = client.post(
+                "/test_user/bulk",
+                headers = headers,
+                files = {"archive": ("projects.zip", archive)},
+            )
+            assert response.status_code == 200
+            results = {result["name"]: result for result in response.json()}
+            assert sorted(results) == ["bad-name", "broken", "existing", "first", "second", "unloadable"]
+            assert results["first"] == {"name": "first", "created": True, "detail": None}
+            assert results["second"]["created"]
+            assert not results["existing"]["created"]
+            assert results["existing"]["detail"] == "Project already exists."
+            assert not results["broken"]["created"]
+            assert "SyntaxError" in results["broken"]["detail"]
+            assert not results["bad-name"]["created"]
+            assert not os.path.isdir(os.path.join(self.users_dir, "test_user", "broken"))
+            assert results["unloadable"] == {
+                "name": "unloadable",
+                "created": False,
+                "detail": "Invalid project script. RuntimeError: load failed",
+            }
+            assert not os.path.isdir(os.path.join(self.users_dir, "test_user", "unloadable"))
+
+            for project_name in ("first", "second"):
+                response = client.get(f"/test_user/{project_name}/")
+                assert response.status_code == 200
+                assert response.json() == "index!"
+
+            response = client.get("/test_user", headers = headers)
+            assert sorted(project["name"] for project in response.json()) == ["existing", "first", "second"]
+
+            response = client.get("/test_user/export", headers = headers)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/zip"
+            with zipfile.ZipFile(io.BytesIO(response.content)) as exported:
+                assert exported.namelist() == ["existing/app.py", "first/app.py", "second/app.py"]
+                assert exported.read("first/app.py") == self.script
+
+    def test_import_invalid_archive(self):
+        with TestClient(app) as client:
+            access_token = login_user(client)
+            response = client.post(
+                "/test_user/bulk",
+                headers = {"Authorization": f"Bearer {access_token}"},
+                files = {"archive": ("projects.zip", b"not a zip")},
+            )
+            assert response.status_code == 422
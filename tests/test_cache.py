@@ -0,0 +1,110 @@
+from fastapi.testclient import TestClient
+
+from src.cache import TTLCache
+from src.models import Users
+from src.main import app
+from src.auth import token_cache, pwd_context
+from tests.test_main import login_user
+
+
+class FakeTimer:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize = 2, ttl = 10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1}
+
+    def test_expiry_capped(self):
+        timer = FakeTimer()
+        cache = TTLCache(maxsize = 10, ttl = 10, timer = timer)
+        cache.set("a", 1)
+        cache.set("b", 2, expires_at = 5)
+        timer.now = 6
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        timer.now = 11
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_weighted_eviction(self):
+        cache = TTLCache(maxsize = 5, ttl = 10, weigher = len)
+        cache.set("a", "aa")
+        cache.set("b", "bbb")
+        assert cache.weight == 5
+        cache.set("c", "c")
+        assert cache.get("a") is None
+        assert cache.weight == 4
+        cache.set("d", "dddddd")
+        assert cache.get("d") is None
+        assert cache.get("b") == "bbb"
+
+    def test_discard_where(self):
+        cache = TTLCache(maxsize = 10, ttl = 10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.discard_where(lambda value: value == 1) == 1
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+
+async def change_password(username: str, password: str):
+    user = await Users.get(username = username)
+    user.hashed_password = pwd_context.hash(password)
+    await user.save()
+
+
+async def delete_user(username: str):
+    await (await Users.get(username = username)).delete()
+
+
+class TestTokenCache:
+
+    def test_cached_user_lookup(self):
+        with TestClient(app) as client:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+
+            hits = token_cache.hits
+            assert client.get("/test_user", headers = headers).status_code == 200
+            assert client.get("/test_user", headers = headers).status_code == 200
+            assert token_cache.hits == hits + 1
+
+            response = client.get("/test_user_insufficient_permissions", headers = headers)
+            assert response.status_code == 401
+            assert response.json() == {"detail": "Insufficient permissions."}
+
+    def test_invalidate_on_password_change(self):
+        with TestClient(app) as client:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.get("/test_user", headers = headers)
+            assert token_cache.get(access_token) is not None
+
+            client.portal.call(change_password, "test_user", "new_password")
+            assert token_cache.get(access_token) is None
+
+    def test_invalidate_on_user_deletion(self):
+        with TestClient(app) as client:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.get("/test_user", headers = headers)
+
+            client.portal.call(delete_user, "test_user")
+            response = client.get("/test_user", headers = headers)
+            assert response.status_code == 401
+            assert response.json() == {"detail": "Invalid credentials."}
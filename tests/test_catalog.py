@@ -0,0 +1,159 @@
+import os
+import shutil
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src import catalog
+from src import projects as proj
+from src.catalog import Catalog, build_fragment, load_fragment
+from src.main import app
+from tests.test_main import login_user
+
+
+UPDATED_SCRIPT = b"""from fastapi import FastAPI
+from pydantic import BaseModel
+
+
+app = FastAPI()
+
+
+class Item(BaseModel):
+    name: str
+
+
+@app.post("/items")
+def create_item(item: Item) -> Item:
+    return item
+"""
+
+
+class TestBuildFragment:
+
+    def test_prefixes_paths_and_components(self):
+        schema = {
+            "paths": {
+                "/items": {
+                    "post": {
+                        "operationId": "create_item",
+                        "security": [{"OAuth2": []}],
+                        "requestBody": {"$ref": "#/components/schemas/Item"},
+                    },
+                    "parameters": [],
+                },
+            },
+            "components": {"schemas": {"Item": {"type": "object"}}, "securitySchemes": {"OAuth2": {}}},
+        }
+        fragment = build_fragment("user", "project", schema)
+        operation = fragment["paths"]["/user/project/items"]["post"]
+        assert operation["operationId"] == "user.project.create_item"
+        assert operation["tags"] == ["user/project"]
+        assert operation["security"] == [{"user.project.OAuth2": []}]
+        assert operation["requestBody"] == {"$ref": "#/components/schemas/user.project.Item"}
+        assert fragment["components"] == {
+            "schemas": {"user.project.Item": {"type": "object"}},
+            "securitySchemes": {"user.project.OAuth2": {}},
+        }
+
+    def test_load_fragment(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(proj, "users_dir", str(tmp_path))
+        project_dir = tmp_path / "user" / "project"
+        project_dir.mkdir(parents = True)
+
+        # Schemas of apps loaded before schemas were stored are generated from the app, and stored.
+        assert load_fragment("user", "project", None) is None
+        fragment = load_fragment("user", "project", FastAPI())
+        assert fragment == {"paths": {}, "components": {}}
+        assert (project_dir / "openapi.json").exists()
+
+        (project_dir / "openapi.json").write_text("{")
+        assert load_fragment("user", "project", FastAPI()) is None
+
+
+class TestRefresh:
+
+    def test_failed_projects_stay_stale(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(proj, "users_dir", str(tmp_path))
+        for project_name in ("broken", "project"):
+            (tmp_path / "user" / project_name).mkdir(parents = True)
+        broken_app = FastAPI()
+        broken_app.openapi = lambda: 1 / 0
+        apps = {("user", "broken"): broken_app, ("user", "project"): FastAPI()}
+
+        cat = Catalog()
+        cat.track("user", "broken")
+        cat.track("user", "project")
+        asyncio.run(cat.refresh(lambda *key: apps[key]))
+        assert list(cat.fragments) == [("user", "project")]
+        assert cat.stale == {("user", "broken")}
+
+        apps[("user", "broken")] = FastAPI()
+        asyncio.run(cat.refresh(lambda *key: apps[key]))
+        assert set(cat.fragments) == {("user", "broken"), ("user", "project")}
+        assert not cat.stale
+
+    def test_removed_during_refresh(self, monkeypatch):
+        cat = Catalog()
+
+        def remove_while_loading(username, project_name, project_app):
+            cat.remove(username, project_name)
+            return {"paths": {}, "components": {}}
+
+        monkeypatch.setattr(catalog, "load_fragment", remove_while_loading)
+        cat.track("user", "project")
+        asyncio.run(cat.refresh(lambda *key: None))
+        assert not cat.fragments
+        assert not cat.stale
+
+
+class TestCatalogEndpoint:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_catalog(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+            project_dir = os.path.join(self.users_dir, "test_user", "test_project")
+            assert os.path.exists(os.path.join(project_dir, "openapi.json"))
+
+            response = client.get("/catalog")
+            assert response.status_code == 200
+            assert list(response.json()["paths"]) == ["/test_user/test_project/"]
+            etag = response.headers["etag"]
+
+            response = client.get("/catalog", headers = {"If-None-Match": etag})
+            assert response.status_code == 304
+            assert client.get("/catalog", params = {"username": "other_user"}).json()["paths"] == {}
+            assert client.get("/catalog", params = {"prefix": "other"}).json()["paths"] == {}
+
+            client.put(
+                "/test_user/test_project",
+                headers = headers,
+                files = {"project_script": ("app.py", UPDATED_SCRIPT)},
+            )
+            response = client.get("/catalog", headers = {"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+            document = response.json()
+            assert list(document["paths"]) == ["/test_user/test_project/items"]
+            assert "test_user.test_project.Item" in document["components"]["schemas"]
+
+            client.delete("/test_user/test_project", headers = headers)
+            assert client.get("/catalog").json()["paths"] == {}
@@ -0,0 +1,133 @@
+import os
+import shutil
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.cleanup import Cleaner, TOMBSTONE_PREFIX, cleaner, find_tombstones
+from src.projects import KeyedLocks
+from tests.test_main import login_user
+
+
+class TestCleaner:
+
+    def test_delete(self, tmp_path):
+        users_dir = str(tmp_path)
+        project_dir = os.path.join(users_dir, "user", "project")
+        os.makedirs(project_dir)
+        with open(os.path.join(project_dir, "app.py"), "w") as f:
+            f.write("app = None\n")
+        # Left behind by a crash before it was removed.
+        os.makedirs(os.path.join(users_dir, f"{TOMBSTONE_PREFIX}old", "project"))
+
+        folder_cleaner = Cleaner()
+
+        async def run():
+            await folder_cleaner.start(users_dir)
+            await folder_cleaner.delete(project_dir, users_dir)
+            assert not os.path.exists(project_dir)
+            await folder_cleaner.delete(project_dir, users_dir)
+            await folder_cleaner.drain()
+            folder_cleaner.stop()
+
+        asyncio.run(run())
+        assert find_tombstones(users_dir) == []
+        assert os.listdir(users_dir) == ["user"]
+        assert folder_cleaner.stats() == {"queued": 0, "removed": 2, "failed": 0}
+
+    def test_delete_without_background_task(self, tmp_path):
+        project_dir = os.path.join(str(tmp_path), "user", "project")
+        os.makedirs(project_dir)
+        asyncio.run(Cleaner().delete(project_dir, str(tmp_path)))
+        assert os.listdir(str(tmp_path)) == ["user"]
+
+    def test_failed_removal_counted(self, tmp_path, monkeypatch):
+        users_dir = str(tmp_path / "users")
+        assert find_tombstones(users_dir) == []
+
+        def rmtree(path):
+            raise PermissionError(path)
+
+        folder_cleaner = Cleaner()
+
+        async def run():
+            await folder_cleaner.start(users_dir)
+            await folder_cleaner.start(users_dir)
+            await folder_cleaner.remove(str(tmp_path / "missing"))
+            monkeypatch.setattr(shutil, "rmtree", rmtree)
+            await folder_cleaner.remove(str(tmp_path))
+            folder_cleaner.stop()
+
+        asyncio.run(run())
+        assert folder_cleaner.stats() == {"queued": 0, "removed": 1, "failed": 1}
+
+
+class TestKeyedLocks:
+
+    def test_serializes_same_key(self):
+        locks = KeyedLocks()
+        events = []
+
+        async def hold(key, name):
+            async with locks.hold(key):
+                events.append(f"{name} start")
+                await asyncio.sleep(0.01)
+                events.append(f"{name} end")
+
+        async def run():
+            await asyncio.gather(hold("a", "first"), hold("a", "second"), hold("b", "other"))
+
+        asyncio.run(run())
+        assert events.index("first end") < events.index("second start")
+        assert events.index("other start") < events.index("first end")
+        assert locks._locks == {} # pylint: disable=protected-access
+
+
+class TestProjectCleanup:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_delete_and_recreate(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            script = f.read()
+            for project_name in ("test_project", "other_project"):
+                client.post(
+                    "/test_user",
+                    headers = headers,
+                    data = {"project_name": project_name},
+                    files = {"project_script": ("app.py", script)},
+                )
+
+            user_dir = os.path.join(self.users_dir, "test_user")
+            client.delete("/test_user/test_project", headers = headers)
+            assert not os.path.exists(os.path.join(user_dir, "test_project"))
+            assert os.path.isdir(os.path.join(user_dir, "other_project"))
+
+            response = client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": ("app.py", script)},
+            )
+            assert response.status_code == 200
+            assert client.get("/test_user/test_project/").json() == "index!"
+
+            for project_name in ("test_project", "other_project"):
+                client.delete(f"/test_user/{project_name}", headers = headers)
+            assert not os.path.exists(user_dir)
+
+            client.portal.call(cleaner.drain)
+            assert find_tombstones(self.users_dir) == []
+            assert "dynamic_routing_cleanup_removed" in client.get("/metrics").text
@@ -0,0 +1,147 @@
+import os
+import asyncio
+
+import pytest
+from tortoise import connections
+from fastapi.testclient import TestClient
+
+from src import main
+from src import database
+from src.main import app
+from src.database import PoolTimeout, TimedPool
+from tests.test_main import login_user
+
+
+class StandInPool:
+    """
+    Local stand-in for an asyncpg pool of max_size connections.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.free = asyncio.Queue()
+        for i in range(max_size):
+            self.free.put_nowait(i)
+
+    async def acquire(self) -> int:
+        return await self.free.get()
+
+    async def release(self, connection: int):
+        self.free.put_nowait(connection)
+
+    def get_min_size(self) -> int:
+        return 0
+
+    def get_max_size(self) -> int:
+        return self.max_size
+
+    def get_size(self) -> int:
+        return self.max_size
+
+    def get_idle_size(self) -> int:
+        return self.free.qsize()
+
+
+class TestTimedPool:
+
+    def test_acquire_timeout(self):
+        pool = TimedPool(StandInPool(max_size = 1), timeout = 0.05)
+
+        async def exhaust():
+            connection = await pool.acquire()
+            with pytest.raises(PoolTimeout):
+                await pool.acquire()
+            stats = pool.stats()
+            await pool.release(connection)
+            return stats
+
+        stats = asyncio.run(exhaust())
+        assert stats["in_use"] == 1
+        assert stats["idle"] == 0
+        assert stats["acquires"] == 1
+        assert stats["acquire_timeouts"] == 1
+        assert stats["acquire_wait_seconds"] >= 0.05
+        assert pool.stats()["in_use"] == 0
+
+    def test_client_pool_settings(self, monkeypatch):
+        monkeypatch.setattr(database, "DB_POOL_MAX_SIZE", 20)
+        monkeypatch.setattr(database, "DB_ACQUIRE_TIMEOUT", 2.5)
+        monkeypatch.setattr(database, "DB_STATEMENT_CACHE_SIZE", 0)
+        connection = database.postgres_connection("replica-host")
+        assert connection["credentials"]["host"] == "replica-host"
+
+        client = database.client_class(connection_name = "test", **connection["credentials"])
+        assert client.pool_maxsize == 20
+        assert client.acquire_timeout == 2.5
+        assert client.extra["statement_cache_size"] == 0
+        assert "acquire_timeout" not in client.extra
+
+        async def create_pool(self, **kwargs):
+            return StandInPool(max_size = kwargs["max_size"])
+
+        monkeypatch.setattr(database.AsyncpgDBClient, "create_pool", create_pool)
+        pool = asyncio.run(client.create_pool(max_size = client.pool_maxsize))
+        assert isinstance(pool, TimedPool)
+        assert pool.timeout == 2.5
+        assert pool.get_max_size() == 20
+
+
+class TestReadRouting:
+
+    def test_reads_routed_to_replica(self, tmp_path, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        # Primary and replica share a file backed database, standing in for replication.
+        db_url = f"sqlite://{tmp_path / 'db.sqlite3'}"
+        monkeypatch.setitem(main.config["connections"], "tests", db_url)
+        monkeypatch.setitem(main.config["connections"], "replica", db_url)
+        monkeypatch.setattr(database, "DB_READ_CONNECTION", "replica")
+
+        with TestClient(app) as client:
+            access_token = login_user(client)
+            queries = []
+            replica = connections.get("replica")
+            execute_query = replica.execute_query
+
+            async def count_query(query, values = None):
+                queries.append(query)
+                return await execute_query(query, values)
+
+            monkeypatch.setattr(replica, "execute_query", count_query)
+            response = client.get("/test_user/", headers = {"Authorization": f"Bearer {access_token}"})
+            assert response.status_code == 200
+            assert response.json() == []
+            assert any('"projects"' in query for query in queries)
+
+    def test_writes_read_from_primary(self, tmp_path, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        db_url = f"sqlite://{tmp_path / 'db.sqlite3'}"
+        monkeypatch.setitem(main.config["connections"], "tests", db_url)
+        monkeypatch.setitem(main.config["connections"], "replica", db_url)
+        monkeypatch.setattr(database, "DB_READ_CONNECTION", "replica")
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+
+        with TestClient(app) as client, open(os.path.join(tests_dir, "scripts", "demo_app.py"), "rb") as f:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            queries = []
+            replica = connections.get("replica")
+            execute_query = replica.execute_query
+
+            async def count_query(query, values = None):
+                queries.append(query)
+                return await execute_query(query, values)
+
+            monkeypatch.setattr(replica, "execute_query", count_query)
+            response = client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+            assert response.status_code == 200
+            response = client.put("/limits/test_user/test_project", headers = headers, json = {"rate_limit": 10})
+            assert response.status_code == 200
+            response = client.put("/test_user/test_project", headers = headers, data = {"cache_ttl": 5})
+            assert response.status_code == 200
+            response = client.delete("/test_user/test_project", headers = headers)
+            assert response.status_code == 200
+            # Projects about to be modified are never read from the replica, which may lag behind.
+            assert not any('"projects"' in query for query in queries)
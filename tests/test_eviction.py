@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import shutil
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src import loader
+from src import main
+from src.eviction import Evictor, purge_modules
+from src.routing import MountTable, TrackedApp, unwrap
+from src.main import app, mount_table
+from tests.test_main import login_user
+
+
+class TestPurgeModules:
+
+    def test_package_and_submodules_purged(self, tmp_path, monkeypatch):
+        package_dir = tmp_path / "evict_pkg" / "project"
+        package_dir.mkdir(parents = True)
+        (tmp_path / "evict_pkg" / "__init__.py").write_text("")
+        (package_dir / "__init__.py").write_text("")
+        (package_dir / "helper.py").write_text("VALUE = 1\n")
+        (package_dir / "app.py").write_text("from evict_pkg.project import helper\napp = helper.VALUE\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        __import__("evict_pkg.project.app")
+        assert purge_modules("evict_pkg.project") == 3
+        assert not [name for name in sys.modules if name.startswith("evict_pkg.project")]
+        assert not hasattr(sys.modules["evict_pkg"], "project")
+        purge_modules("evict_pkg")
+
+
+class TestEvictor:
+
+    def mount(self, table: MountTable, project_name: str, last_used: float) -> TrackedApp:
+        tracked = TrackedApp(FastAPI())
+        tracked.last_used = last_used
+        table.mount("user", project_name, tracked)
+        return tracked
+
+    def test_project_budget_evicts_least_recently_used(self):
+        now = time.monotonic()
+        table = MountTable()
+        self.mount(table, "old", now - 300)
+        self.mount(table, "older", now - 400).in_flight = 1
+        self.mount(table, "recent", now)
+        self.mount(table, "oldest", now - 500)
+        table.mount("user", "lazy", TrackedApp(loader.LazyApp("tests.scripts.demo_app")))
+
+        evictor = Evictor(max_projects = 2, idle_timeout = 60)
+        assert evictor.select(table) == [("user", "oldest"), ("user", "old")]
+        assert evictor.loaded == 4
+
+    def test_memory_budget_evicts_batch(self):
+        now = time.monotonic()
+        table = MountTable()
+        for i in range(3):
+            self.mount(table, f"project{i}", now - 100 - i)
+
+        assert Evictor(memory_budget = 100, memory = lambda: 50, idle_timeout = 0).select(table) == []
+        evictor = Evictor(memory_budget = 100, memory = lambda: 200, idle_timeout = 0, batch = 2)
+        assert evictor.select(table) == [("user", "project2"), ("user", "project1")]
+
+    def test_memory_budget_stops_when_memory_not_released(self):
+        now = time.monotonic()
+        table = MountTable()
+        for i in range(6):
+            self.mount(table, f"project{i}", now - 100 - i)
+        memory = [200]
+        evictor = Evictor(memory_budget = 100, memory = lambda: memory[0], idle_timeout = 0, batch = 1)
+
+        def evict(username, project_name):
+            table.unmount(username, project_name)
+
+        def evict_and_release(username, project_name):
+            evict(username, project_name)
+            memory[0] = 150
+
+        # Evictions that lower resident memory continue while over budget.
+        assert evictor.sweep(table, evict_and_release) == [("user", "project5")]
+        assert evictor.sweep(table, evict) == [("user", "project4")]
+        # Resident memory did not drop, so nothing more is evicted for memory...
+        assert evictor.sweep(table, evict) == []
+        memory[0] = 152
+        assert evictor.sweep(table, evict) == []
+        # ...until it grows by the hysteresis margin.
+        memory[0] = 160
+        assert evictor.sweep(table, evict) == [("user", "project3")]
+        memory[0] = 90
+        assert evictor.sweep(table, evict) == []
+        assert evictor.memory_mark is None
+
+
+class TestEvictionEndpoint:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_evicted_project_reimported(self, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        evictor = Evictor(max_projects = 1, idle_timeout = 0)
+        monkeypatch.setattr(main, "evictor", evictor)
+        module_name = "tests.users.test_user.test_project.app"
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            for project_name in ("test_project", "other_project"):
+                f.seek(0)
+                client.post(
+                    "/test_user",
+                    headers = headers,
+                    data = {"project_name": project_name},
+                    files = {"project_script": f},
+                )
+            client.get("/test_user/other_project/")
+
+            assert evictor.sweep(mount_table, main.evict_app) == [("test_user", "test_project")]
+            assert module_name not in sys.modules
+            assert not unwrap(mount_table.get("test_user", "test_project")).loaded
+
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 200
+            assert response.json() == "index!"
+            assert module_name in sys.modules
+
+            evictor.select(mount_table)
+            assert evictor.stats()["reloads"] == 1
+            assert "dynamic_routing_eviction_evictions 1" in client.get("/metrics").text
+
+            client.delete("/test_user/test_project", headers = headers)
+            assert module_name not in sys.modules
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.auth import pwd_context
+from src.hashing import PasswordHasher
+
+
+class TestPasswordHasher:
+
+    def test_hash_and_verify(self):
+        hasher = PasswordHasher(context = pwd_context, workers = 1, queue_limit = 1)
+
+        async def hash_and_verify():
+            hashed_password = await hasher.hash("password")
+            return (
+                await hasher.verify("password", hashed_password),
+                await hasher.verify("wrong_password", hashed_password),
+            )
+
+        assert asyncio.run(hash_and_verify()) == (True, False)
+        stats = hasher.stats()
+        assert stats["calls"] == 3
+        assert stats["pending"] == 0
+        assert stats["busy_seconds"] > 0
+
+    def test_shed_load_when_queue_full(self):
+        hasher = PasswordHasher(context = pwd_context, workers = 1, queue_limit = 0)
+        release = threading.Event()
+
+        async def overload():
+            blocked = asyncio.ensure_future(hasher.run(release.wait))
+            await asyncio.sleep(0)
+            try:
+                with pytest.raises(HTTPException) as exc_info:
+                    await hasher.hash("password")
+            finally:
+                release.set()
+                await blocked
+            return exc_info.value
+
+        exc = asyncio.run(overload())
+        assert exc.status_code == 503
+        assert exc.headers == {"Retry-After": "1"}
+        assert hasher.stats()["rejected"] == 1
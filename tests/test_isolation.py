@@ -0,0 +1,191 @@
+import os
+import time
+import shutil
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src import isolation
+from src.main import app
+from tests.test_main import login_user
+
+
+SLOW_SCRIPT = b"""import asyncio
+from fastapi import FastAPI
+
+
+app = FastAPI()
+
+
+@app.get("/")
+async def index():
+    await asyncio.sleep(0.5)
+    return "slow!"
+"""
+
+
+class TestIsolatedMode:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def setup_method(self):
+        self.headers = {}
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def create_project(self, client: TestClient, project_name: str = "test_project", script: bytes = None):
+        access_token = login_user(client)
+        self.headers = {"Authorization": f"Bearer {access_token}"}
+        if script is None:
+            with open(self.project_script, "rb") as f:
+                script = f.read()
+        response = client.post(
+            "/test_user/",
+            headers = self.headers,
+            data = {"project_name": project_name},
+            files = {"project_script": ("app.py", script)},
+        )
+        assert response.status_code == 200
+
+    def test_requests_served_by_worker(self, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        monkeypatch.setattr(isolation, "ISOLATED_MODE", True)
+        with TestClient(app) as client:
+            self.create_project(client)
+            pool = app.state.worker_pool
+
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 200
+            assert response.json() == "index!"
+
+            response = client.get("/test_user/test_project/openapi.json")
+            assert response.status_code == 200
+            assert response.json()["servers"] == [{"url": "/test_user/test_project"}]
+
+            group = pool.group("test_user", "test_project")
+            worker = pool.workers[group]
+            assert worker.alive
+            assert worker.process.pid != os.getpid()
+
+            worker.process.kill()
+            client.portal.call(worker.process.wait)
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 200
+            assert pool.workers[group] is not worker
+            previous = pool.workers[group]
+
+            response = client.put(
+                "/test_user/test_project",
+                headers = self.headers,
+                files = {"project_script": ("app.py", b"from fastapi import FastAPI\napp = FastAPI()\n")},
+            )
+            assert response.status_code == 200
+            assert pool.workers[group] is not previous
+
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 404
+
+    def test_failed_update_keeps_worker(self, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        monkeypatch.setattr(isolation, "ISOLATED_MODE", True)
+        with TestClient(app) as client:
+            self.create_project(client)
+            pool = app.state.worker_pool
+            group = pool.group("test_user", "test_project")
+
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 200
+            worker = pool.workers[group]
+
+            # Passes validation, which imports the script as "app", but fails to import in a worker.
+            script = b'if __name__ != "app":\n    raise RuntimeError\nfrom fastapi import FastAPI\napp = FastAPI()\n'
+            response = client.put(
+                "/test_user/test_project",
+                headers = self.headers,
+                files = {"project_script": ("app.py", script)},
+            )
+            assert response.status_code == 422
+            assert pool.workers[group] is worker
+
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 200
+            assert response.json() == "index!"
+
+    def test_reap_idle_workers(self, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        monkeypatch.setattr(isolation, "ISOLATED_MODE", True)
+        with TestClient(app) as client:
+            self.create_project(client)
+            pool = app.state.worker_pool
+
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 200
+            assert len(pool.workers) == 1
+
+            pool.idle_timeout = 0
+            client.portal.call(pool.reap_idle)
+            assert not pool.workers
+
+    def test_delete_keeps_shared_worker_serving(self, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        monkeypatch.setattr(isolation, "ISOLATED_MODE", True)
+        with TestClient(app) as client, ThreadPoolExecutor(max_workers = 1) as executor:
+            pool = app.state.worker_pool
+            pool.groups = 1
+            self.create_project(client)
+            self.create_project(client, "slow_project", SLOW_SCRIPT)
+
+            assert client.get("/test_user/test_project/").status_code == 200
+            worker = pool.workers["0"]
+            slow = executor.submit(client.get, "/test_user/slow_project/")
+            deadline = time.monotonic() + 5
+            while worker.in_flight == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            response = client.delete("/test_user/test_project", headers = self.headers)
+            assert response.status_code == 200
+            # The request of the other project sharing the worker is not cut off.
+            assert slow.result().json() == "slow!"
+            assert worker in pool.retiring or not worker.alive
+
+            response = client.get("/test_user/slow_project/")
+            assert response.json() == "slow!"
+            assert pool.workers["0"] is not worker
+
+    def test_behind_root_path(self, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        monkeypatch.setattr(isolation, "ISOLATED_MODE", True)
+        with TestClient(app, root_path = "/api") as client:
+            self.create_project(client)
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 200
+            assert response.json() == "index!"
+
+    def test_worker_unavailable(self, monkeypatch):
+        pool = isolation.WorkerPool(root = "tests", groups = 1)
+
+        async def spawn(group, preload = None):
+            raise RuntimeError(f"Worker {group} failed to start.")
+
+        monkeypatch.setattr(pool, "spawn", spawn)
+        client = TestClient(isolation.IsolatedApp(pool, "user", "project"))
+        response = client.get("/")
+        assert response.status_code == 502
+        assert response.text == "Project worker unavailable."
+
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect("/"):
+                pass
+        assert exc_info.value.code == 1011
+        shutil.rmtree(pool.socket_dir)
+
+    def test_project_groups(self):
+        pool = isolation.WorkerPool(root = "tests", groups = 2)
+        groups = {pool.group(f"user{i}", "project") for i in range(20)}
+        assert groups == {"0", "1"}
+        shutil.rmtree(pool.socket_dir)
@@ -0,0 +1,167 @@
+import os
+import shutil
+import asyncio
+
+import httpx
+from fastapi import FastAPI, Header
+from fastapi.testclient import TestClient
+
+from src.main import app, mount_table
+from src.limits import Limit, Limiter, LimitedApp
+from tests.test_cache import FakeTimer
+from tests.test_main import login_user
+
+
+class TestLimit:
+
+    def test_token_bucket(self):
+        timer = FakeTimer()
+        limit = Limit(rate_limit = 2, burst = 2, timer = timer)
+        for _ in range(2):
+            assert limit.retry_after() == 0
+            limit.acquire()
+            limit.release()
+        assert limit.retry_after() == 0.5
+
+        timer.now = 0.5
+        assert limit.retry_after() == 0
+        timer.now = 10
+        limit.retry_after()
+        assert limit.tokens == 2
+
+    def test_max_in_flight(self):
+        limit = Limit(max_in_flight = 1)
+        assert limit.retry_after() == 0
+        limit.acquire()
+        assert limit.retry_after() == 1
+        limit.release()
+        assert limit.retry_after() == 0
+
+    def test_reconfigure_keeps_in_flight(self):
+        limit = Limit(max_in_flight = 2)
+        limit.acquire()
+        limit.configure(rate_limit = 0, burst = None, max_in_flight = 1)
+        assert limit.in_flight == 1
+        assert limit.retry_after() == 1
+
+
+class TestLimitedApp:
+
+    def test_concurrency_cap(self):
+        project_app = FastAPI()
+
+        @project_app.get("/")
+        async def index():
+            await asyncio.sleep(0.05)
+            return "index!"
+
+        limiter = Limiter()
+        limiter.configure_project("user", "project", rate_limit = None, burst = None, max_in_flight = 2)
+        limited_app = LimitedApp(project_app, limiter, "user", "project")
+
+        async def run():
+            transport = httpx.ASGITransport(app = limited_app)
+            async with httpx.AsyncClient(transport = transport, base_url = "http://test") as client:
+                return await asyncio.gather(*[client.get("/") for _ in range(3)])
+
+        responses = asyncio.run(run())
+        assert sorted(response.status_code for response in responses) == [200, 200, 429]
+        rejected = [response for response in responses if response.status_code == 429][0]
+        assert rejected.headers["retry-after"] == "1"
+        assert rejected.json() == {"detail": "Too many requests."}
+
+        state = limiter.state("user")
+        assert state["projects"]["project"]["allowed"] == 2
+        assert state["projects"]["project"]["throttled"] == 1
+        assert state["projects"]["project"]["in_flight"] == 0
+
+
+class TestProjectLimits:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_rate_limit(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+
+            response = client.put(
+                "/limits/test_user/test_project",
+                headers = headers,
+                json = {"rate_limit": 0.01, "burst": 1},
+            )
+            assert response.status_code == 200
+            assert response.json()["rate_limit"] == 0.01
+
+            assert client.get("/test_user/test_project/").status_code == 200
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 429
+            assert int(response.headers["retry-after"]) > 1
+
+            response = client.get("/limits/test_user/", headers = headers)
+            assert response.json()["projects"]["test_project"]["throttled"] == 1
+
+            response = client.put("/limits/test_user/test_project", headers = headers, json = {})
+            assert response.json()["rate_limit"] == 0
+            assert client.get("/test_user/test_project/").status_code == 200
+
+    def test_user_limit(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            response = client.put(
+                "/limits/test_user/",
+                headers = headers,
+                json = {"max_in_flight": 4},
+            )
+            assert response.status_code == 200
+            assert response.json()["max_in_flight"] == 4
+
+            response = client.put(
+                "/limits/test_user/",
+                headers = headers,
+                json = {"max_in_flight": -1},
+            )
+            assert response.status_code == 422
+
+    def test_limits_not_dispatched_to_projects(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client:
+            response = client.post("/auth/register", data = {"username": "limits", "password": "password"})
+            assert response.status_code == 422
+
+            # A project mounted under the limits prefix, e.g. by a user registered before it was reserved.
+            captured = []
+            attacker_app = FastAPI()
+
+            @attacker_app.put("/{path:path}")
+            def capture(authorization: str = Header(default = "")):
+                captured.append(authorization)
+                return "captured"
+
+            mount_table.mount("limits", "test_user", attacker_app)
+            try:
+                access_token = login_user(client)
+                headers = {"Authorization": f"Bearer {access_token}"}
+                response = client.put("/limits/test_user/", headers = headers, json = {"max_in_flight": 4})
+                assert response.status_code == 200
+                assert response.json()["max_in_flight"] == 4
+                response = client.put("/limits/test_user/test_project", headers = headers, json = {})
+                assert response.status_code == 404
+            finally:
+                mount_table.unmount("limits", "test_user")
+            assert captured == []
@@ -0,0 +1,175 @@
+import os
+import time
+import sys
+import shutil
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src import loader
+from src.models import Projects
+from src.routing import MountTable, ProjectDispatcher
+from src.main import app, mount_table
+from tests.test_main import login_user
+
+
+async def get_project(project_name: str) -> Projects:
+    return await Projects.get(name = project_name)
+
+
+class TestLazyApp:
+
+    def test_load_on_first_request(self):
+        project_app = loader.LazyApp("tests.scripts.demo_app")
+        assert not project_app.loaded
+        assert project_app.last_accessed is None
+
+        table = MountTable()
+        table.mount("user", "project", project_app)
+        with TestClient(ProjectDispatcher(app = FastAPI(), table = table)) as client:
+            response = client.get("/user/project/")
+            assert response.status_code == 200
+            assert response.json() == "index!"
+
+        assert project_app.loaded
+        assert project_app.last_accessed is not None
+
+    def test_concurrent_loads_import_once(self, monkeypatch):
+        calls = []
+
+        def slow_import(module_name):
+            calls.append(module_name)
+            time.sleep(0.05)
+            return __import__("tests.scripts.demo_app", fromlist = ["app"])
+
+        monkeypatch.setattr(loader, "import_module", slow_import)
+        project_app = loader.LazyApp("tests.scripts.demo_app")
+
+        async def load_many():
+            return await asyncio.gather(*[project_app.load() for _ in range(10)])
+
+        apps = asyncio.run(load_many())
+        assert len(calls) == 1
+        assert all(a is apps[0] for a in apps)
+
+
+class TestLazyMount:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_last_accessed_and_warm_up(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            client.post(
+                "/test_user",
+                headers = {"Authorization": f"Bearer {access_token}"},
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+
+            project_app = loader.LazyApp("tests.users.test_user.test_project.app")
+            mount_table.mount("test_user", "test_project", project_app)
+
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 200
+            assert response.json() == "index!"
+            assert project_app.loaded
+            assert project_app.last_accessed is not None
+
+            client.portal.call(loader.save_last_accessed, mount_table)
+            project = client.portal.call(get_project, "test_project")
+            assert project.last_accessed is not None
+
+            cold_app = loader.LazyApp("tests.users.test_user.test_project.app")
+            mount_table.mount("test_user", "test_project", cold_app)
+            client.portal.call(loader.warm_up, mount_table, 10)
+            assert cold_app.loaded
+
+
+class TestLoadProjects:
+
+    def test_unhealthy_projects_skipped(self, tmp_path, monkeypatch):
+        (tmp_path / "loader_ok.py").write_text("from fastapi import FastAPI\napp = FastAPI()\n")
+        (tmp_path / "loader_broken.py").write_text("raise RuntimeError('broken')\n")
+        (tmp_path / "loader_slow.py").write_text("import time\ntime.sleep(1)\napp = None\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        modules = {
+            ("user", "ok"): "loader_ok",
+            ("user", "broken"): "loader_broken",
+            ("user", "slow"): "loader_slow",
+        }
+        project_apps, report = asyncio.run(loader.load_projects(modules, workers = 2, timeout = 0.2))
+
+        assert list(project_apps) == [("user", "ok")]
+        assert report.total_time < 1
+        loads = {load.project_name: load for load in report.projects}
+        assert loads["ok"].healthy
+        assert loads["ok"].error is None
+        assert not loads["broken"].healthy
+        assert loads["broken"].error == "RuntimeError: broken"
+        assert not loads["slow"].healthy
+        assert "timed out" in loads["slow"].error
+
+    def test_timed_out_import_keeps_slot(self, tmp_path, monkeypatch):
+        (tmp_path / "loader_hung.py").write_text("import time\ntime.sleep(0.3)\napp = None\n")
+        (tmp_path / "loader_next.py").write_text("from fastapi import FastAPI\napp = FastAPI()\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        async def run():
+            modules = {("user", "hung"): "loader_hung", ("user", "next"): "loader_next"}
+            result = await loader.load_projects(modules, workers = 1, timeout = 0.1)
+            # Leave the loop running until the hung import returns.
+            await asyncio.sleep(0.3)
+            return result
+
+        project_apps, report = asyncio.run(run())
+        assert not project_apps
+        loads = {load.project_name: load for load in report.projects}
+        assert loads["hung"].error == "Import timed out after 0.1s."
+        # The hung import thread still held the only slot at the deadline.
+        assert loads["next"].error == "Timed out after 0.1s waiting for an import slot."
+        assert report.total_time < 0.3
+        assert "loader_hung" not in sys.modules
+
+    def test_hung_imports_do_not_block_start_up(self, tmp_path, monkeypatch):
+        for name in ("loader_hung_a", "loader_hung_b"):
+            (tmp_path / f"{name}.py").write_text("import time\ntime.sleep(2)\napp = None\n")
+        (tmp_path / "loader_queued.py").write_text("from fastapi import FastAPI\napp = FastAPI()\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        modules = {
+            ("user", "hung_a"): "loader_hung_a",
+            ("user", "hung_b"): "loader_hung_b",
+            ("user", "queued"): "loader_queued",
+        }
+        project_apps, report = asyncio.run(loader.load_projects(modules, workers = 2, timeout = 0.3))
+        assert not project_apps
+        assert report.total_time < 1
+        loads = {load.project_name: load for load in report.projects}
+        assert loads["hung_a"].error == "Import timed out after 0.3s."
+        assert loads["queued"].error == "Timed out after 0.3s waiting for an import slot."
+
+    def test_result_after_loop_closed(self):
+        discarded = []
+
+        def slow():
+            time.sleep(0.1)
+            return "late"
+
+        async def start():
+            return loader.run_in_daemon_thread(slow, discard = discarded.append)
+
+        asyncio.run(start())
+        time.sleep(0.2)
+        assert discarded == ["late"]
@@ -274,4 +274,4 @@ class TestProjectsAPI:
                 headers = {"Authorization": f"Bearer {access_token}"},
             )
             assert response.status_code == 200
-            assert response.json() == []
\ No newline at end of file
+            assert response.json() == {"detail": "Project deleted."}
\ No newline at end of file
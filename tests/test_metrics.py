@@ -0,0 +1,73 @@
+import os
+import shutil
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.metrics import Histogram, format_labels
+from tests.test_main import login_user
+
+
+class TestHistogram:
+
+    def test_cumulative_buckets(self):
+        histogram = Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+        samples = histogram.samples((("project", "user/project"),))
+        assert samples == [
+            ("_bucket", (("project", "user/project"), ("le", "1")), 2),
+            ("_bucket", (("project", "user/project"), ("le", "5")), 3),
+            ("_bucket", (("project", "user/project"), ("le", "+Inf")), 4),
+            ("_sum", (("project", "user/project"),), 14.5),
+            ("_count", (("project", "user/project"),), 4),
+        ]
+
+    def test_format_labels(self):
+        assert format_labels(()) == ""
+        assert format_labels((("project", 'a"b\\c'),)) == '{project="a\\"b\\\\c"}'
+
+
+class TestMetricsEndpoint:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_project_and_admin_metrics(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+            client.get("/test_user/test_project/")
+            client.get("/test_user/test_project/missing")
+
+            response = client.get("/metrics")
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/plain")
+            text = response.text
+            assert 'dynamic_routing_project_requests_total{project="test_user/test_project",code="200"} 1' in text
+            assert 'dynamic_routing_project_requests_total{project="test_user/test_project",code="404"} 1' in text
+            assert 'dynamic_routing_project_request_duration_seconds_count{project="test_user/test_project"} 2' in text
+            assert 'dynamic_routing_project_requests_in_flight{project="test_user/test_project"} 0' in text
+            assert 'dynamic_routing_admin_requests_total{method="POST",endpoint="login",code="200"} 1' in text
+            assert 'dynamic_routing_admin_requests_total{method="POST",endpoint="create_project",code="200"} 1' in text
+            assert "dynamic_routing_mounted_projects 1" in text
+            assert "dynamic_routing_password_hasher_calls" in text
+
+            client.delete("/test_user/test_project", headers = headers)
+            text = client.get("/metrics").text
+            assert 'project="test_user/test_project"' not in text
+            assert "dynamic_routing_mounted_projects 0" in text
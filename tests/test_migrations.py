@@ -0,0 +1,74 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main
+from src.main import app
+from src.models import Users
+from src.migrations import column_definition
+from tests.test_main import login_user
+
+
+# Tables as created by the first release, before any column was added to the models.
+FIRST_RELEASE_SCHEMA = """
+CREATE TABLE "users" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "username" VARCHAR(20) NOT NULL UNIQUE,
+    "hashed_password" VARCHAR(255) NOT NULL
+);
+CREATE TABLE "projects" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "name" VARCHAR(50) NOT NULL,
+    "owner_id" INT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_projects_name_a1b2c3" UNIQUE ("name", "owner_id")
+);
+"""
+
+
+class TestMigrations:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_existing_tables_upgraded(self, tmp_path, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        db_path = tmp_path / "db.sqlite3"
+        with sqlite3.connect(db_path) as connection:
+            connection.executescript(FIRST_RELEASE_SCHEMA)
+        monkeypatch.setitem(main.config["connections"], "tests", f"sqlite://{db_path}")
+
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            response = client.post(
+                "/test_user",
+                headers = {"Authorization": f"Bearer {access_token}"},
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+            assert response.status_code == 200
+
+        with sqlite3.connect(db_path) as connection:
+            columns = {row[1] for row in connection.execute('PRAGMA table_info("projects")')}
+            revision, checksum = connection.execute('SELECT "revision", "checksum" FROM "projects"').fetchone()
+        assert {"revision", "checksum", "last_accessed", "max_in_flight", "cache_ttl"} <= columns
+        assert revision == 0
+        assert checksum is not None
+
+        # Up to date tables are left as they are on the next start up.
+        with TestClient(app) as client:
+            assert client.get("/test_user/test_project/").json() == "index!"
+
+    def test_column_without_default(self):
+        assert column_definition(Users, "burst", "burst", "postgres") == '"burst" INT'
+        with pytest.raises(RuntimeError):
+            column_definition(Users, "hashed_password", "hashed_password", "sqlite")
@@ -0,0 +1,131 @@
+import os
+import json
+import shutil
+
+from fastapi.testclient import TestClient
+
+from src.mock import MockApp
+from src.main import app
+from tests.test_main import login_user
+
+
+SPEC = {
+    "title": "Predictions",
+    "routes": [
+        {
+            "path": "/model",
+            "method": "POST",
+            "summary": "Model Inference on input data",
+            "tags": ["Model Inference"],
+            "api_key": "example",
+            "response": {"body": {"label": "positive", "score": 0.99}},
+        },
+        {
+            "path": "/items/{item_id}",
+            "response": {"body": {"id": "{item_id}", "q": "{q}"}, "template": True},
+        },
+        {
+            "path": "/health",
+            "response": {"body": "ok", "media_type": "text/plain", "headers": {"X-Mock": "true"}},
+        },
+    ],
+}
+
+
+class TestMockApp:
+
+    def setup_class(self):
+        self.client = TestClient(MockApp(SPEC))
+
+    def test_static_response(self):
+        response = self.client.post("/model", headers = {"accessKey": "example"})
+        assert response.status_code == 200
+        assert response.json() == {"label": "positive", "score": 0.99}
+
+        response = self.client.get("/health")
+        assert response.text == "ok"
+        assert response.headers["content-type"] == "text/plain"
+        assert response.headers["x-mock"] == "true"
+
+    def test_api_key(self):
+        response = self.client.post("/model")
+        assert response.status_code == 401
+        assert response.json() == {"detail": "Missing or invalid accessKey in request header."}
+        assert self.client.post("/model", headers = {"accessKey": "wrong"}).status_code == 401
+
+    def test_template(self):
+        response = self.client.get("/items/a%22b", params = {"q": "x\ny"})
+        assert response.json() == {"id": "a\"b", "q": "x\ny"}
+        assert self.client.get("/items/1").json() == {"id": "1", "q": ""}
+
+    def test_not_found(self):
+        assert self.client.get("/missing").status_code == 404
+        assert self.client.get("/model").status_code == 405
+        assert self.client.post("/items/1").status_code == 405
+
+    def test_openapi(self):
+        schema = self.client.get("/openapi.json").json()
+        assert schema["info"]["title"] == "Predictions"
+        assert list(schema["paths"]) == ["/model", "/items/{item_id}", "/health"]
+        operation = schema["paths"]["/model"]["post"]
+        assert operation["security"] == [{"accessKey": []}]
+        assert operation["responses"]["200"]["content"]["application/json"]["example"]["label"] == "positive"
+        assert schema["components"]["securitySchemes"]["accessKey"]["in"] == "header"
+        assert self.client.get("/docs").status_code == 200
+
+
+class TestMockProjects:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_mock_project(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            response = client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_spec": ("spec.json", json.dumps(SPEC))},
+            )
+            assert response.status_code == 200
+
+            response = client.post("/test_user/test_project/model", headers = {"accessKey": "example"})
+            assert response.json() == {"label": "positive", "score": 0.99}
+            assert client.get("/test_user/test_project/items/7").json() == {"id": "7", "q": ""}
+            assert "/test_user/test_project/model" in client.get("/catalog").json()["paths"]
+
+            spec = {"routes": [{"path": "/model", "method": "POST", "response": {"body": {"label": "negative"}}}]}
+            response = client.put(
+                "/test_user/test_project",
+                headers = headers,
+                files = {"project_spec": ("spec.json", json.dumps(spec))},
+            )
+            assert response.status_code == 200
+            assert client.post("/test_user/test_project/model").json() == {"label": "negative"}
+
+    def test_invalid_spec(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            spec = {"routes": [{"path": "/docs"}, {"path": "/a", "response": {"body": 1, "media_type": "text/plain"}}]}
+            response = client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_spec": ("spec.json", json.dumps(spec))},
+            )
+            assert response.status_code == 422
+            assert response.json()["detail"].startswith("Invalid project spec.")
+
+            response = client.post("/test_user", headers = headers, data = {"project_name": "test_project"})
+            assert response.status_code == 422
+            assert client.get("/test_user/", headers = headers).json() == []
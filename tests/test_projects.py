@@ -0,0 +1,170 @@
+import os
+import shutil
+import hashlib
+
+from fastapi.testclient import TestClient
+
+from src import loader
+from src import projects as proj
+from src.models import Users, Projects
+from src.main import app, mount_table
+from tests.test_main import login_user
+
+
+async def get_project(project_name: str) -> Projects:
+    return await Projects.get(name = project_name)
+
+
+async def create_rows(username: str, *project_names: str):
+    owner = await Users.get(username = username)
+    await Projects.bulk_create([Projects(name = name, owner = owner) for name in project_names])
+
+
+class TestScriptStorage:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def create_project(self, client: TestClient) -> dict:
+        access_token = login_user(client)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        with open(self.project_script, "rb") as f:
+            client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+        return headers
+
+    def test_checksum_recorded(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            self.create_project(client)
+            project = client.portal.call(get_project, "test_project")
+            assert project.checksum == hashlib.sha256(f.read()).hexdigest()
+
+            project_dir = os.path.join(self.users_dir, "test_user", "test_project")
+            assert not [name for name in os.listdir(project_dir) if name.endswith(".upload")]
+
+    def test_identical_update_skipped(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            headers = self.create_project(client)
+            project_app = mount_table.get("test_user", "test_project")
+
+            response = client.put(
+                "/test_user/test_project",
+                headers = headers,
+                files = {"project_script": f},
+            )
+            assert response.status_code == 200
+            assert mount_table.get("test_user", "test_project") is project_app
+            assert client.portal.call(get_project, "test_project").revision == 0
+
+            response = client.put(
+                "/test_user/test_project",
+                headers = headers,
+                files = {"project_script": ("app.py", b"from fastapi import FastAPI\napp = FastAPI()\n")},
+            )
+            assert response.status_code == 200
+            assert mount_table.get("test_user", "test_project") is not project_app
+            assert client.portal.call(get_project, "test_project").revision == 1
+
+    def test_upload_too_large(self, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client:
+            headers = self.create_project(client)
+            monkeypatch.setattr(proj, "MAX_UPLOAD_SIZE", 16)
+
+            response = client.put(
+                "/test_user/test_project",
+                headers = headers,
+                files = {"project_script": ("app.py", b"#" * 17)},
+            )
+            assert response.status_code == 413
+            assert response.json() == {
+                "detail": "Project script exceeds the maximum size of 16 bytes."
+            }
+
+            project_dir = os.path.join(self.users_dir, "test_user", "test_project")
+            assert not [name for name in os.listdir(project_dir) if name.endswith(".upload")]
+
+            response = client.get("/test_user/test_project/")
+            assert response.json() == "index!"
+
+    def test_current_app_mounted_during_update(self, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client:
+            headers = self.create_project(client)
+            mounted = []
+            import_fresh = loader.import_fresh
+
+            def import_while_mounted(module_name: str):
+                mounted.append(("test_user", "test_project") in mount_table)
+                return import_fresh(module_name)
+
+            monkeypatch.setattr(loader, "import_fresh", import_while_mounted)
+            response = client.put(
+                "/test_user/test_project",
+                headers = headers,
+                files = {"project_script": ("app.py", b"from fastapi import FastAPI\napp = FastAPI()\n")},
+            )
+            assert response.status_code == 200
+            assert mounted == [True]
+
+    def test_failed_load_rolled_back(self, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            headers = self.create_project(client)
+            project_app = mount_table.get("test_user", "test_project")
+
+            def import_broken(module_name: str):
+                raise RuntimeError("broken")
+
+            monkeypatch.setattr(loader, "import_fresh", import_broken)
+            response = client.put(
+                "/test_user/test_project",
+                headers = headers,
+                files = {"project_script": ("app.py", b"from fastapi import FastAPI\napp = FastAPI()\n")},
+            )
+            assert response.status_code == 422
+            assert response.json() == {"detail": "Invalid project script. RuntimeError: broken"}
+
+            assert mount_table.get("test_user", "test_project") is project_app
+            assert client.portal.call(get_project, "test_project").revision == 0
+            response = client.get("/test_user/test_project/")
+            assert response.json() == "index!"
+
+            project_dir = os.path.join(self.users_dir, "test_user", "test_project")
+            with open(os.path.join(project_dir, "app.py"), "rb") as app_file:
+                assert app_file.read() == f.read()
+            assert not os.path.exists(os.path.join(project_dir, "app.py.previous"))
+
+
+class TestProjectListing:
+
+    def test_pagination(self):
+        with TestClient(app) as client:
+            headers = {"Authorization": f"Bearer {login_user(client)}"}
+            client.portal.call(create_rows, "test_user", "b", "a", "c", "ab")
+
+            response = client.get("/test_user", headers = headers, params = {"limit": 3})
+            assert [project["name"] for project in response.json()] == ["a", "ab", "b"]
+            assert response.json()[0]["owner"] == {"username": "test_user"}
+            cursor = response.headers["X-Next-Cursor"]
+
+            response = client.get("/test_user", headers = headers, params = {"limit": 3, "cursor": cursor})
+            assert [project["name"] for project in response.json()] == ["c"]
+            assert "X-Next-Cursor" not in response.headers
+
+            response = client.get("/test_user", headers = headers, params = {"prefix": "a"})
+            assert [project["name"] for project in response.json()] == ["a", "ab"]
+
+            response = client.get("/test_user", headers = headers, params = {"cursor": "%"})
+            assert response.status_code == 422
+            response = client.get("/test_user", headers = headers, params = {"limit": 0})
+            assert response.status_code == 422
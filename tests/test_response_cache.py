@@ -0,0 +1,203 @@
+import os
+import shutil
+import asyncio
+
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI, Header, Response
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.response_cache import CacheSettings, MAX_CACHED_REQUEST_SIZE, ResponseCache
+from tests.test_loader import get_project
+from tests.test_main import login_user
+
+
+def build_project_app(calls: list) -> FastAPI:
+    project_app = FastAPI()
+
+    @project_app.get("/")
+    async def index():
+        calls.append("index")
+        await asyncio.sleep(0.05)
+        return "index!"
+
+    @project_app.post("/model")
+    def model(text: str, key: str = Header(default = "")):
+        calls.append("model")
+        return {"text": text, "key": key}
+
+    @project_app.get("/private")
+    def private(response: Response):
+        calls.append("private")
+        response.headers["Cache-Control"] = "no-store"
+        return "private"
+
+    @project_app.get("/session")
+    def session(response: Response):
+        calls.append("session")
+        response.set_cookie("session", "secret")
+        return "session"
+
+    return project_app
+
+
+class TestResponseCache:
+
+    def test_cached_and_not_modified(self):
+        calls = []
+        with TestClient(ResponseCache(build_project_app(calls), ttl = 10, budget = 1024)) as client:
+            response = client.get("/")
+            etag = response.headers["etag"]
+            assert response.json() == "index!"
+            assert client.get("/").json() == "index!"
+            assert calls == ["index"]
+
+            response = client.get("/", headers = {"If-None-Match": etag})
+            assert response.status_code == 304
+            assert response.headers["etag"] == etag
+            assert calls == ["index"]
+
+    def test_keyed_on_query_headers_and_body(self):
+        calls = []
+        with TestClient(ResponseCache(build_project_app(calls), ttl = 10, budget = 1024)) as client:
+            client.post("/model?text=a")
+            client.post("/model?text=a")
+            assert client.post("/model?text=b").json() == {"text": "b", "key": ""}
+            assert client.post("/model?text=a", headers = {"key": "k"}).json() == {"text": "a", "key": "k"}
+            client.post("/model?text=a", content = b"body")
+            assert calls == ["model"] * 4
+
+    def test_post_not_modified_ignored(self):
+        calls = []
+        with TestClient(ResponseCache(build_project_app(calls), ttl = 10, budget = 1024)) as client:
+            etag = client.post("/model?text=a").headers["etag"]
+            response = client.post("/model?text=a", headers = {"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.json() == {"text": "a", "key": ""}
+            assert calls == ["model"]
+
+    def test_uncacheable_passed_through(self):
+        calls = []
+        with TestClient(ResponseCache(build_project_app(calls), ttl = 10, budget = 1024)) as client:
+            client.get("/private")
+            response = client.get("/private")
+            assert "etag" not in response.headers
+            assert client.get("/missing").status_code == 404
+            assert client.get("/missing").status_code == 404
+            client.get("/session")
+            assert client.get("/session").cookies["session"] == "secret"
+            body = b"x" * (MAX_CACHED_REQUEST_SIZE + 1)
+            client.post("/model?text=a", content = body)
+            assert client.post("/model?text=a", content = body).json() == {"text": "a", "key": ""}
+            assert calls == ["private", "private", "session", "session", "model", "model"]
+
+    def test_budget(self):
+        calls = []
+        cached_app = ResponseCache(build_project_app(calls), ttl = 10, budget = 30)
+        with TestClient(cached_app) as client:
+            client.post("/model?text=a")
+            client.post("/model?text=b")
+            assert cached_app.cache.weight <= 30
+            client.post("/model?text=a")
+            assert calls == ["model"] * 3
+
+    def test_concurrent_requests_coalesced(self):
+        calls = []
+        cached_app = ResponseCache(build_project_app(calls), ttl = 10, budget = 1024)
+
+        async def run():
+            transport = httpx.ASGITransport(app = cached_app)
+            async with httpx.AsyncClient(transport = transport, base_url = "http://test") as client:
+                return await asyncio.gather(*[client.get("/") for _ in range(5)])
+
+        responses = asyncio.run(run())
+        assert [response.json() for response in responses] == ["index!"] * 5
+        assert calls == ["index"]
+        assert cached_app.stats()["coalesced"] == 4
+
+
+class TestCacheSettings:
+
+    def test_load(self):
+        def project(name, cache_ttl):
+            return SimpleNamespace(owner = SimpleNamespace(username = "user"), name = name, cache_ttl = cache_ttl)
+
+        settings = CacheSettings()
+        assert settings.load([project("a", 10), project("b", None)]) == [("user", "a")]
+        assert settings.ttl("user", "a") == 10
+        assert settings.ttl("user", "b") == 0
+        assert settings.load([project("a", 10), project("b", 5)]) == [("user", "b")]
+        # Projects deleted by another worker drop their TTL.
+        assert settings.load([project("b", 5)]) == [("user", "a")]
+        settings.remove_project("user", "b")
+        assert settings.ttls == {}
+
+
+class TestProjectResponseCache:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def create_project(self, client: TestClient, data: dict) -> dict:
+        access_token = login_user(client)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        with open(self.project_script, "rb") as f:
+            response = client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project", **data},
+                files = {"project_script": f},
+            )
+        assert response.status_code == 200
+        return headers
+
+    def test_invalidated_on_update(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client:
+            headers = self.create_project(client, {"cache_ttl": 60})
+            response = client.get("/test_user/test_project/")
+            assert response.json() == "index!"
+            etag = response.headers["etag"]
+
+            script = b'from fastapi import FastAPI\napp = FastAPI()\n@app.get("/")\ndef index():\n    return "updated!"\n'
+            client.put(
+                "/test_user/test_project",
+                headers = headers,
+                files = {"project_script": ("app.py", script)},
+            )
+            response = client.get("/test_user/test_project/", headers = {"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.json() == "updated!"
+
+    def test_opt_in(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client:
+            headers = self.create_project(client, {})
+            response = client.get("/test_user/test_project/")
+            assert "etag" not in response.headers
+            assert "response_cache_hits" not in client.get("/metrics").text
+
+            response = client.put("/test_user/test_project", headers = headers, data = {"cache_ttl": 60})
+            assert response.status_code == 200
+            client.get("/test_user/test_project/")
+            response = client.get("/test_user/test_project/")
+            assert "etag" in response.headers
+            metrics = client.get("/metrics").text
+            assert 'response_cache_hits{project="test_user/test_project"} 1' in metrics
+
+            project = client.portal.call(get_project, "test_project")
+            assert project.cache_ttl == 60
+
+            response = client.put("/test_user/test_project", headers = headers, data = {"cache_ttl": 0})
+            assert response.status_code == 200
+            response = client.get("/test_user/test_project/")
+            assert "etag" not in response.headers
+
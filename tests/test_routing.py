@@ -0,0 +1,139 @@
+import asyncio
+
+from fastapi import FastAPI, Header
+from fastapi.testclient import TestClient
+
+from src.routing import MountTable, ProjectDispatcher, TrackedApp, split_path, unwrap
+
+
+def build_project_app(name: str) -> FastAPI:
+    project_app = FastAPI()
+
+    @project_app.get("/")
+    def index():
+        return name
+
+    @project_app.get("/path")
+    def path():
+        return name
+
+    return project_app
+
+
+class TestMountTable:
+
+    def test_mount_and_unmount(self):
+        table = MountTable()
+        project_app = build_project_app("a")
+        table.mount("user", "project", project_app)
+        assert ("user", "project") in table
+        assert table.get("user", "project") is project_app
+        assert len(table) == 1
+
+        assert table.unmount("user", "project") is project_app
+        assert table.get("user", "project") is None
+        assert table.unmount("user", "project") is None
+        assert len(table) == 0
+
+    def test_mount_returns_replaced_app(self):
+        table = MountTable()
+        project_app = build_project_app("a")
+        assert table.mount("user", "project", project_app) is None
+        assert table.mount("user", "project", build_project_app("b")) is project_app
+
+    def test_split_path(self):
+        assert split_path("/user/project/") == ("user", "project", "/")
+        assert split_path("/user/project/a/b") == ("user", "project", "/a/b")
+        assert split_path("/user/project") is None
+        assert split_path("/user/") is None
+        assert split_path("//project/") is None
+
+
+class TestProjectDispatcher:
+
+    def setup_method(self):
+        self.table = MountTable()
+        self.app = FastAPI()
+
+        @self.app.put("/{username}/{project_name}")
+        def admin(username: str, project_name: str):
+            return "admin"
+
+        self.app.add_middleware(ProjectDispatcher, table = self.table)
+
+    def test_dispatch_to_mounted_project(self):
+        self.table.mount("user", "project", build_project_app("project"))
+        with TestClient(self.app) as client:
+            response = client.get("/user/project/")
+            assert response.status_code == 200
+            assert response.json() == "project"
+
+            response = client.get("/user/project/path")
+            assert response.status_code == 200
+            assert response.json() == "project"
+
+            response = client.get("/user/project/openapi.json")
+            assert response.status_code == 200
+
+    def test_unmounted_project_falls_through(self):
+        self.table.mount("user", "project", build_project_app("project"))
+        self.table.unmount("user", "project")
+        with TestClient(self.app) as client:
+            response = client.get("/user/project/path")
+            assert response.status_code == 404
+
+    def test_admin_route_not_shadowed(self):
+        self.table.mount("user", "project", build_project_app("project"))
+        with TestClient(self.app) as client:
+            response = client.put("/user/project")
+            assert response.status_code == 200
+            assert response.json() == "admin"
+
+    def test_reserved_prefix_not_dispatched(self):
+        captured = []
+        attacker_app = FastAPI()
+
+        @attacker_app.put("/{path:path}")
+        def capture(authorization: str = Header(default = "")):
+            captured.append(authorization)
+            return "captured"
+
+        self.table.mount("limits", "victim", attacker_app)
+
+        @self.app.put("/limits/{username}/{project_name}")
+        def limits(username: str, project_name: str):
+            return "limits"
+
+        with TestClient(self.app) as client:
+            response = client.put("/limits/victim/project", headers = {"Authorization": "Bearer token"})
+            assert response.json() == "limits"
+            client.put("/limits/victim/", headers = {"Authorization": "Bearer token"})
+        assert captured == []
+
+
+class TestTrackedApp:
+
+    def test_in_flight(self):
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_app(scope, receive, send):
+            started.set()
+            await release.wait()
+
+        async def run():
+            tracked = TrackedApp(slow_app)
+            assert unwrap(tracked) is slow_app
+            assert await tracked.wait_idle(0)
+
+            request = asyncio.create_task(tracked({"type": "http"}, None, None))
+            await started.wait()
+            assert tracked.in_flight == 1
+            assert not await tracked.wait_idle(0.01)
+
+            release.set()
+            assert await tracked.wait_idle(1)
+            assert tracked.in_flight == 0
+            await request
+
+        asyncio.run(run())
@@ -0,0 +1,128 @@
+import io
+import os
+import sys
+import shutil
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from src import loader
+from src import main
+from src import storage
+from src.models import Scripts
+from src.eviction import purge_modules
+from src.main import app
+from tests.test_main import login_user
+
+
+UPDATED_SCRIPT = b"""from fastapi import FastAPI
+
+
+app = FastAPI()
+
+
+@app.get("/")
+def index():
+    return "updated!"
+"""
+
+
+async def get_source(project_name: str) -> bytes:
+    script = await Scripts.get(project__name = project_name)
+    return script.source
+
+
+async def count_scripts() -> int:
+    return await Scripts.all().count()
+
+
+class TestScriptStore:
+
+    def test_import_from_memory(self, tmp_path, monkeypatch):
+        (tmp_path / "memory_root" / "users").mkdir(parents = True)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        store = storage.ScriptStore()
+        source = b"VALUE = __file__\n"
+        store.add("user", "project", storage.Script(source = source, bytecode = b"stale"))
+        store.install("memory_root", "/nowhere")
+        try:
+            module = __import__("memory_root.users.user.project.app", fromlist = ["VALUE"])
+            assert module.VALUE == os.path.join("/nowhere", "user", "project", "app.py")
+            assert store.get_source("memory_root.users.user.project.app") == source.decode()
+        finally:
+            store.uninstall()
+            purge_modules("memory_root")
+        assert store not in sys.meta_path
+
+
+class TestDatabaseStorage:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_scripts_stored_in_database(self, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        monkeypatch.setattr(storage, "DATABASE_STORAGE", True)
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            response = client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+            assert response.status_code == 200
+            assert not os.path.exists(os.path.join(self.users_dir, "test_user"))
+            assert client.get("/test_user/test_project/").json() == "index!"
+            f.seek(0)
+            assert client.portal.call(get_source, "test_project") == f.read()
+            assert client.get("/catalog").json()["paths"] != {}
+
+            def import_broken(module_name: str):
+                raise RuntimeError("broken")
+
+            with monkeypatch.context() as m:
+                m.setattr(loader, "import_fresh", import_broken)
+                response = client.put(
+                    "/test_user/test_project",
+                    headers = headers,
+                    files = {"project_script": ("app.py", UPDATED_SCRIPT)},
+                )
+            assert response.status_code == 422
+            assert client.get("/test_user/test_project/").json() == "index!"
+
+            response = client.put(
+                "/test_user/test_project",
+                headers = headers,
+                files = {"project_script": ("app.py", UPDATED_SCRIPT)},
+            )
+            assert response.status_code == 200
+            assert client.get("/test_user/test_project/").json() == "updated!"
+            assert client.portal.call(get_source, "test_project") == UPDATED_SCRIPT
+
+            archive = zipfile.ZipFile(io.BytesIO(client.get("/test_user/export", headers = headers).content))
+            assert archive.read("test_project/app.py") == UPDATED_SCRIPT
+
+            # A replica that has not seen the project loads it from the database.
+            client.portal.call(main.unload_app, "test_user", "test_project")
+            assert storage.scripts.get("test_user", "test_project") is None
+            client.portal.call(main.sync_mount, "test_user", "test_project", True)
+            assert client.get("/test_user/test_project/").json() == "updated!"
+
+            client.delete("/test_user/test_project", headers = headers)
+            assert client.portal.call(count_scripts) == 0
+            assert storage.scripts.get("test_user", "test_project") is None
+
+        # Projects are imported from their folder again once the store is uninstalled.
+        assert not [
+            name for name, module in list(sys.modules.items())
+            if getattr(getattr(module, "__spec__", None), "loader", None) is storage.scripts
+        ]
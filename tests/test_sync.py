@@ -0,0 +1,128 @@
+import os
+import shutil
+
+from fastapi.testclient import TestClient
+
+from src.models import Projects, Users
+from src.sync import MountSync
+from src.main import app, mount_sync
+from tests.test_main import login_user
+
+
+async def create_row(username: str, project_name: str) -> Projects:
+    owner = await Users.get(username = username)
+    return await Projects.create(name = project_name, owner = owner)
+
+
+class TestMountSync:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_generation(self, tmp_path):
+        sync = MountSync(path = str(tmp_path / "generation"))
+        assert sync.read_generation() == 0
+        assert sync.bump_generation() == 1
+        assert sync.bump_generation() == 2
+        assert sync.read_generation() == 2
+
+    def test_sync_changes_from_other_worker(self, tmp_path, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        monkeypatch.setattr(mount_sync, "path", str(tmp_path / "generation"))
+        other = MountSync(path = mount_sync.path)
+        changes = []
+
+        async def mount(username: str, project_name: str, reload_module: bool):
+            changes.append(("reload" if reload_module else "mount", username, project_name))
+
+        async def unmount(username: str, project_name: str):
+            changes.append(("unmount", username, project_name))
+
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            client.portal.call(other.sync, mount, unmount)
+            assert not changes
+
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+            client.portal.call(other.sync, mount, unmount)
+            assert changes == [("mount", "test_user", "test_project")]
+
+            client.portal.call(other.sync, mount, unmount)
+            assert len(changes) == 1
+
+            client.put(
+                "/test_user/test_project",
+                headers = headers,
+                files = {"project_script": ("app.py", b"from fastapi import FastAPI\napp = FastAPI()\n")},
+            )
+            client.portal.call(other.sync, mount, unmount)
+            assert changes[-1] == ("reload", "test_user", "test_project")
+
+            # Deleted and recreated between two syncs, the project starts over at revision 0.
+            client.delete("/test_user/test_project", headers = headers)
+            f.seek(0)
+            client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+            client.portal.call(other.sync, mount, unmount)
+            assert changes[-1] == ("reload", "test_user", "test_project")
+            assert len(changes) == 3
+
+            client.delete("/test_user/test_project", headers = headers)
+            client.portal.call(other.sync, mount, unmount)
+            assert changes[-1] == ("unmount", "test_user", "test_project")
+            assert not other.versions
+
+    def test_failed_and_pending_projects_retried(self, tmp_path, monkeypatch, monkeypatch_root, monkeypatch_users_dir):
+        monkeypatch.setattr(mount_sync, "path", str(tmp_path / "generation"))
+        other = MountSync(path = mount_sync.path)
+        mounted = []
+        failures = []
+
+        async def mount(username: str, project_name: str, reload_module: bool):
+            if failures:
+                raise failures.pop()
+            mounted.append(project_name)
+
+        async def unmount(username: str, project_name: str):
+            mounted.remove(project_name)
+
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            # A project row committed before its script is validated is not synced yet.
+            client.portal.call(create_row, "test_user", "pending_project")
+            client.portal.call(mount_sync.notify)
+            client.portal.call(other.sync, mount, unmount)
+            assert not mounted
+
+            client.post(
+                "/test_user",
+                headers = {"Authorization": f"Bearer {access_token}"},
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+            failures.append(RuntimeError("script not found"))
+            client.portal.call(other.sync, mount, unmount)
+            assert not mounted
+            assert ("test_user", "test_project") not in other.versions
+
+            # Retried on the next sync, without another change bumping the generation.
+            client.portal.call(other.sync, mount, unmount)
+            assert mounted == ["test_project"]
+            assert ("test_user", "pending_project") not in other.versions
@@ -0,0 +1,170 @@
+import os
+import shutil
+import asyncio
+import threading
+
+import httpx
+import pytest
+from anyio import CapacityLimiter
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.threads import PartitionedLimiter, ProjectThreads, ThreadPartitions, ThreadedApp
+from tests.test_main import login_user
+
+
+async def wait_until(condition, timeout = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+    assert condition()
+
+
+class TestThreadedApp:
+
+    def test_projects_do_not_share_threads(self, monkeypatch):
+        monkeypatch.setattr("src.threads.PROJECT_THREADS", 1)
+        release = threading.Event()
+
+        slow_app = FastAPI()
+
+        @slow_app.get("/")
+        def slow():
+            release.wait(5)
+            return "slow"
+
+        fast_app = FastAPI()
+
+        @fast_app.get("/")
+        def fast():
+            return "fast"
+
+        async def run():
+            threads = ThreadPartitions()
+            threads.install()
+            slow = httpx.AsyncClient(
+                transport = httpx.ASGITransport(app = ThreadedApp(slow_app, threads, "user", "slow")),
+                base_url = "http://test",
+            )
+            fast = httpx.AsyncClient(
+                transport = httpx.ASGITransport(app = ThreadedApp(fast_app, threads, "user", "fast")),
+                base_url = "http://test",
+            )
+            async with slow, fast:
+                blocked = [asyncio.create_task(slow.get("/")) for _ in range(2)]
+                await wait_until(lambda: threads.stats()["user/slow"]["waiting"] == 1)
+                await asyncio.sleep(0.1)
+                assert threads.stats()["user/slow"]["in_use"] == 1
+
+                # The slow project holds its only token, yet the fast project still gets a thread.
+                response = await asyncio.wait_for(fast.get("/"), timeout = 2)
+                assert response.json() == "fast"
+                release.set()
+                responses = await asyncio.gather(*blocked)
+            assert [response.json() for response in responses] == ["slow", "slow"]
+            return threads.stats()
+
+        stats = asyncio.run(run())
+        assert stats["user/slow"]["calls"] == 2
+        assert stats["user/slow"]["wait_seconds"] > 0.1
+        assert stats["user/fast"]["calls"] == 1
+
+    def test_global_ceiling(self, monkeypatch):
+        monkeypatch.setattr("src.threads.PROJECT_THREADS_TOTAL", 1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def handler():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        async def run():
+            threads = ThreadPartitions()
+            threads.install()
+            apps = []
+            for project_name in ("a", "b"):
+                project_app = FastAPI()
+                project_app.get("/")(handler)
+                transport = httpx.ASGITransport(app = ThreadedApp(project_app, threads, "user", project_name))
+                apps.append(httpx.AsyncClient(transport = transport, base_url = "http://test"))
+
+            first = asyncio.create_task(apps[0].get("/"))
+            await asyncio.to_thread(started.wait, 5)
+            second = asyncio.create_task(apps[1].get("/"))
+            await wait_until(lambda: threads.stats()["user/b"]["waiting"] == 1)
+            assert threads.ceiling_stats() == {"tokens": 1, "in_use": 1}
+            release.set()
+            await asyncio.gather(first, second)
+            for client in apps:
+                await client.aclose()
+
+        asyncio.run(run())
+
+
+class TestPartitionedLimiter:
+
+    def test_cancelled_wait_releases_project_token(self):
+        async def run():
+            threads = ProjectThreads(tokens = 1)
+            ceiling = CapacityLimiter(1)
+            await ceiling.acquire()
+            task = asyncio.create_task(threads.acquire(ceiling))
+            await wait_until(lambda: threads.limiter is not None and threads.limiter.borrowed_tokens == 1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return threads.limiter.borrowed_tokens, threads.waiting
+
+        assert asyncio.run(run()) == (0, 0)
+
+    def test_default_limiter_proxied(self):
+        async def run():
+            default = CapacityLimiter(4)
+            limiter = PartitionedLimiter(default, total = 2)
+            limiter.total_tokens = 3
+            return default.total_tokens, limiter.total_tokens, limiter.borrowed_tokens
+
+        assert asyncio.run(run()) == (3, 3, 0)
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr("src.threads.PROJECT_THREADS", 0)
+        threads = ThreadPartitions()
+        threads.install()
+        assert threads.limiter is None
+        assert threads.ceiling_stats() == {}
+
+
+class TestProjectThreads:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_metrics(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+            assert client.get("/test_user/test_project/").json() == "index!"
+
+            text = client.get("/metrics").text
+            assert 'dynamic_routing_project_threads_calls{project="test_user/test_project"} 1' in text
+            assert 'dynamic_routing_project_threads_wait_seconds{project="test_user/test_project"}' in text
+            assert "dynamic_routing_project_threads_ceiling_tokens 40" in text
+
+            client.delete("/test_user/test_project", headers = headers)
+            assert "test_user/test_project" not in client.get("/metrics").text
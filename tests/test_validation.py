@@ -0,0 +1,120 @@
+import os
+import shutil
+import asyncio
+import importlib.util
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from src import validation
+from src.main import app
+from tests.test_main import login_user
+
+
+def validate(tmp_path, source: str) -> str:
+    path = tmp_path / "app.py.upload"
+    path.write_text(source)
+    return asyncio.run(validation.validate_script(str(path)))
+
+
+class TestValidateScript:
+
+    def test_valid_script(self, tmp_path):
+        cfile = validate(tmp_path, "from fastapi import FastAPI\napp = FastAPI()\n")
+        assert os.path.isfile(cfile)
+
+    def test_syntax_error(self, tmp_path):
+        with pytest.raises(HTTPException) as exc_info:
+            validate(tmp_path, "def index(:\n")
+        assert exc_info.value.status_code == 422
+        assert "SyntaxError" in exc_info.value.detail
+
+    def test_missing_app(self, tmp_path):
+        with pytest.raises(HTTPException) as exc_info:
+            validate(tmp_path, "x = 1\n")
+        assert exc_info.value.detail == "Invalid project script. Project script does not define an app."
+
+    def test_non_asgi_app(self, tmp_path):
+        with pytest.raises(HTTPException) as exc_info:
+            validate(tmp_path, "app = 1\n")
+        assert exc_info.value.detail == "Invalid project script. Project app is not an ASGI app."
+
+    def test_import_error(self, tmp_path):
+        with pytest.raises(HTTPException) as exc_info:
+            validate(tmp_path, "raise RuntimeError('broken')\n")
+        assert exc_info.value.detail == "Invalid project script. RuntimeError: broken"
+
+    def test_import_timeout(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(validation, "VALIDATION_TIMEOUT", 0.5)
+        with pytest.raises(HTTPException) as exc_info:
+            validate(tmp_path, "while True:\n    pass\n")
+        assert "timed out" in exc_info.value.detail
+
+    def test_resource_limits(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(validation, "VALIDATION_MEMORY_LIMIT", 256)
+        with pytest.raises(HTTPException) as exc_info:
+            validate(tmp_path, "data = bytearray(512 * 1024 * 1024)\n")
+        assert exc_info.value.detail == "Invalid project script. MemoryError"
+
+        monkeypatch.setattr(validation, "VALIDATION_CPU_LIMIT", 1)
+        with pytest.raises(HTTPException) as exc_info:
+            validate(tmp_path, "while True:\n    pass\n")
+        assert "resource limits exceeded" in exc_info.value.detail
+
+
+class TestUploadValidation:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+        self.project_script = os.path.join(tests_dir, "scripts", "demo_app.py")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_create_invalid_project(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client:
+            access_token = login_user(client)
+            response = client.post(
+                "/test_user",
+                headers = {"Authorization": f"Bearer {access_token}"},
+                data = {"project_name": "test_project"},
+                files = {"project_script": ("app.py", b"def index(:\n")},
+            )
+            assert response.status_code == 422
+
+            response = client.get(
+                "/test_user",
+                headers = {"Authorization": f"Bearer {access_token}"},
+            )
+            assert response.json() == []
+            assert not os.path.isdir(os.path.join(self.users_dir, "test_user"))
+
+    def test_update_invalid_project(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client, open(self.project_script, "rb") as f:
+            access_token = login_user(client)
+            client.post(
+                "/test_user",
+                headers = {"Authorization": f"Bearer {access_token}"},
+                data = {"project_name": "test_project"},
+                files = {"project_script": f},
+            )
+            project_dir = os.path.join(self.users_dir, "test_user", "test_project")
+            project_script = os.path.join(project_dir, "app.py")
+            assert os.path.isfile(importlib.util.cache_from_source(project_script))
+
+            response = client.put(
+                "/test_user/test_project",
+                headers = {"Authorization": f"Bearer {access_token}"},
+                files = {"project_script": ("app.py", b"app = None\n")},
+            )
+            assert response.status_code == 422
+            assert sorted(os.listdir(project_dir)) == ["__init__.py", "__pycache__", "app.py", "openapi.json"]
+
+            response = client.get("/test_user/test_project/")
+            assert response.status_code == 200
+            assert response.json() == "index!"
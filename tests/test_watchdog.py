@@ -0,0 +1,109 @@
+import os
+import time
+import shutil
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.watchdog import Watchdog
+from tests.test_main import login_user
+
+
+BLOCKING_SCRIPT = b"""import time
+from fastapi import FastAPI
+
+
+app = FastAPI()
+
+
+@app.get("/")
+async def index():
+    time.sleep(0.3)
+    return "index!"
+"""
+
+
+def block_loop():
+    time.sleep(0.2)
+
+
+class TestWatchdog:
+
+    def test_stall(self):
+        watchdog = Watchdog(interval = 0.01, threshold = 0.05)
+
+        async def run():
+            watchdog.start()
+            await asyncio.sleep(0.05)
+            block_loop()
+            await asyncio.sleep(0.05)
+            watchdog.stop()
+
+        asyncio.run(run())
+        report = watchdog.report()
+        assert report.lag["beats"] > 2
+        assert report.lag["stalls"] == 1
+        assert report.lag["max_lag_seconds"] >= 0.15
+        stall = report.stalls[0]
+        assert stall.duration >= 0.15
+        assert stall.username is None
+        assert "block_loop" in stall.stack[-1]
+        assert report.projects == []
+
+    def test_no_stall(self):
+        watchdog = Watchdog(interval = 0.01, threshold = 0.05)
+
+        async def run():
+            watchdog.start()
+            await asyncio.sleep(0.1)
+            watchdog.stop()
+
+        asyncio.run(run())
+        assert watchdog.stats()["stalls"] == 0
+        assert watchdog.report().stalls == []
+
+
+class TestStallReport:
+
+    def setup_class(self):
+        tests_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+        self.users_dir = os.path.join(tests_dir, "users")
+
+    def teardown_method(self):
+        for item in os.listdir(self.users_dir):
+            path = os.path.join(self.users_dir, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors = True)
+
+    def test_project_stall(self, monkeypatch_root, monkeypatch_users_dir):
+        with TestClient(app) as client:
+            access_token = login_user(client)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.post(
+                "/test_user",
+                headers = headers,
+                data = {"project_name": "test_project"},
+                files = {"project_script": ("app.py", BLOCKING_SCRIPT)},
+            )
+            assert client.get("/test_user/test_project/").json() == "index!"
+
+            assert client.get("/stalls", params = {"username": "test_user"}).status_code == 401
+            report = client.get("/stalls", headers = headers, params = {"username": "test_user"}).json()
+            project = report["projects"][0]
+            assert (project["username"], project["project_name"]) == ("test_user", "test_project")
+            assert project["max_stall"] >= 0.2
+            assert all(stall["username"] == "test_user" for stall in report["stalls"])
+            stall = [stall for stall in report["stalls"] if stall["project_name"] == "test_project"][0]
+            assert any(os.path.join("test_project", "app.py") in line for line in stall["stack"])
+
+            other_token = login_user(client, {"username": "other_user", "password": "other_password"})
+            other_headers = {"Authorization": f"Bearer {other_token}"}
+            report = client.get("/stalls", headers = other_headers, params = {"username": "other_user"}).json()
+            assert report["projects"] == []
+            assert report["stalls"] == []
+            assert "dynamic_routing_event_loop_stalls" in client.get("/metrics").text
+
+            client.delete("/test_user/test_project", headers = headers)
+            report = client.get("/stalls", headers = headers, params = {"username": "test_user"}).json()
+            assert report["projects"] == []